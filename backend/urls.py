@@ -1,7 +1,6 @@
 from django.contrib import admin
-from django.urls import path
+from django.urls import path, re_path
 from django.conf import settings
-from django.conf.urls.static import static
 from store import views
 from rest_framework_simplejwt.views import TokenObtainPairView
 
@@ -11,15 +10,27 @@ urlpatterns = [
     # API TIENDA
     path('api/products/', views.get_products, name='get_products'),
     path('api/products/<int:pk>/', views.get_product, name='get_product'),
+    path('api/catalog/', views.get_catalog, name='get_catalog'),
     path('api/categories/', views.get_categories, name='get_categories'),
     path('api/brands/', views.get_unique_brands, name='get_unique_brands'),
+    path('api/cache/stats/', views.cache_stats, name='cache_stats'),
+    path('api/metrics/', views.request_metrics, name='request_metrics'),
+    path('api/recommendations/cart/', views.get_cart_recommendations, name='get_cart_recommendations'),
     path('api/recommendations/<int:pk>/', views.get_related_products, name='get_related_products'),
     
     # 🔴 ESTA ES LA CORRECCIÓN: Apuntamos a create_preference
     path('api/create_preference/', views.create_preference, name='create_preference'),
+    path('api/payments/webhook/', views.payment_webhook, name='payment_webhook'),
+    path('api/orders/<str:reference>/', views.get_order_status, name='get_order_status'),
 
     # API AUTH
     path('api/login/', views.MyTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/register/', views.register_user, name='register'),
+]
 
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+if settings.SERVE_MEDIA:
+    urlpatterns.append(re_path(r'^media/(?P<path>.+)$', views.serve_media, name='media'))
+
+# Al final: el resto de las rutas son páginas del frontend (React Router)
+# (sin la barra final también: /admin y /api tienen que llegar a APPEND_SLASH o dar 404, no al index.html)
+urlpatterns.append(re_path(r'^(?!(?:api|admin|static|media)(?:/|$))', views.frontend, name='frontend'))
\ No newline at end of file
@@ -4,5 +4,12 @@ set -o errexit
 
 pip install -r requirements.txt
 
+# Estáticos con hash + .gz/.br (WhiteNoise los sirve con caché immutable)
 python manage.py collectstatic --no-input
-python manage.py migrate
\ No newline at end of file
+
+# Frontend compilado (si está): copias .gz/.br junto a cada asset
+if [ -d frontend/dist ]; then
+    python -m whitenoise.compress frontend/dist
+fi
+
+python manage.py migrate
@@ -102,13 +102,11 @@ function CartPage() {
 
   // EFECTOS
   useEffect(() => {
-    fetch(`${API_URL}/api/products/`)
+    // El servidor calcula las sugerencias (ids ordenados = misma clave de caché)
+    const cartIds = cart.map(item => item.id).sort((a, b) => a - b).join(',');
+    fetch(`${API_URL}/api/recommendations/cart/?ids=${cartIds}&limit=4&fields=id,name,brand,image,price,original_price,category,label,label_display`)
       .then(res => res.json())
-      .then(data => {
-        const cartIds = cart.map(item => item.id);
-        const filtered = data.filter(p => !cartIds.includes(p.id));
-        setSuggestedProducts(filtered.slice(0, 4));
-      })
+      .then(data => setSuggestedProducts(data))
       .catch(console.error);
   }, [cart]); 
 
@@ -148,10 +146,11 @@ function CartPage() {
   const handlePayment = async () => {
     if (cart.length === 0) return;
     setIsProcessing(true);
+    // El servidor recalcula precios y descuento: solo mandamos ids, cantidades y el cupón
     const finalOrderData = { 
-        items: cart, 
+        items: cart.map(item => ({ id: item.id, quantity: item.quantity })), 
         payer: formData,
-        details: { subtotal: total, discount: discountAmount, final_total: total - discountAmount }
+        coupon: discountAmount > 0 ? couponCode.trim().toUpperCase() : ''
     };
     try {
       const response = await fetch(`${API_URL}/api/create_preference/`, {
@@ -161,7 +160,7 @@ function CartPage() {
       });
       const data = await response.json();
       if (data.init_point) window.location.href = data.init_point; 
-      else { alert("Error al generar el pago."); setIsProcessing(false); }
+      else { alert(data.error || "Error al generar el pago."); setIsProcessing(false); }
     } catch (error) {
       console.error(error);
       alert("Error de conexión");
@@ -1,13 +1,19 @@
 import { useState, useEffect } from 'react'
 import { Link, useSearchParams } from 'react-router-dom'
 import Navbar from './components/Navbar' // Asegúrate que la ruta sea correcta
-import { API_URL, getImageUrl } from './config';
+import { API_URL, responsiveImageProps } from './config';
+
+// Campos que pinta la grilla: el backend no manda 'description' ni 'images'
+const LIST_FIELDS = 'id,name,brand,image,image_srcset,price,original_price,category,label,label_display';
 
 function Catalog() {
   const [products, setProducts] = useState([])
   const [categories, setCategories] = useState([])
   const [availableBrands, setAvailableBrands] = useState([]) 
+  const [totalResults, setTotalResults] = useState(0)
   const [loading, setLoading] = useState(true)
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
 
   // Estado para abrir/cerrar los filtros en móvil
   const [showMobileFilters, setShowMobileFilters] = useState(false);
@@ -24,10 +30,6 @@ function Catalog() {
     fetch(`${API_URL}/api/categories/`)
       .then(res => res.json())
       .then(data => setCategories(data));
-
-    fetch(`${API_URL}/api/brands/`)
-      .then(res => res.json())
-      .then(data => setAvailableBrands(data));
   }, [])
 
   // 2. MANEJADORES
@@ -78,12 +80,17 @@ function Catalog() {
     if (searchQuery) params.append('search', searchQuery);
     if (categoryId) params.append('category', categoryId);
     if (ordering) params.append('ordering', ordering); 
+    params.append('fields', LIST_FIELDS);
     selectedBrands.forEach(brand => params.append('brand', brand));
 
-    fetch(`${API_URL}/api/products/?${params.toString()}`)
+    // Grilla + marcas con conteo en una sola petición
+    fetch(`${API_URL}/api/catalog/?${params.toString()}`)
       .then(res => res.json())
       .then(data => {
-        setProducts(data)
+        setProducts(data.results)
+        setNextCursor(data.next)
+        setAvailableBrands(data.facets.brand)
+        setTotalResults(data.facets.total)
         setLoading(false)
       })
       .catch(err => {
@@ -92,6 +99,34 @@ function Catalog() {
       });
   }, [searchParams]) 
 
+  // 4. SIGUIENTE PÁGINA (cursor que manda el backend en X-Next-Cursor)
+  const buildListParams = () => {
+    const params = new URLSearchParams(searchParams);
+    params.set('fields', LIST_FIELDS);
+    return params;
+  };
+
+  const handleLoadMore = () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    const params = buildListParams();
+    params.set('cursor', nextCursor);
+
+    fetch(`${API_URL}/api/products/?${params.toString()}`)
+      .then(res => {
+        setNextCursor(res.headers.get('X-Next-Cursor'));
+        return res.json();
+      })
+      .then(data => {
+        setProducts(prev => [...prev, ...data]);
+        setLoadingMore(false);
+      })
+      .catch(err => {
+          console.error("Error conectando:", err);
+          setLoadingMore(false);
+      });
+  };
+
   const calculateDiscount = (original, current) => {
       if (!original || !current) return 0;
       const discount = ((original - current) / original) * 100;
@@ -175,6 +210,24 @@ function Catalog() {
                 })}
             </ul>
         </div>
+        {availableBrands.length > 0 && (
+        <div className="mb-6">
+            <h3 className="text-[11px] font-bold text-gray-400 uppercase tracking-widest mb-3 pb-2 border-b border-gray-100">
+                Marcas
+            </h3>
+            <ul className="space-y-1">
+                {availableBrands.map(({ value, count }) => (
+                    <li key={value}>
+                        <label className="flex items-center gap-2 px-3 py-1.5 text-sm text-gray-600 cursor-pointer hover:text-black">
+                            <input type="checkbox" checked={selectedBrands.includes(value)} onChange={() => handleBrandChange(value)} className="accent-[#0071e3]" />
+                            <span className="flex-1">{value}</span>
+                            <span className="text-[11px] text-gray-400">{count}</span>
+                        </label>
+                    </li>
+                ))}
+            </ul>
+        </div>
+        )}
         <MobileFilterContent />
     </>
   );
@@ -211,7 +264,7 @@ function Catalog() {
 
             {/* TEXTO DERECHA: Cantidad de resultados */}
             <span className="text-xs font-semibold text-gray-400">
-                {products.length} resultados
+                {totalResults} resultados
             </span>
         </div>
 
@@ -260,7 +313,7 @@ function Catalog() {
                             onClick={handleCloseFilters} 
                             className="w-full py-3.5 bg-black text-white font-bold rounded-xl active:scale-[0.98] transition-transform shadow-lg"
                         >
-                            Ver {products.length} resultados
+                            Ver {totalResults} resultados
                         </button>
                     </div>
                 </div>
@@ -280,7 +333,7 @@ function Catalog() {
                     <h1 className="text-xl font-bold text-gray-800">
                         {categoryId && categories.find(c => c.id == categoryId)?.name || "Todos los productos"}
                     </h1>
-                    <span className="text-xs font-bold bg-gray-100 px-3 py-1 rounded-full text-gray-600">{products.length} Items</span>
+                    <span className="text-xs font-bold bg-gray-100 px-3 py-1 rounded-full text-gray-600">{totalResults} Items</span>
                 </div>
                 
                 {loading ? (
@@ -305,7 +358,7 @@ function Catalog() {
                             )}
 
                             <div className="aspect-square bg-gray-100 mb-2 md:mb-4 overflow-hidden rounded-md">
-                                <img src={getImageUrl(product.image)} alt={product.name} className="w-full h-full object-cover object-center group-hover:scale-105 transition-transform duration-500"/>
+                                <img {...responsiveImageProps(product, "(min-width: 1024px) 25vw, 50vw")} alt={product.name} className="w-full h-full object-cover object-center group-hover:scale-105 transition-transform duration-500"/>
                             </div>
 
                             <div>
@@ -331,6 +384,14 @@ function Catalog() {
                         ))}
                     </div>
                 )}
+
+                {!loading && nextCursor && (
+                    <div className="flex justify-center mt-8">
+                        <button onClick={handleLoadMore} disabled={loadingMore} className="px-6 py-2.5 rounded-full border border-gray-200 bg-white text-sm font-bold text-gray-700 hover:border-[#0071e3] hover:text-[#0071e3] transition-colors disabled:opacity-50">
+                            {loadingMore ? 'Cargando...' : 'Cargar más'}
+                        </button>
+                    </div>
+                )}
             </main>
         </div>
       </div>
@@ -1,14 +1,14 @@
 import { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import Navbar from './components/Navbar';
-import { API_URL, getImageUrl } from './config';
+import { API_URL, getImageUrl, responsiveImageProps } from './config';
 
 function Home() {
   const [featuredProduct, setFeaturedProduct] = useState(null);
   const [secondaryProducts, setSecondaryProducts] = useState([]);
 
   useEffect(() => {
-    fetch(`${API_URL}/api/products/`)
+    fetch(`${API_URL}/api/products/?limit=7&fields=id,name,brand,image,image_srcset,price,original_price,category,label,label_display`)
       .then(res => res.json())
       .then(data => {
         if (data.length > 0) {
@@ -92,7 +92,7 @@ function Home() {
                               <Link to={`/product/${prod.id}`} className="text-[#0071e3] bg-transparent border border-[#0071e3] px-5 py-2 rounded-full font-normal text-[15px] hover:bg-[#0071e3] hover:text-white transition-colors min-w-[100px]">Comprar</Link>
                           </div>
                       </div>
-                      <img src={getImageUrl(prod.image)} alt={prod.name} className="absolute bottom-0 w-full max-w-[480px] object-contain transition-transform duration-700 ease-out group-hover:scale-105"/>
+                      <img {...responsiveImageProps(prod, "(min-width: 768px) 50vw, 100vw")} alt={prod.name} className="absolute bottom-0 w-full max-w-[480px] object-contain transition-transform duration-700 ease-out group-hover:scale-105"/>
                    </div>
                    )
                 })}
@@ -1,16 +1,41 @@
-import { useEffect } from 'react';
-import { Link } from 'react-router-dom';
+import { useEffect, useState } from 'react';
+import { Link, useSearchParams } from 'react-router-dom';
 import { useCart } from './context/CartContext';
 import Navbar from './components/Navbar';
+import { API_URL } from './config';
+
+const ORDER_STATUS_TEXT = {
+  PENDING: 'Confirmando tu pago con Mercado Pago...',
+  APPROVED: 'Pago confirmado ✔',
+  REJECTED: 'El pago fue rechazado',
+  CANCELLED: 'El pedido fue cancelado',
+};
 
 function SuccessPage() {
   const { cart, removeFromCart } = useCart();
+  const [searchParams] = useSearchParams();
+  const [orderStatus, setOrderStatus] = useState(null);
 
-  // Al cargar la página, simulamos que vaciamos el carrito visualmente 
-  // (En una app real, aquí guardarías la orden en la base de datos)
+  // Mercado Pago vuelve con ?external_reference=...: el estado real lo fija su
+  // aviso (webhook), así que consultamos el pedido hasta que deje de estar pendiente
   useEffect(() => {
-    // Opcional: Podrías llamar a una API para confirmar la orden aquí
-  }, []);
+    const reference = searchParams.get('external_reference');
+    if (!reference) return;
+    let attempts = 0;
+    let timer;
+    const poll = () => {
+      fetch(`${API_URL}/api/orders/${encodeURIComponent(reference)}/`)
+        .then(res => res.ok ? res.json() : null)
+        .then(order => {
+          if (!order) return;
+          setOrderStatus(order.status);
+          if (order.status === 'PENDING' && ++attempts < 15) timer = setTimeout(poll, 2000);
+        })
+        .catch(() => {});
+    };
+    poll();
+    return () => clearTimeout(timer);
+  }, [searchParams]);
 
   return (
     <div className="min-h-screen bg-white">
@@ -25,6 +50,11 @@ function SuccessPage() {
         </div>
 
         <h1 className="text-4xl font-bold text-gray-900 mb-4">¡Pago Exitoso!</h1>
+        {orderStatus && (
+          <p className={`text-sm font-medium mb-4 ${orderStatus === 'APPROVED' ? 'text-green-600' : orderStatus === 'PENDING' ? 'text-gray-500' : 'text-red-500'}`}>
+            {ORDER_STATUS_TEXT[orderStatus]}
+          </p>
+        )}
         <p className="text-xl text-gray-500 mb-12">
           Gracias por tu compra. Hemos enviado el recibo a tu correo.
           Aquí tienes tus archivos para descarga inmediata.
@@ -42,7 +42,7 @@ function Navbar() {
   useEffect(() => {
     if (searchTerm.length > 1) {
       const timer = setTimeout(() => {
-        fetch(`${API_URL}/api/products/?search=${searchTerm}`)
+        fetch(`${API_URL}/api/products/?search=${encodeURIComponent(searchTerm)}&limit=5&fields=id,name,image,price`)
           .then(res => res.json())
           .then(data => {
             setSuggestions(data.slice(0, 5));
@@ -14,4 +14,28 @@ export const getImageUrl = (path) => {
     if (!path) return 'https://via.placeholder.com/150';
     if (path.startsWith('http')) return path; 
     return `${API_URL}${path}`; 
-};
\ No newline at end of file
+};
+// srcset del backend ("url 320w, url 640w") con cada URL pasada por getImageUrl
+export const getSrcSet = (srcset) => {
+    if (!srcset) return undefined;
+    return srcset.split(', ').map((entry) => {
+        const [url, width] = entry.split(' ');
+        return `${getImageUrl(url)} ${width}`;
+    }).join(', ');
+};
+
+// Props de <img> para una imagen con derivadas: WebP responsive + placeholder borroso
+export const responsiveImageProps = (product, sizes) => {
+    const meta = product.image_srcset;
+    if (!meta) return { src: getImageUrl(product.image) };
+    return {
+        src: getImageUrl(product.image),
+        srcSet: getSrcSet(meta.webp),
+        sizes,
+        width: meta.width,
+        height: meta.height,
+        loading: 'lazy',
+        decoding: 'async',
+        style: meta.placeholder ? { backgroundImage: `url(${meta.placeholder})`, backgroundSize: 'cover' } : undefined,
+    };
+};
@@ -15,7 +15,7 @@ export const AuthProvider = ({ children }) => {
         const response = await fetch('https://dansshop.duckdns.org/api/login/', {
             method: 'POST',
             headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({username: email, password: password})
+            body: JSON.stringify({username: email.trim().toLowerCase(), password: password})
         });
         const data = await response.json();
 
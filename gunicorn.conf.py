@@ -0,0 +1,22 @@
+# Configuración de gunicorn (se carga sola desde el directorio de trabajo).
+#
+# Por defecto corre la app ASGI con workers de uvicorn: las vistas async
+# (checkout -> Mercado Pago) esperan la red sin bloquear el worker, así que
+# una respuesta lenta de MP ya no inmoviliza un tercio de la capacidad.
+# GUNICORN_WORKER_CLASS=sync vuelve al modo WSGI anterior (wsgi:application).
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '129.151.109.180')
+workers = int(os.environ.get('GUNICORN_WORKERS', 3))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'uvicorn_worker.UvicornWorker')
+
+# MP_TIMEOUT (8s) + margen: gunicorn nunca debe matar un worker antes que el presupuesto del checkout
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 20
+keepalive = 5
+
+# Reciclar workers de vez en cuando (fugas de memoria de librerías de terceros)
+max_requests = 2000
+max_requests_jitter = 200
+
+accesslog = '-'
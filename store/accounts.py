@@ -0,0 +1,90 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import CharField, Func
+
+# ==========================================
+# REGISTRO DE USUARIOS
+# ==========================================
+# - El email se normaliza (sin espacios, en minúsculas) y es la clave: el índice
+#   único sobre LOWER(NULLIF(email, '')) (migración 0016_user_email_unique) hace
+#   que dos registros simultáneos con el mismo email no puedan crear dos
+#   usuarios; el segundo INSERT falla y se responde "Existe".
+# - Hashear la contraseña es lo caro (decenas o cientos de ms de CPU): se hace
+#   en un pool de PASSWORD_HASH_WORKERS hilos (argon2-cffi y el PBKDF2 de
+#   OpenSSL sueltan el GIL), así una ráfaga de registros ocupa como mucho esos
+#   hilos y el worker async sigue atendiendo el catálogo.
+
+
+class EmailKey(Func):
+    # El '' va literal en el SQL (NullIf lo pasaría como parámetro): así la
+    # expresión es idéntica a la del índice y SQLite/PostgreSQL lo usan
+    template = "LOWER(NULLIF(%(expressions)s, ''))"
+    output_field = CharField()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class RegistrationError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+def normalize_email(value):
+    return (value or '').strip().lower()
+
+
+def hash_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS,
+                                           thread_name_prefix='password-hash')
+        return _executor
+
+
+async def ahash_password(raw_password):
+    return await asyncio.get_running_loop().run_in_executor(hash_executor(), make_password, raw_password)
+
+
+def email_taken(email):
+    # Misma expresión que el índice: la búsqueda lo usa
+    return User.objects.alias(email_key=EmailKey('email')).filter(email_key=email).exists()
+
+
+def create_user(email, password_hash, first_name='', last_name=''):
+    try:
+        with transaction.atomic():
+            return User.objects.create(username=email, email=email, password=password_hash,
+                                       first_name=first_name[:150], last_name=last_name[:150])
+    except IntegrityError:
+        raise RegistrationError('Existe')
+
+
+async def aregister(data):
+    """Valida, hashea en el pool y crea el usuario. Lanza RegistrationError."""
+    email = normalize_email(data.get('email'))
+    password = data.get('password') or ''
+    try:
+        validate_email(email)
+    except ValidationError:
+        raise RegistrationError('Email inválido')
+    if not password:
+        raise RegistrationError('Falta la contraseña')
+    # Chequeo barato antes de gastar CPU en el hash (el índice único decide al final)
+    if await sync_to_async(email_taken)(email):
+        raise RegistrationError('Existe')
+    password_hash = await ahash_password(password)
+    return await sync_to_async(create_user)(email, password_hash, str(data.get('first_name') or ''),
+                                            str(data.get('last_name') or ''))
@@ -1,5 +1,9 @@
-from django.contrib import admin
-from .models import Category, Product, ProductImage
+from django.contrib import admin, messages
+from django.utils import timezone
+
+from . import cache, campaigns
+from .models import Category, Order, OrderItem, PaymentEvent, PriceCampaign, Product, ProductImage
+from .pagination import EstimatedCountPaginator
 
 # 1. Configuración de Imágenes Extra (Inline)
 class ProductImageInline(admin.TabularInline):
@@ -11,35 +15,155 @@ class CategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'slug')
     prepopulated_fields = {'slug': ('name',)}
 
+class BrandFilter(admin.SimpleListFilter):
+    # El filtro por campo haría SELECT DISTINCT brand de toda la tabla en cada
+    # carga del listado: las marcas se cachean hasta que cambie el catálogo
+    title = 'Marca'
+    parameter_name = 'brand'
+
+    def lookups(self, request, model_admin):
+        brands = cache.versioned('admin:brands', lambda: list(
+            Product.objects.exclude(brand=None).exclude(brand='')
+            .order_by('brand').values_list('brand', flat=True).distinct()
+        ))
+        return [(brand, brand) for brand in brands]
+
+    def queryset(self, request, queryset):
+        return queryset.filter(brand=self.value()) if self.value() else queryset
+
+
+def _relabel_action(label):
+    def action(modeladmin, request, queryset):
+        modeladmin.bulk_update(request, queryset, f"Etiqueta '{label.label}'", label=label.value)
+    action.__name__ = f'relabel_{label.name.lower()}'
+    return admin.action(description=f"Etiqueta: {label.label}")(action)
+
+
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     # --- LISTADO PRINCIPAL (CORREGIDO) ---
     # REGLA DE ORO: Todo lo que esté en 'list_editable' DEBE estar en 'list_display'
-    list_display = ('name', 'price', 'original_price', 'category', 'label', 'is_active')
+    list_display = ('name', 'price', 'original_price', 'stock', 'category', 'label', 'is_active')
     
     # Edición rápida sin entrar al producto
     list_editable = ('price', 'label', 'is_active')
     
     # Filtros laterales
-    list_filter = ('category', 'label', 'is_active', 'brand')
+    list_filter = ('category', 'label', 'is_active', BrandFilter)
+
+    # Tablas grandes: categoría en el mismo SELECT, conteo estimado sin filtros
+    # y sin el segundo COUNT(*) del total al filtrar
+    list_select_related = ('category',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     # Barra de búsqueda
-    search_fields = ('name', 'brand')
+    search_fields = ('name', 'brand', 'sku')
     
     # Imágenes extra dentro del producto
     inlines = [ProductImageInline]
 
+    # Acciones masivas: un solo UPDATE sobre la selección y una sola invalidación de caché
+    actions = ['activate', 'deactivate', *[_relabel_action(label) for label in Product.Label]]
+
+    def bulk_update(self, request, queryset, description, **values):
+        count = queryset.update(**values)
+        if count:
+            cache.bump_version()
+        self.message_user(request, f"{description}: {count} productos actualizados.", messages.SUCCESS)
+
+    @admin.action(description="Mostrar en la tienda")
+    def activate(self, request, queryset):
+        self.bulk_update(request, queryset, "Visibles", is_active=True)
+
+    @admin.action(description="Ocultar de la tienda")
+    def deactivate(self, request, queryset):
+        self.bulk_update(request, queryset, "Ocultos", is_active=False)
+
+    def save_model(self, request, obj, form, change):
+        # El stock lo descuentan los checkouts mientras el formulario está abierto:
+        # si no se tocó, no se reescribe con el valor (viejo) que se cargó
+        if change and 'stock' not in form.changed_data:
+            fields = [f.name for f in obj._meta.concrete_fields if not f.primary_key and f.name != 'stock']
+            obj.save(update_fields=fields)
+        else:
+            super().save_model(request, obj, form, change)
+
     # --- ORGANIZACIÓN DEL FORMULARIO (Fieldsets) ---
     fieldsets = (
         ('Información Principal', {
-            'fields': ('name', 'category', 'brand', 'description', 'image')
+            'fields': ('name', 'sku', 'category', 'brand', 'description', 'image')
         }),
         ('Precios', {
-            'fields': ('price', 'original_price'),
+            'fields': ('price', 'original_price', 'stock'),
             'description': 'Si pones un precio original mayor al actual, se calculará el descuento.'
         }),
         ('Marketing y Visibilidad', {
             'fields': ('label', 'is_active', 'is_black_friday'), 
             'classes': ('collapse',), 
         }),
-    )
\ No newline at end of file
+    )
+
+
+# 2. Pedidos: solo lectura de lo que se cobró (precios copiados del catálogo)
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    extra = 0
+    can_delete = False
+    readonly_fields = ('product', 'title', 'unit_price', 'quantity')
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ('external_reference', 'name', 'email', 'total', 'status', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('external_reference', 'email', 'name', 'dni')
+    readonly_fields = ('external_reference', 'user', 'coupon', 'subtotal', 'discount', 'total',
+                       'preference_id', 'init_point', 'payment_id', 'created_at', 'updated_at')
+    inlines = [OrderItemInline]
+
+@admin.register(PaymentEvent)
+class PaymentEventAdmin(admin.ModelAdmin):
+    list_display = ('event_id', 'topic', 'resource_id', 'status', 'attempts', 'received_at', 'processed_at')
+    list_filter = ('status', 'topic')
+    search_fields = ('event_id', 'resource_id')
+    readonly_fields = ('event_id', 'topic', 'resource_id', 'payload', 'attempts', 'last_error',
+                       'received_at', 'processed_at')
+
+
+# 3. Campañas de precios: se aplican/revierten solas (run_price_campaigns)
+@admin.register(PriceCampaign)
+class PriceCampaignAdmin(admin.ModelAdmin):
+    list_display = ('name', 'category', 'brand', 'percent_off', 'label', 'starts_at', 'ends_at', 'status',
+                    'products_count')
+    list_filter = ('status', 'label')
+    search_fields = ('name', 'brand')
+    readonly_fields = ('status', 'products_count', 'applied_at', 'reverted_at')
+    actions = ['apply_now', 'end_now']
+
+    def get_readonly_fields(self, request, obj=None):
+        # Una campaña ya aplicada no se edita: los precios guardados dependen de su regla
+        if obj and obj.status != PriceCampaign.Status.SCHEDULED:
+            return [f.name for f in obj._meta.fields if f.name not in ('id', 'created_at')]
+        return self.readonly_fields
+
+    @admin.action(description="Aplicar ahora")
+    def apply_now(self, request, queryset):
+        now = timezone.now()
+        for campaign in queryset.filter(status=PriceCampaign.Status.SCHEDULED):
+            count = campaigns.apply(campaign, now)
+            if count is not None:
+                self.message_user(request, f"{campaign}: {count} productos con descuento.", messages.SUCCESS)
+
+    @admin.action(description="Terminar ahora (restaura precios)")
+    def end_now(self, request, queryset):
+        now = timezone.now()
+        for campaign in queryset:
+            if campaign.status == PriceCampaign.Status.ACTIVE:
+                count = campaigns.revert(campaign, now)
+                if count is not None:
+                    self.message_user(request, f"{campaign}: {count} precios restaurados.", messages.SUCCESS)
+            elif campaigns.cancel(campaign):
+                self.message_user(request, f"{campaign}: cancelada.", messages.SUCCESS)
@@ -0,0 +1,152 @@
+import json
+import random
+import statistics
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+# ==========================================
+# BENCHMARK DE LOS FLUJOS DEL FRONTEND
+# ==========================================
+# Cada "sesión" repite lo que hace un comprador en la app de React, con los
+# mismos parámetros que mandan los componentes:
+#   Home -> Catalog (categoría + marcas, "cargar más") -> ProductDetail ->
+#   recomendaciones -> CartPage (recomendaciones del carrito + checkout contra
+#   el doble de Mercado Pago) -> SuccessPage (estado del pedido)
+# Por paso se mide latencia (p50/p95/p99), peticiones por segundo y queries
+# por petición. compare() contrasta un informe con una línea base guardada:
+# más queries que la base o una p50 peor que la tolerancia es una regresión.
+
+# Home.jsx y Catalog.jsx piden los mismos campos de la grilla
+LIST_FIELDS = 'id,name,brand,image,image_srcset,price,original_price,category,label,label_display'
+CART_FIELDS = 'id,name,brand,image,price,original_price,category,label,label_display'
+PAYER = {'name': 'Benchmark', 'email': 'bench@example.com', 'phone': '999999999', 'dni': '12345678',
+         'city': 'Lima', 'address': 'Av. Siempre Viva 123'}
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+@contextmanager
+def disposable_database(name=None):
+    """
+    BD de test desechable para los comandos de benchmark: nunca tocan db.sqlite3.
+    name: archivo SQLite propio (p. ej. en un directorio temporal).
+    """
+    setup_test_environment()
+    test_settings = connection.settings_dict['TEST']
+    previous_name = test_settings.get('NAME')
+    if name and connection.vendor == 'sqlite':
+        test_settings['NAME'] = name
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        test_settings['NAME'] = previous_name
+        teardown_test_environment()
+
+
+class Recorder:
+    """Hace las peticiones con el Client de Django y guarda (ms, queries) por paso."""
+
+    def __init__(self, client):
+        self.client = client
+        self.samples = defaultdict(list)
+
+    def _record(self, step, send):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            response = send()
+            elapsed = (time.perf_counter() - start) * 1000
+        if response.status_code != 200:
+            raise BenchmarkError(f"{step}: HTTP {response.status_code} {response.content[:200]!r}")
+        self.samples[step].append((elapsed, len(ctx.captured_queries)))
+        return response
+
+    def get(self, step, path, params=None):
+        return self._record(step, lambda: self.client.get(path, params or {}))
+
+    def post(self, step, path, data):
+        return self._record(step, lambda: self.client.post(path, json.dumps(data), content_type='application/json'))
+
+
+def shopper_session(recorder, rng, product_ids, brands):
+    recorder.get('home', '/api/products/', {'limit': 7, 'fields': LIST_FIELDS})
+
+    categories = recorder.get('categories', '/api/categories/').json()
+    params = {'category': rng.choice(categories)['id'], 'brand': rng.sample(brands, 2), 'fields': LIST_FIELDS}
+    page = recorder.get('catalog', '/api/catalog/', params).json()
+    if page['next']:
+        recorder.get('catalog_more', '/api/products/', {**params, 'cursor': page['next']})
+
+    product_id = rng.choice(page['results'])['id'] if page['results'] else rng.choice(product_ids)
+    recorder.get('product_detail', f'/api/products/{product_id}/')
+    recorder.get('recommendations', f'/api/recommendations/{product_id}/')
+
+    cart = [product_id, *rng.sample(product_ids, 2)]
+    recorder.get('cart_recommendations', '/api/recommendations/cart/',
+                 {'ids': ','.join(map(str, cart)), 'limit': 4, 'fields': CART_FIELDS})
+    order = recorder.post('create_preference', '/api/create_preference/', {
+        'items': [{'id': pk, 'quantity': 1} for pk in cart], 'payer': PAYER, 'coupon': '',
+    }).json()
+    recorder.get('order_status', f"/api/orders/{order['external_reference']}/")
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(client, product_ids, brands, sessions, warmup=0, seed=42):
+    """Corre 'sessions' sesiones (más 'warmup' descartadas) y devuelve el informe."""
+    rng = random.Random(seed)
+    for _ in range(warmup):
+        shopper_session(Recorder(client), rng, product_ids, brands)
+
+    recorder = Recorder(client)
+    start = time.perf_counter()
+    for _ in range(sessions):
+        shopper_session(recorder, rng, product_ids, brands)
+    wall = time.perf_counter() - start
+
+    steps = {}
+    for step, samples in recorder.samples.items():
+        latencies = [ms for ms, _ in samples]
+        queries = [count for _, count in samples]
+        steps[step] = {
+            'requests': len(samples),
+            'rps': round(len(samples) / (sum(latencies) / 1000), 1),
+            'p50_ms': round(statistics.median(latencies), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'queries': round(statistics.mean(queries), 2),
+            'max_queries': max(queries),
+        }
+    total = sum(step['requests'] for step in steps.values())
+    return {'steps': steps, 'total': {'requests': total, 'rps': round(total / wall, 1)}}
+
+
+def compare(report, baseline, tolerance=0.3, latency=True):
+    """
+    Lista de regresiones (vacía si no hay) del informe frente a la línea base.
+    latency=False compara solo queries (p. ej. en otra máquina que la de la base).
+    """
+    problems = []
+    for step, current in report['steps'].items():
+        base = baseline['steps'].get(step)
+        if base is None:
+            continue
+        if current['max_queries'] > base['max_queries']:
+            problems.append(f"{step}: {current['max_queries']} queries por petición (base {base['max_queries']})")
+        if latency and current['p50_ms'] > base['p50_ms'] * (1 + tolerance):
+            problems.append(f"{step}: p50 {current['p50_ms']:.2f} ms (base {base['p50_ms']:.2f} ms)")
+    base_rps = baseline.get('total', {}).get('rps')
+    if latency and base_rps and report['total']['rps'] < base_rps * (1 - tolerance):
+        problems.append(f"total: {report['total']['rps']} req/s (base {base_rps} req/s)")
+    return problems
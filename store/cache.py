@@ -0,0 +1,144 @@
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.core.cache import caches
+from django.db.models import F
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework.response import Response
+
+from . import routers
+from .models import CatalogVersion
+
+# ==========================================
+# CACHÉ VERSIONADA DEL CATÁLOGO
+# ==========================================
+# Las claves llevan la versión del catálogo: cuando el staff edita algo, las
+# señales suben la versión y las entradas viejas simplemente dejan de usarse
+# (expiran solas). Además cada respuesta lleva ETag/Last-Modified y, si el
+# cliente ya tiene esa versión, contestamos 304 sin tocar la caché ni la BD.
+
+CACHE_ALIAS = 'catalog'
+CACHED_HEADERS = ('X-Next-Cursor', 'Link')
+
+# Contadores por proceso (cada worker de gunicorn lleva los suyos)
+stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'bumps': 0}
+
+# Estado de batch() por hilo
+_local = threading.local()
+
+
+def get_version():
+    """(versión, fecha de última modificación) leída de la BD: 1 query por PK."""
+    row = CatalogVersion.objects.filter(pk=1).values_list('version', 'updated_at').first()
+    return row or (0, None)
+
+
+def bump_version():
+    """Invalida toda la caché del catálogo (o la agenda si estamos dentro de batch())."""
+    if getattr(_local, 'depth', 0):
+        _local.dirty = True
+        return
+    updated = CatalogVersion.objects.filter(pk=1).update(version=F('version') + 1, updated_at=timezone.now())
+    if not updated:
+        CatalogVersion.objects.create(pk=1, version=1)
+    stats['bumps'] += 1
+
+
+@contextmanager
+def batch():
+    """Agrupa muchos cambios (importaciones, campañas) en una sola invalidación."""
+    _local.depth = getattr(_local, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _local.depth -= 1
+        if not _local.depth and getattr(_local, 'dirty', False):
+            _local.dirty = False
+            bump_version()
+
+
+def _stamp(version, last_modified):
+    # La fecha entra en la clave: si se restaura la BD y la versión "retrocede",
+    # no reutilizamos entradas de otra historia.
+    return f'{version}.{int(last_modified.timestamp() * 1e6) if last_modified else 0}'
+
+
+def versioned(name, compute):
+    """Valor derivado del catálogo (p. ej. las marcas del admin), cacheado hasta la próxima versión."""
+    return caches[CACHE_ALIAS].get_or_set(f'catalog:{_stamp(*get_version())}:{name}', compute)
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(',')]
+    since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return bool(since and last_modified and int(last_modified.timestamp()) <= since)
+
+
+def cached_catalog_view(view=None, *, key=None):
+    """
+    Cachea el resultado de una vista GET de catálogo por (versión, URL completa).
+    Si no está en caché, la vista lee de una réplica (ver routers.py).
+    Va DEBAJO de @api_view para recibir el Request de DRF.
+    key: función opcional request -> str para normalizar la clave (p. ej. la firma
+    de un carrito, que no depende del orden de los ids).
+    """
+    if view is None:
+        return lambda view: cached_catalog_view(view, key=key)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        version, last_modified = get_version()
+        stamp = _stamp(version, last_modified)
+        signature = key(request) if key else request.get_full_path()
+        digest = hashlib.md5(signature.encode()).hexdigest()[:16]
+        etag = quote_etag(f'{stamp}-{digest}')
+
+        def finish(response):
+            if response.status_code in (200, 304):
+                response['ETag'] = etag
+                response['Cache-Control'] = 'no-cache'
+                if last_modified:
+                    response['Last-Modified'] = http_date(last_modified.timestamp())
+            return response
+
+        if _not_modified(request, etag, last_modified):
+            stats['not_modified'] += 1
+            return finish(Response(status=304))
+
+        cache = caches[CACHE_ALIAS]
+        cache_key = f'catalog:{stamp}:{digest}'
+        cached = cache.get(cache_key)
+        if cached is not None:
+            stats['hits'] += 1
+            status, data, headers = cached
+            response = Response(data, status=status)
+            for name, value in headers.items():
+                response[name] = value
+            return finish(response)
+
+        stats['misses'] += 1
+        with routers.read_replica(last_modified):
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                headers = {name: response[name] for name in CACHED_HEADERS if name in response}
+                cache.set(cache_key, (response.status_code, response.data, headers))
+        return finish(response)
+
+    return wrapper
+
+
+def get_stats():
+    lookups = stats['hits'] + stats['misses']
+    return {
+        **stats,
+        'hit_ratio': round(stats['hits'] / lookups, 3) if lookups else None,
+        'version': get_version()[0],
+        'backend': caches[CACHE_ALIAS].__class__.__name__,
+        'pid': os.getpid(),
+    }
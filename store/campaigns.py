@@ -0,0 +1,136 @@
+import logging
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Round
+from django.utils import timezone
+
+from . import cache
+from .models import PriceCampaign, PriceCampaignItem, Product
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# CAMPAÑAS DE PRECIOS
+# ==========================================
+# Aplicar una campaña son tres sentencias, sin importar cuántos productos toque:
+#   1. INSERT ... SELECT: copia precio/etiqueta actuales a PriceCampaignItem
+#   2. UPDATE product SET price = ROUND(price * factor), original_price, label
+#      WHERE id IN (productos de la campaña)
+#   3. una sola subida de versión de la caché del catálogo
+# Revertir es un UPDATE que restaura los valores copiados, sólo donde el precio
+# sigue siendo el de la campaña: si alguien lo editó mientras estaba activa, manda
+# esa edición. El cambio de estado
+# de la campaña es un UPDATE condicional (SCHEDULED -> ACTIVE -> ENDED), así
+# que dos workers o un doble clic en el admin nunca la aplican dos veces.
+# Un producto que ya está en una campaña activa no entra en otra.
+
+MONEY = DecimalField(max_digits=10, decimal_places=2)
+
+
+def matching_products(campaign):
+    products = Product.objects.exclude(campaign_items__campaign__status=PriceCampaign.Status.ACTIVE)
+    if campaign.category_id:
+        products = products.filter(category_id=campaign.category_id)
+    if campaign.brand:
+        products = products.filter(brand__iexact=campaign.brand)
+    return products
+
+
+def _snapshot(campaign):
+    """Copia los precios actuales en una sola sentencia INSERT ... SELECT. Devuelve cuántos."""
+    source = matching_products(campaign).order_by().values_list('id', 'price', 'original_price', 'label')
+    sql, params = source.query.sql_with_params()
+    table = connection.ops.quote_name(PriceCampaignItem._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (campaign_id, product_id, price, original_price, label) "
+            f"SELECT %s, s.* FROM ({sql}) s",
+            [campaign.pk, *params],
+        )
+        return cursor.rowcount
+
+
+def _campaign_price(campaign, price):
+    """Expresión del precio con el descuento de la campaña (la misma en apply y revert)."""
+    factor = (Decimal(100) - campaign.percent_off) / Decimal(100)
+    return Round(price * factor, 2, output_field=MONEY)
+
+
+def apply(campaign, now=None):
+    """Aplica la campaña si sigue programada. Devuelve cuántos productos cambió (None si no se aplicó)."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        won = PriceCampaign.objects.filter(pk=campaign.pk, status=PriceCampaign.Status.SCHEDULED).update(
+            status=PriceCampaign.Status.ACTIVE, applied_at=now)
+        if not won:
+            return None
+        count = _snapshot(campaign)
+        Product.objects.filter(campaign_items__campaign=campaign).update(
+            # El "antes" que ve el cliente es el precio de lista, si ya tenía uno
+            original_price=Coalesce(F('original_price'), F('price')),
+            price=_campaign_price(campaign, F('price')),
+            label=campaign.label,
+        )
+        PriceCampaign.objects.filter(pk=campaign.pk).update(products_count=count)
+        if count:
+            cache.bump_version()
+    logger.info("Campaña %s aplicada a %s productos", campaign.pk, count)
+    return count
+
+
+def revert(campaign, now=None):
+    """
+    Restaura precios y etiquetas de una campaña activa. Devuelve cuántos productos (None si no estaba activa).
+    Los productos cuyo precio se editó durante la campaña quedan como los dejó el staff.
+    """
+    now = now or timezone.now()
+    saved = PriceCampaignItem.objects.filter(campaign=campaign, product=OuterRef('pk'))
+    with transaction.atomic():
+        won = PriceCampaign.objects.filter(pk=campaign.pk, status=PriceCampaign.Status.ACTIVE).update(
+            status=PriceCampaign.Status.ENDED, reverted_at=now)
+        if not won:
+            return None
+        # UPDATE condicional: sólo donde el precio sigue siendo el que puso la campaña
+        count = Product.objects.filter(campaign_items__campaign=campaign,
+                                       price=_campaign_price(campaign, F('campaign_items__price'))).update(
+            price=Subquery(saved.values('price')[:1]),
+            original_price=Subquery(saved.values('original_price')[:1]),
+            label=Subquery(saved.values('label')[:1]),
+        )
+        if count:
+            cache.bump_version()
+    edited = campaign.products_count - count
+    if edited > 0:
+        logger.warning("Campaña %s: %s productos con el precio editado durante la campaña no se revirtieron",
+                       campaign.pk, edited)
+    logger.info("Campaña %s revertida en %s productos", campaign.pk, count)
+    return count
+
+
+def cancel(campaign):
+    """Cancela una campaña que todavía no empezó."""
+    return bool(PriceCampaign.objects.filter(pk=campaign.pk, status=PriceCampaign.Status.SCHEDULED).update(
+        status=PriceCampaign.Status.CANCELLED))
+
+
+def run_due(now=None):
+    """Aplica y revierte lo que toca a esta hora. Devuelve (aplicadas, revertidas)."""
+    now = now or timezone.now()
+    applied = reverted = 0
+    # Primero se revierte: libera productos para una campaña que empieza justo cuando otra termina
+    for campaign in PriceCampaign.objects.filter(status=PriceCampaign.Status.ACTIVE, ends_at__lte=now):
+        reverted += revert(campaign, now) is not None
+    due = (PriceCampaign.objects
+           .filter(status=PriceCampaign.Status.SCHEDULED, starts_at__lte=now)
+           .order_by('starts_at', 'pk'))
+    for campaign in due:
+        if campaign.ends_at and campaign.ends_at <= now:
+            # El worker no corrió durante toda la campaña: ya no tiene sentido aplicarla
+            PriceCampaign.objects.filter(pk=campaign.pk, status=PriceCampaign.Status.SCHEDULED).update(
+                status=PriceCampaign.Status.CANCELLED)
+            logger.warning("Campaña %s vencida sin aplicar", campaign.pk)
+            continue
+        applied += apply(campaign, now) is not None
+    return applied, reverted
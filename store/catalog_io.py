@@ -0,0 +1,273 @@
+import csv
+import hashlib
+import json
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Q
+
+from . import cache, search
+from .models import Category, Product
+
+# ==========================================
+# IMPORTACIÓN / EXPORTACIÓN MASIVA DEL CATÁLOGO
+# ==========================================
+# Formatos: CSV (con cabecera) y JSONL (un objeto por línea), con las columnas
+# de COLUMNS. La clave es 'sku'. Todo se procesa en trozos de 'chunk_size'
+# filas, así que la memoria no crece con el tamaño del archivo:
+#   por trozo, 1 SELECT de los SKUs existentes + bulk_create + bulk_update.
+# Las filas cuyo hash coincide con el de la BD se saltan sin escribir nada.
+# bulk_* no dispara señales: el índice de búsqueda se actualiza por trozo y
+# la caché del catálogo se invalida una sola vez al final (cache.batch()).
+
+COLUMNS = ['sku', 'name', 'brand', 'category', 'price', 'original_price', 'label',
+           'description', 'is_active', 'stock']
+# Campos del modelo que escribe la importación (category -> category_id)
+FIELDS = ['name', 'brand', 'category_id', 'price', 'original_price', 'label', 'description', 'is_active', 'stock']
+
+# Se acepta el código ('NW') o el nombre ('NEW') de la etiqueta
+LABELS = {**{label.name: label.value for label in Product.Label}, **{label.value: label.value for label in Product.Label}}
+TRUE = {'1', 'true', 'si', 'sí', 'yes', 'y', 't'}
+FALSE = {'0', 'false', 'no', 'n', 'f'}
+
+
+class RowError(ValueError):
+    def __init__(self, message, line=None):
+        super().__init__(message)
+        self.line = line
+
+
+# --- LECTURA / ESCRITURA EN STREAMING ---
+def detect_format(path, explicit=None):
+    if explicit:
+        return explicit
+    return 'jsonl' if str(path).endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def read_rows(stream, fmt):
+    """
+    Dicts de CSV/JSONL. Una línea JSONL ilegible (o que no es un objeto) sale
+    como RowError con su número de línea: se reporta como cualquier fila
+    inválida, sin cortar una importación que ya escribió trozos anteriores.
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield RowError(f"JSON inválido: {exc}", number)
+            continue
+        yield row if isinstance(row, dict) else RowError("la línea no es un objeto JSON", number)
+
+
+def without_sku(queryset=None):
+    """Productos que la exportación deja afuera: sin SKU no se podrían volver a importar."""
+    queryset = queryset if queryset is not None else Product.objects.all()
+    return queryset.filter(Q(sku=None) | Q(sku=''))
+
+
+def export_rows(queryset=None):
+    """Filas de exportación (dicts con COLUMNS), leídas de a trozos del cursor. Omite los sin SKU."""
+    queryset = queryset if queryset is not None else Product.objects.all()
+    values = (queryset.exclude(sku=None).exclude(sku='').order_by('pk')
+              .values('sku', 'name', 'brand', 'category__slug', 'price', 'original_price', 'label',
+                      'description', 'is_active', 'stock'))
+    for row in values.iterator(chunk_size=2000):
+        row['category'] = row.pop('category__slug')
+        yield {column: row[column] for column in COLUMNS}
+
+
+def write_rows(rows, stream, fmt):
+    count = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({k: '' if v is None else v for k, v in row.items()})
+            count += 1
+    else:
+        for row in rows:
+            stream.write(json.dumps(row, ensure_ascii=False, default=str))
+            stream.write('\n')
+            count += 1
+    return count
+
+
+# --- NORMALIZACIÓN ---
+def _text(value):
+    return None if value is None or str(value).strip() == '' else str(value).strip()
+
+
+def _decimal(value, column, required=False):
+    value = _text(value)
+    if value is None:
+        if required:
+            raise RowError(f"falta '{column}'")
+        return None
+    try:
+        return Decimal(value).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise RowError(f"'{column}' no es un número: {value!r}")
+
+
+def _bool(value, default=True):
+    if isinstance(value, bool):
+        return value
+    value = (_text(value) or '').lower()
+    if not value:
+        return default
+    if value in TRUE:
+        return True
+    if value in FALSE:
+        return False
+    raise RowError(f"'is_active' inválido: {value!r}")
+
+
+def _int(value, column):
+    value = _text(value)
+    if value is None:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        raise RowError(f"'{column}' no es un entero: {value!r}")
+    if number < 0:
+        raise RowError(f"'{column}' no puede ser negativo")
+    return number
+
+
+# columna -> (campo del modelo, conversor)
+PARSERS = {
+    'name': ('name', _text),
+    'brand': ('brand', _text),
+    'price': ('price', lambda v: _decimal(v, 'price', required=True)),
+    'original_price': ('original_price', lambda v: _decimal(v, 'original_price')),
+    'description': ('description', _text),
+    'is_active': ('is_active', _bool),
+    'stock': ('stock', lambda v: _int(v, 'stock')),
+}
+DEFAULTS = {'brand': None, 'original_price': None, 'label': Product.Label.NONE, 'description': None,
+            'is_active': True, 'stock': None}
+
+
+def normalize(row, categories):
+    """
+    Fila del archivo -> (sku, {campo: valor}) con los tipos del modelo.
+    Solo trae las columnas presentes: una columna que falta no pisa lo que
+    ya tiene el producto (un archivo 'sku,price' solo cambia precios).
+    """
+    sku = _text(row.get('sku'))
+    if not sku:
+        raise RowError("falta 'sku'")
+    values = {field: parse(row[column]) for column, (field, parse) in PARSERS.items() if column in row}
+    if 'name' in values and not values['name']:
+        raise RowError("falta 'name'")
+    if 'category' in row:
+        slug = _text(row['category'])
+        if slug not in categories:
+            raise RowError(f"categoría desconocida: {slug!r}")
+        values['category_id'] = categories[slug]
+    if 'label' in row:
+        label = (_text(row['label']) or Product.Label.NONE).upper()
+        if label not in LABELS:
+            raise RowError(f"etiqueta desconocida: {label!r}")
+        values['label'] = LABELS[label]
+    return sku, values
+
+
+def row_hash(values):
+    # Mismo hash para la fila del archivo y la de la BD si no cambió nada
+    canonical = '\x1f'.join('' if values[f] is None else str(values[f]) for f in FIELDS)
+    return hashlib.blake2b(canonical.encode(), digest_size=16).digest()
+
+
+# --- IMPORTACIÓN ---
+class ImportStats:
+    def __init__(self):
+        self.rows = self.created = self.updated = self.unchanged = 0
+        self.errors = []
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _import_chunk(chunk, categories, stats, first_line, dry_run):
+    parsed, lines = {}, {}
+    for offset, raw in enumerate(chunk):
+        try:
+            if isinstance(raw, RowError):
+                raise raw
+            if not isinstance(raw, dict):
+                raise RowError("la fila no es un objeto")
+            sku, values = normalize(raw, categories)
+        except RowError as exc:
+            stats.errors.append((exc.line or first_line + offset, str(exc)))
+            continue
+        parsed[sku] = values  # un SKU repetido en el mismo trozo: gana la última fila
+        lines[sku] = first_line + offset
+
+    existing = {
+        row['sku']: row
+        for row in Product.objects.filter(sku__in=list(parsed)).values('id', 'sku', *FIELDS)
+    }
+    to_create, to_update = [], []
+    for sku, values in parsed.items():
+        current = existing.get(sku)
+        if current is None:
+            missing = [f for f in ('name', 'category_id', 'price') if f not in values]
+            if missing:
+                stats.errors.append((lines[sku], f"producto nuevo sin {', '.join(missing)}"))
+                continue
+            to_create.append(Product(sku=sku, **{**DEFAULTS, **values}))
+            continue
+        merged = {**{f: current[f] for f in FIELDS}, **values}
+        if row_hash(current) == row_hash(merged):
+            stats.unchanged += 1
+        else:
+            to_update.append(Product(pk=current['id'], sku=sku, **merged))
+
+    if not dry_run:
+        with transaction.atomic():
+            Product.objects.bulk_create(to_create)
+            Product.objects.bulk_update(to_update, FIELDS)
+            search.index_products([p for p in to_create if p.pk] + to_update)
+        if to_create or to_update:
+            cache.bump_version()  # dentro de batch(): se acumula en una sola invalidación
+    stats.created += len(to_create)
+    stats.updated += len(to_update)
+
+
+def import_rows(rows, chunk_size=2000, dry_run=False, progress=None):
+    """
+    rows: iterable de dicts (CSV/JSONL). Devuelve ImportStats.
+    progress(stats) se llama después de cada trozo.
+    """
+    stats = ImportStats()
+    categories = dict(Category.objects.exclude(slug=None).values_list('slug', 'id'))
+    line = 2  # la línea 1 del CSV es la cabecera
+    with cache.batch():
+        for chunk in _chunks(rows, chunk_size):
+            _import_chunk(chunk, categories, stats, line, dry_run)
+            stats.rows += len(chunk)
+            line += len(chunk)
+            if progress:
+                progress(stats)
+    return stats
@@ -0,0 +1,314 @@
+import asyncio
+import logging
+import threading
+import weakref
+from decimal import ROUND_HALF_UP, Decimal
+
+import mercadopago
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from mercadopago.config import Config, RequestOptions
+from mercadopago.http import HttpClient
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+from . import stock
+from .models import Order, OrderItem, Product
+
+try:
+    import httpx
+except ImportError:  # httpx es opcional: sin él, la vía async usa el SDK en un hilo aparte
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# CHECKOUT: PEDIDO + PREFERENCIA DE PAGO
+# ==========================================
+# 1. El carrito del navegador solo aporta ids y cantidades: los precios salen
+#    del catálogo (una sola consulta id__in) y el cupón se valida aquí.
+# 2. Se guarda un Order con external_reference único y se reserva el stock
+#    (stock.py) antes de llamar a MP; la preferencia vence con la reserva.
+# 3. La preferencia se crea con un presupuesto de tiempo fijo y conexiones
+#    reutilizadas: SDK compartido (requests.Session) en la vía síncrona y
+#    httpx.AsyncClient en la async (la que usa la vista bajo ASGI).
+
+CURRENCY = 'PEN'
+STATEMENT_DESCRIPTOR = 'DAN STORE'
+CENTS = Decimal('0.01')
+
+# Cupón -> fracción de descuento (antes vivía solo en CartPage.jsx)
+COUPONS = {
+    'DANSHOP10': Decimal('0.10'),
+}
+
+
+class CheckoutError(Exception):
+    """Error presentable al cliente (carrito inválido, pago rechazado...)."""
+
+    def __init__(self, message, status=400, detail=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.detail = detail
+
+
+def _money(value):
+    return value.quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+# --- 1. PRECIOS DEL SERVIDOR ---
+def price_cart(items, coupon=''):
+    """
+    items: [{'id': 1, 'quantity': 2}, ...] ya validados (ids repetidos se suman).
+    Devuelve (líneas, subtotal, descuento, total); cada línea es
+    (producto, cantidad, precio_unitario_con_descuento).
+    """
+    quantities = {}
+    for item in items:
+        quantities[item['id']] = quantities.get(item['id'], 0) + item['quantity']
+
+    products = Product.objects.filter(is_active=True).order_by().only('id', 'name', 'price').in_bulk(quantities)
+    missing = sorted(set(quantities) - set(products))
+    if missing:
+        raise CheckoutError('Hay productos que ya no están disponibles', detail={'missing': missing})
+
+    coupon = (coupon or '').strip().upper()
+    if coupon and coupon not in COUPONS:
+        raise CheckoutError('Cupón no válido')
+    rate = COUPONS.get(coupon, Decimal(0))
+
+    lines, subtotal, total = [], Decimal(0), Decimal(0)
+    for pk, quantity in quantities.items():
+        product = products[pk]
+        # MP no acepta líneas negativas: el descuento va en el precio unitario
+        unit_price = _money(product.price * (1 - rate))
+        lines.append((product, quantity, unit_price))
+        subtotal += product.price * quantity
+        total += unit_price * quantity
+    return lines, _money(subtotal), _money(subtotal - total), _money(total)
+
+
+@transaction.atomic
+def create_order(items, payer, coupon='', user=None):
+    lines, subtotal, discount, total = price_cart(items, coupon)
+    order = Order.objects.create(
+        user=user if user is not None and user.is_authenticated else None,
+        coupon=(coupon or '').strip().upper(),
+        subtotal=subtotal, discount=discount, total=total,
+        **payer,
+    )
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, product=product, title=product.name, unit_price=unit_price, quantity=quantity)
+        for product, quantity, unit_price in lines
+    ])
+    try:
+        stock.reserve(order, [(product.pk, quantity) for product, quantity, _ in lines])
+    except stock.OutOfStock as exc:
+        # Sale de atomic: se deshace el pedido completo
+        raise CheckoutError('No hay stock suficiente', status=409, detail={'out_of_stock': exc.product_ids})
+    return order
+
+
+# --- 2. SDK COMPARTIDO ---
+class PooledHttpClient(HttpClient):
+    """
+    HttpClient del SDK que reutiliza una sola requests.Session (el original abre
+    una sesión, y por tanto una conexión TLS nueva, en cada llamada).
+    Redirige la URL base a settings.MERCADOPAGO_API_URL para usar un doble local.
+    """
+
+    def __init__(self, pool_size, retries):
+        retry = Retry(
+            total=retries,
+            read=0,  # si MP ya recibió la petición y tarda, reintentar solo gastaría el presupuesto
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=None,  # POST incluido: cada preferencia lleva su x-idempotency-key
+            backoff_factor=0.1,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method, url, maxretries=None, **kwargs):
+        # Los reintentos los decide el adapter de la sesión, no cada llamada
+        base = settings.MERCADOPAGO_API_URL.rstrip('/')
+        if url.startswith(Config().api_base_url):
+            url = base + url[len(Config().api_base_url):]
+        result = self.session.request(method, url, **kwargs)
+        response = {'status': result.status_code, 'response': None}
+        if result.status_code != 204 and result.content:
+            try:
+                response['response'] = result.json()
+            except ValueError:
+                logger.warning("Respuesta no JSON de Mercado Pago (%s %s): %s", method, url, result.status_code)
+        return response
+
+
+_sdk = None
+_sdk_lock = threading.Lock()
+
+
+def get_sdk():
+    global _sdk
+    if _sdk is None:
+        with _sdk_lock:
+            if _sdk is None:
+                _sdk = mercadopago.SDK(
+                    settings.MERCADOPAGO_ACCESS_TOKEN,
+                    http_client=PooledHttpClient(settings.MERCADOPAGO_POOL_SIZE, settings.MERCADOPAGO_RETRIES),
+                )
+    return _sdk
+
+
+def request_options(idempotency_key=None):
+    # El presupuesto se reparte entre el primer intento y los reintentos
+    attempts = settings.MERCADOPAGO_RETRIES + 1
+    return RequestOptions(
+        access_token=settings.MERCADOPAGO_ACCESS_TOKEN,
+        connection_timeout=float(settings.MERCADOPAGO_TIMEOUT) / attempts,
+        custom_headers={'x-idempotency-key': idempotency_key} if idempotency_key else None,
+        max_retries=settings.MERCADOPAGO_RETRIES,
+    )
+
+
+# --- 3. PREFERENCIA ---
+def build_preference(order, items):
+    return_url = settings.CHECKOUT_RETURN_URL.rstrip('/')
+    preference = {
+        'items': [
+            {
+                'id': str(item.product_id),
+                'title': item.title,
+                'quantity': item.quantity,
+                'unit_price': float(item.unit_price),
+                'currency_id': CURRENCY,
+            }
+            for item in items
+        ],
+        'payer': {'name': order.name, 'email': order.email},
+        'back_urls': {
+            'success': f'{return_url}/success',
+            'failure': f'{return_url}/failure',
+            'pending': f'{return_url}/pending',
+        },
+        'statement_descriptor': STATEMENT_DESCRIPTOR,
+        'external_reference': order.external_reference,
+        # Pasado este momento la reserva de stock se libera: que MP no cobre después
+        'expires': True,
+        'expiration_date_to': (order.created_at + stock.reservation_ttl()).isoformat(timespec='milliseconds'),
+    }
+    if settings.MERCADOPAGO_NOTIFICATION_URL:
+        # Adónde manda MP los avisos de pago (ver payments.py)
+        preference['notification_url'] = settings.MERCADOPAGO_NOTIFICATION_URL
+    return preference
+
+
+SAVED_FIELDS = ['preference_id', 'init_point', 'updated_at']
+
+
+def _unavailable(order, exc):
+    logger.warning("Mercado Pago no respondió a tiempo para %s: %s", order.external_reference, exc)
+    return CheckoutError('El servicio de pagos no está disponible, intenta de nuevo', status=503)
+
+
+def _accept(order, status, preference):
+    """Valida la respuesta de MP y copia el link de pago al pedido (sin guardarlo)."""
+    preference = preference or {}
+    if status not in (200, 201) or 'init_point' not in preference:
+        logger.error("Mercado Pago rechazó %s (status %s): %s", order.external_reference, status, preference)
+        raise CheckoutError('No se pudo generar el pago', status=502, detail=preference)
+    order.preference_id = preference.get('id', '')
+    order.init_point = preference['init_point']
+    logger.info("Preferencia %s creada para %s", order.preference_id, order.external_reference)
+
+
+def _sdk_create(order, items):
+    try:
+        result = get_sdk().preference().create(build_preference(order, items), request_options(order.external_reference))
+    except requests.RequestException as exc:
+        raise _unavailable(order, exc)
+    _accept(order, result.get('status'), result.get('response'))
+
+
+def abandon(order):
+    """
+    MP no generó el pago: el cliente nunca recibió el link, así que el pedido se
+    cancela y su stock vuelve enseguida (si no, un reintento del mismo cliente
+    chocaría con su propia reserva hasta que venza).
+    """
+    with transaction.atomic():
+        cancelled = Order.objects.filter(pk=order.pk, status=Order.Status.PENDING).update(
+            status=Order.Status.CANCELLED, updated_at=timezone.now())
+        if cancelled:
+            stock.release(order.pk)
+
+
+def create_preference(order):
+    """Crea la preferencia de 'order' en Mercado Pago y guarda el link de pago."""
+    _sdk_create(order, order.items.all())
+    order.save(update_fields=SAVED_FIELDS)
+    return order
+
+
+# --- 4. VÍA ASYNC (ASGI) ---
+# Bajo uvicorn la espera a MP no ocupa un worker: el event loop sigue
+# atendiendo otras peticiones. Un AsyncClient (con su pool) por event loop:
+# con uvicorn hay uno por proceso; bajo WSGI (async_to_sync) Django crea un
+# loop por petición. Cada cliente lo cierra una tarea guardiana cuando su loop
+# termina: asyncio.run() cancela las tareas pendientes antes de cerrarlo.
+_async_clients = weakref.WeakKeyDictionary()  # loop -> (cliente, tarea guardiana)
+
+
+async def _close_with_loop(loop, client):
+    try:
+        await asyncio.Event().wait()
+    finally:
+        _async_clients.pop(loop, None)
+        await client.aclose()
+
+
+def _get_async_client():
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(loop)
+    if entry is None:
+        transport = httpx.AsyncHTTPTransport(
+            retries=settings.MERCADOPAGO_RETRIES,  # solo errores de conexión, como la vía síncrona
+            limits=httpx.Limits(max_connections=settings.MERCADOPAGO_POOL_SIZE,
+                                max_keepalive_connections=settings.MERCADOPAGO_POOL_SIZE),
+        )
+        client = httpx.AsyncClient(transport=transport)
+        entry = _async_clients[loop] = (client, loop.create_task(_close_with_loop(loop, client)))
+    return entry[0]
+
+
+async def acreate_preference(order, items):
+    """Versión async de create_preference. 'items': las OrderItem del pedido ya cargadas."""
+    if httpx is None:
+        # thread_sensitive=False: la espera de red no bloquea el hilo compartido de la BD
+        await sync_to_async(_sdk_create, thread_sensitive=False)(order, items)
+        await order.asave(update_fields=SAVED_FIELDS)
+        return order
+
+    url = settings.MERCADOPAGO_API_URL.rstrip('/') + '/checkout/preferences'
+    headers = {
+        'Authorization': f'Bearer {settings.MERCADOPAGO_ACCESS_TOKEN}',
+        'x-idempotency-key': order.external_reference,
+    }
+    try:
+        async with asyncio.timeout(settings.MERCADOPAGO_TIMEOUT):
+            response = await _get_async_client().post(url, json=build_preference(order, items), headers=headers)
+    except (TimeoutError, httpx.HTTPError) as exc:
+        raise _unavailable(order, exc)
+    try:
+        preference = response.json()
+    except ValueError:
+        preference = None
+    _accept(order, response.status_code, preference)
+    await order.asave(update_fields=SAVED_FIELDS)
+    return order
@@ -0,0 +1,87 @@
+from decimal import Decimal
+
+from .images import srcset
+from .metrics import timed
+from .models import Product, ProductImage
+from .serializers import ProductSerializer
+
+# ==========================================
+# SERIALIZACIÓN RÁPIDA DE LISTADOS (SOLO LECTURA)
+# ==========================================
+# Construye las filas directamente desde .values() sin pasar por los campos de
+# DRF uno por uno. La salida debe ser idéntica (byte a byte, con el mismo
+# renderer) a ProductSerializer: mismas claves, mismo orden, mismos formatos.
+# Si cambias ProductSerializer, cambia esto también (lo vigilan los tests).
+
+# campo del serializador -> columnas de .values()
+COLUMNS = {
+    'id': ('id',),
+    'name': ('name',),
+    'brand': ('brand',),
+    'image': ('image',),
+    'image_srcset': ('image', 'image_meta'),  # la imagen actual valida image_meta['source']
+    'description': ('description',),
+    'price': ('price',),
+    'original_price': ('original_price',),
+    'category': ('category_id',),
+    'is_active': ('is_active',),
+    'is_black_friday': ('is_black_friday',),
+    'label': ('label',),
+    'label_display': ('label',),
+}
+
+LABELS = dict(Product.Label.choices)
+CENTS = Decimal('0.01')
+
+
+def _decimal(value):
+    # Igual que DecimalField(decimal_places=2) de DRF con COERCE_DECIMAL_TO_STRING
+    return None if value is None else '{:f}'.format(value.quantize(CENTS))
+
+
+class FastProductSerializer:
+    def __init__(self, fields=None):
+        self.fields = [f for f in ProductSerializer.Meta.fields if fields is None or f in fields]
+        # Un solo objeto storage para todas las filas (no uno por ImageFieldFile)
+        self.product_storage = Product._meta.get_field('image').storage
+        self.image_storage = ProductImage._meta.get_field('image').storage
+
+    def columns(self, extra=()):
+        names = {column for f in self.fields for column in COLUMNS.get(f, ())} | {'id', *extra}
+        return sorted(names)
+
+    def _images(self, ids):
+        if 'images' not in self.fields or not ids:
+            return {}
+        by_product = {pk: [] for pk in ids}
+        storage_url = self.image_storage.url
+        rows = (ProductImage.objects.filter(product_id__in=ids)
+                .order_by('product_id', 'id').values_list('id', 'image', 'product_id', 'image_meta'))
+        for pk, name, product_id, meta in rows:
+            by_product[product_id].append({
+                'id': pk,
+                'image': storage_url(name) if name else None,
+                'product': product_id,
+                'image_srcset': srcset(meta, self.image_storage, name),
+            })
+        return by_product
+
+    @timed('serialize')
+    def serialize(self, rows):
+        """rows: dicts de .values(self.columns()) -> lista de dicts como ProductSerializer"""
+        images = self._images([row['id'] for row in rows])
+        storage_url = self.product_storage.url
+        converters = {
+            'image': lambda row: storage_url(row['image']) if row['image'] else None,
+            'image_srcset': lambda row: srcset(row['image_meta'], self.product_storage, row['image']),
+            'price': lambda row: _decimal(row['price']),
+            'original_price': lambda row: _decimal(row['original_price']),
+            'category': lambda row: row['category_id'],
+            'label_display': lambda row: str(LABELS.get(row['label'], row['label'])),
+            'images': lambda row: images[row['id']],
+        }
+        plan = [(name, converters.get(name)) for name in self.fields]
+        return [
+            {name: convert(row) if convert else row[name] for name, convert in plan}
+            for row in rows
+        ]
@@ -0,0 +1,98 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Count, Max, Min
+
+from .models import Product
+from .search import search_products, tokenize
+
+# ==========================================
+# FILTROS Y FACETAS DEL CATÁLOGO
+# ==========================================
+# Filtros multivalor (?brand=A&brand=B&label=BF&category=1&min_price=10&max_price=99).
+# Las facetas se calculan con UN solo GROUP BY (brand, label, category) sobre el
+# catálogo filtrado por búsqueda/precio; los conteos de cada faceta se derivan en
+# Python ignorando el filtro de esa misma faceta (así al marcar "Samsung" siguen
+# apareciendo las demás marcas con su conteo).
+
+FACETS = {
+    'brand': 'brand',
+    'label': 'label',
+    'category': 'category_id',
+}
+
+
+def _decimal(raw):
+    try:
+        return Decimal(raw) if raw not in (None, '') else None
+    except InvalidOperation:
+        return None
+
+
+class CatalogFilter:
+    def __init__(self, params):
+        # Una búsqueda sin palabras (solo signos) no filtra nada
+        self.search = params.get('search') if tokenize(params.get('search')) else None
+        self.min_price = _decimal(params.get('min_price'))
+        self.max_price = _decimal(params.get('max_price'))
+
+        labels = {value for value, _ in Product.Label.choices}
+        self.selected = {
+            'brand': [b for b in params.getlist('brand') if b],
+            'label': [l for l in params.getlist('label') if l in labels],
+            'category': [int(c) for c in params.getlist('category') if c.isdecimal()],
+        }
+
+    def base_queryset(self, rank=False):
+        """Filtros que NO son facetas: activos, búsqueda y rango de precio."""
+        queryset = Product.objects.filter(is_active=True)
+        if self.search:
+            queryset = search_products(queryset, self.search, rank=rank)
+        if self.min_price is not None:
+            queryset = queryset.filter(price__gte=self.min_price)
+        if self.max_price is not None:
+            queryset = queryset.filter(price__lte=self.max_price)
+        return queryset
+
+    def ordering(self, requested):
+        """Con búsqueda, por defecto se ordena por relevancia."""
+        if requested == 'relevance' and not self.search:
+            return None
+        return requested or ('relevance' if self.search else None)
+
+    def apply(self):
+        queryset = self.base_queryset(rank=True)
+        for facet, column in FACETS.items():
+            if self.selected[facet]:
+                queryset = queryset.filter(**{f'{column}__in': self.selected[facet]})
+        return queryset
+
+    def _matches(self, row, skip):
+        for facet, column in FACETS.items():
+            if facet != skip and self.selected[facet] and row[column] not in self.selected[facet]:
+                return False
+        return True
+
+    def facets(self):
+        rows = list(
+            self.base_queryset()
+            .order_by()
+            .values(*FACETS.values())
+            .annotate(count=Count('id'), min_price=Min('price'), max_price=Max('price'))
+        )
+
+        result = {}
+        for facet, column in FACETS.items():
+            counts = {}
+            for row in rows:
+                if row[column] is not None and self._matches(row, skip=facet):
+                    counts[row[column]] = counts.get(row[column], 0) + row['count']
+            result[facet] = [{'value': value, 'count': count}
+                             for value, count in sorted(counts.items())]
+
+        matching = [row for row in rows if self._matches(row, skip=None)]
+        result['total'] = sum(row['count'] for row in matching)
+        result['price'] = {
+            'min': min((row['min_price'] for row in matching), default=None),
+            'max': max((row['max_price'] for row in matching), default=None),
+        }
+        return result
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+# ==========================================
+# HASHERS DE CONTRASEÑA AJUSTABLES
+# ==========================================
+# Mismos algoritmos que los de Django, con el costo en settings (variables de
+# entorno) en vez de fijo en el código. Si se cambia el costo, Django rehashea
+# la contraseña en el siguiente login (must_update). Medir con bench_hashers.
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        # Sin valor en settings, el de Django (que sube con cada versión)
+        return settings.PBKDF2_ITERATIONS or super().iterations
@@ -0,0 +1,132 @@
+import base64
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, connection, transaction
+from PIL import Image, ImageOps, features
+
+from . import cache
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# DERIVADAS DE IMAGEN (THUMBNAILS RESPONSIVE)
+# ==========================================
+# Al subir una imagen (admin), se generan en segundo plano versiones WebP/AVIF
+# a anchos fijos, un placeholder borroso diminuto (data URI) y las dimensiones
+# originales. Todo queda en el campo 'image_meta' del modelo:
+#   {'source': nombre original, 'width': 1200, 'height': 900,
+#    'placeholder': 'data:image/webp;base64,...',
+#    'variants': {'webp': {'320': 'products/derivatives/x-320.webp', ...}, 'avif': {...}}}
+# El serializador lo convierte en srcset listos para <img srcset>.
+
+WIDTHS = (320, 640, 1024)
+PLACEHOLDER_WIDTH = 16
+QUALITY = {'webp': 78, 'avif': 55}
+FORMATS = tuple(fmt for fmt in ('avif', 'webp') if features.check(fmt))
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'IMAGE_PIPELINE_WORKERS', 2),
+            thread_name_prefix='image-pipeline',
+        )
+    return _executor
+
+
+def _encode(image, fmt, **options):
+    buffer = BytesIO()
+    image.save(buffer, format=fmt.upper(), quality=QUALITY.get(fmt, 80), **options)
+    return buffer.getvalue()
+
+
+def build_derivatives(storage, name):
+    """Genera y guarda las derivadas de 'name'. Devuelve el dict para image_meta."""
+    with storage.open(name, 'rb') as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+
+    width, height = original.size
+    stem = os.path.splitext(os.path.basename(name))[0]
+    folder = os.path.join(os.path.dirname(name), 'derivatives')
+
+    variants = {fmt: {} for fmt in FORMATS}
+    # Nunca agrandamos: si la original es chica, una sola derivada a su ancho
+    for target in [w for w in WIDTHS if w <= width] or [width]:
+        resized = original.copy()
+        resized.thumbnail((target, height), Image.LANCZOS)
+        for fmt in FORMATS:
+            saved = storage.save(f'{folder}/{stem}-{target}.{fmt}', ContentFile(_encode(resized, fmt)))
+            variants[fmt][str(resized.width)] = saved
+
+    tiny = original.copy()
+    tiny.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH), Image.BILINEAR)
+    placeholder = base64.b64encode(_encode(tiny, 'webp')).decode() if 'webp' in FORMATS else None
+
+    return {
+        'source': name,
+        'width': width,
+        'height': height,
+        'placeholder': f'data:image/webp;base64,{placeholder}' if placeholder else None,
+        'variants': variants,
+    }
+
+
+def process(model, pk):
+    """Trabajo del pool: procesa la imagen de model(pk) y guarda image_meta."""
+    try:
+        instance = model.objects.only('id', 'image').get(pk=pk)
+        if not instance.image:
+            return
+        meta = build_derivatives(instance.image.storage, instance.image.name)
+        # update() no dispara señales (evita reprocesar); invalidamos la caché a mano
+        model.objects.filter(pk=pk, image=instance.image.name).update(image_meta=meta)
+        cache.bump_version()
+    except Exception:
+        logger.exception("No se pudieron generar las derivadas de %s #%s", model.__name__, pk)
+
+
+def _run_in_pool(model, pk):
+    def job():
+        close_old_connections()
+        try:
+            process(model, pk)
+        finally:
+            connection.close()  # cada hilo del pool abre su propia conexión
+    return _get_executor().submit(job)
+
+
+def schedule(instance):
+    """Encola el procesamiento cuando la transacción del admin se confirme."""
+    meta = instance.image_meta or {}
+    if not instance.image or meta.get('source') == instance.image.name:
+        return
+    model, pk = type(instance), instance.pk
+    if getattr(settings, 'IMAGE_PIPELINE_SYNC', False):
+        transaction.on_commit(lambda: process(model, pk))
+    else:
+        transaction.on_commit(lambda: _run_in_pool(model, pk))
+
+
+def srcset(meta, storage, name):
+    """
+    image_meta -> {'width', 'height', 'placeholder', 'webp': 'url 320w, ...', 'avif': ...}
+    None si las derivadas son de otra imagen (name es la actual): recién reemplazada, aún sin procesar.
+    """
+    if not meta or meta.get('source') != name:
+        return None
+    result = {'width': meta['width'], 'height': meta['height'], 'placeholder': meta['placeholder']}
+    for fmt, sizes in meta['variants'].items():
+        result[fmt] = ', '.join(f'{storage.url(name)} {width}w'
+                                for width, name in sorted(sizes.items(), key=lambda item: int(item[0])))
+    return result
@@ -0,0 +1,80 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+
+from store import benchmark, recommendations
+from store.models import Product
+from store.mp_standin import MercadoPagoStandIn
+from store.seed import seed_catalog
+
+DEFAULT_BASELINE = Path(__file__).resolve().parents[2] / 'benchmark_baseline.json'
+
+
+class Command(BaseCommand):
+    help = ("Benchmark de los flujos del frontend (Home -> Catalog -> ProductDetail -> Cart -> checkout) "
+            "sobre un catálogo sintético. Falla si empeora respecto de la línea base guardada.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=5000)
+        parser.add_argument('--images', type=int, default=2, help="Imágenes extra por producto.")
+        parser.add_argument('--sessions', type=int, default=100)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--with-cache', action='store_true',
+                            help="No desactivar la caché del catálogo (por defecto se mide la BD).")
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+        parser.add_argument('--save-baseline', action='store_true', help="Guarda este resultado como línea base.")
+        parser.add_argument('--tolerance', type=float, default=0.3,
+                            help="Empeoramiento de latencia/throughput tolerado (0.3 = 30%%).")
+        parser.add_argument('--queries-only', action='store_true',
+                            help="Compara solo queries por petición (máquina distinta a la de la base).")
+
+    def handle(self, *args, **options):
+        overrides = {
+            'STORAGES': {**settings.STORAGES, 'default': {'BACKEND': 'store.storage.CachedFileSystemStorage'}},
+            'IMAGE_PIPELINE_SYNC': True,
+        }
+        if not options['with_cache']:
+            overrides['CACHES'] = {**settings.CACHES,
+                                   'catalog': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        with benchmark.disposable_database(), MercadoPagoStandIn() as standin:
+            with override_settings(MERCADOPAGO_API_URL=standin.url, **overrides):
+                report = self._run(options)
+        self._check(report, options)
+
+    def _run(self, options):
+        seed_catalog(options['products'], seed=options['seed'], images_per_product=options['images'])
+        recommendations.rebuild()
+        product_ids = list(Product.objects.filter(is_active=True).values_list('id', flat=True))
+        brands = sorted(set(Product.objects.values_list('brand', flat=True)))
+        report = benchmark.run(Client(), product_ids, brands, options['sessions'],
+                               warmup=options['warmup'], seed=options['seed'])
+        report['scale'] = {key: options[key] for key in ('products', 'images', 'sessions', 'seed', 'with_cache')}
+
+        self.stdout.write(f"{'paso':<22} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}")
+        for step, row in report['steps'].items():
+            self.stdout.write(f"{step:<22} {row['rps']:>8.1f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+                              f"{row['p99_ms']:>8.2f} {row['max_queries']:>8}")
+        self.stdout.write(f"{'total':<22} {report['total']['rps']:>8.1f}  ({report['total']['requests']} peticiones)")
+        return report
+
+    def _check(self, report, options):
+        path = Path(options['baseline'])
+        if options['save_baseline']:
+            path.write_text(json.dumps(report, indent=2) + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Línea base guardada en {path}"))
+            return
+        if not path.exists():
+            self.stdout.write(self.style.WARNING(f"Sin línea base en {path} (usa --save-baseline)"))
+            return
+        baseline = json.loads(path.read_text())
+        if baseline.get('scale') != report['scale']:
+            raise CommandError(f"La línea base se midió con otra escala: {baseline.get('scale')}")
+        problems = benchmark.compare(report, baseline, options['tolerance'], latency=not options['queries_only'])
+        if problems:
+            raise CommandError("Regresiones frente a la línea base:\n  " + "\n  ".join(problems))
+        self.stdout.write(self.style.SUCCESS("Sin regresiones frente a la línea base"))
@@ -0,0 +1,74 @@
+import asyncio
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, get_hashers, make_password
+from django.core.management.base import BaseCommand
+
+from store import accounts
+from store.benchmark import percentile
+
+PASSWORD = 'clave-de-prueba-123'
+
+
+class Command(BaseCommand):
+    help = ("Mide el costo de cada hasher de contraseñas configurado (ms por hash, hashes/s) y cuánto "
+            "se traba el event loop durante una ráfaga de registros con y sin el pool de accounts.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=10, help="Hashes por hasher.")
+        parser.add_argument('--burst', type=int, default=20, help="Registros simultáneos de la ráfaga.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Hasher principal: {get_hasher().algorithm} (PASSWORD_HASHER={settings.PASSWORD_HASHER})")
+
+        # 1. Costo por hasher
+        for hasher in get_hashers():
+            try:
+                hasher.encode(PASSWORD, hasher.salt())  # también carga la librería (argon2-cffi)
+            except (ValueError, ImportError) as exc:
+                self.stdout.write(f"  {hasher.algorithm:<16} no disponible: {exc}")
+                continue
+            samples = []
+            for _ in range(options['rounds']):
+                start = time.perf_counter()
+                hasher.encode(PASSWORD, hasher.salt())
+                samples.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(
+                f"  {hasher.algorithm:<16} {statistics.median(samples):7.1f} ms/hash  "
+                f"{1000 / statistics.mean(samples):6.1f} hashes/s"
+            )
+
+        # 2. Ráfaga: registros/s y el peor retraso del event loop (lo que esperaría otra petición)
+        for label, hash_password in (('en el loop', self._inline), ('en el pool', accounts.ahash_password)):
+            elapsed, lags = asyncio.run(self._burst(hash_password, options['burst']))
+            self.stdout.write(
+                f"Ráfaga de {options['burst']} {label} ({settings.PASSWORD_HASH_WORKERS} hilos): "
+                f"{options['burst'] / elapsed:6.1f} registros/s  retraso del loop p50 {statistics.median(lags):.1f} ms  "
+                f"p99 {percentile(lags, 99):.1f} ms  máx {max(lags):.1f} ms"
+            )
+
+    @staticmethod
+    async def _inline(raw_password):
+        return make_password(raw_password)
+
+    @staticmethod
+    async def _burst(hash_password, size):
+        lags, done = [], asyncio.Event()
+
+        async def ticker():
+            # Una "petición" cada 5 ms: cuánto tarda de más en volver a correr
+            while not done.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(0.005)
+                lags.append((time.perf_counter() - start) * 1000 - 5)
+
+        tick = asyncio.create_task(ticker())
+        await asyncio.sleep(0.02)
+        start = time.perf_counter()
+        await asyncio.gather(*(hash_password(PASSWORD) for _ in range(size)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await tick
+        return elapsed, lags
@@ -0,0 +1,81 @@
+import statistics
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from store.benchmark import disposable_database, percentile
+
+PASSWORD = 'clave-de-prueba-123'
+
+
+class Command(BaseCommand):
+    help = ("Mide el throughput de /api/login/ (un hilo y varios a la vez): logins/s, latencia, "
+            "queries e INSERTs por login.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--logins', type=int, default=40, help="Logins por escenario.")
+        parser.add_argument('--threads', type=int, default=4)
+
+    def handle(self, *args, **options):
+        # Cada login tarda lo que el hasher de contraseñas: que no se loguee como lento
+        with disposable_database(), override_settings(PERF_SLOW_REQUEST_MS=float('inf')):
+            self._run(options)
+
+    def _run(self, options):
+        emails = [f'bench{i}@example.com' for i in range(options['users'])]
+        for email in emails:
+            User.objects.create_user(username=email, email=email, password=PASSWORD)
+
+        def login(client, i):
+            response = client.post('/api/login/', {'username': emails[i % len(emails)], 'password': PASSWORD},
+                                   content_type='application/json')
+            assert response.status_code == 200, response.content
+
+        # 1. Secuencial: latencia y queries por login
+        client, samples, queries = Client(), [], []
+        tokens_before = OutstandingToken.objects.count()
+        for i in range(options['logins']):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                login(client, i)
+                samples.append((time.perf_counter() - start) * 1000)
+            queries.append(ctx.captured_queries)
+        tokens = (OutstandingToken.objects.count() - tokens_before) / options['logins']
+        inserts = statistics.mean(sum(q['sql'].startswith('INSERT') for q in batch) for batch in queries)
+        self.stdout.write(
+            f"1 hilo:    {1000 / statistics.mean(samples):6.1f} logins/s  p50 {statistics.median(samples):.0f} ms  "
+            f"p95 {percentile(samples, 95):.0f} ms  {statistics.mean(map(len, queries)):.1f} queries, "
+            f"{inserts:.1f} INSERTs, {tokens:.1f} tokens emitidos por login"
+        )
+
+        # 2. Concurrente: varios hilos (como los workers durante el pico de inicio de una venta)
+        per_thread = options['logins'] // options['threads']
+        errors = []
+
+        def worker(offset):
+            try:
+                thread_client = Client()
+                for i in range(per_thread):
+                    login(thread_client, offset + i)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(n * per_thread,)) for n in range(options['threads'])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        if errors:
+            self.stderr.write(f"{len(errors)} hilos fallaron: {errors[0]}")
+        self.stdout.write(f"{options['threads']} hilos:  {per_thread * options['threads'] / elapsed:6.1f} logins/s")
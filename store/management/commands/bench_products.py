@@ -0,0 +1,60 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+
+from store.benchmark import disposable_database, percentile
+from store.models import Product
+from store.pagination import ORDERINGS, encode_cursor
+from store.seed import seed_catalog
+
+
+class Command(BaseCommand):
+    help = "Mide p50/p99 de /api/products/ (primera página y página profunda) a distintos tamaños de catálogo."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000, 100000, 500000])
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=24)
+        parser.add_argument('--with-cache', action='store_true',
+                            help="No desactivar la caché del catálogo (por defecto se mide la BD).")
+
+    def handle(self, *args, **options):
+        no_cache = {**settings.CACHES, 'catalog': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        with disposable_database():
+            if options['with_cache']:
+                self._run(options)
+            else:
+                with override_settings(CACHES=no_cache):
+                    self._run(options)
+
+    def _run(self, options):
+        client = Client()
+        seeded = 0
+        self.stdout.write(f"{'productos':>10} {'escenario':<22} {'p50 ms':>8} {'p99 ms':>8}")
+        for size in sorted(options['sizes']):
+            seeded += seed_catalog(size - seeded, seed=size)
+
+            for ordering in ('newest', 'min_price'):
+                field, _ = ORDERINGS[ordering]
+                pivot = (Product.objects.filter(is_active=True)
+                         .order_by(field, 'id')[size // 2])
+                scenarios = {
+                    f'{ordering} pág. 1': {'ordering': ordering},
+                    f'{ordering} pág. profunda': {'ordering': ordering,
+                                                  'cursor': encode_cursor(getattr(pivot, field), pivot.pk)},
+                }
+                for name, params in scenarios.items():
+                    params = {**params, 'limit': options['limit'], 'fields': 'id,name,brand,image,price'}
+                    samples = []
+                    for _ in range(options['requests']):
+                        start = time.perf_counter()
+                        response = client.get('/api/products/', params)
+                        samples.append((time.perf_counter() - start) * 1000)
+                        assert response.status_code == 200, response.content
+                    self.stdout.write(
+                        f"{size:>10} {name:<22} {statistics.median(samples):>8.2f} {percentile(samples, 99):>8.2f}"
+                    )
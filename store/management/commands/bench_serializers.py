@@ -0,0 +1,55 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from store.benchmark import disposable_database
+from store.fast import FastProductSerializer
+from store.models import Product
+from store.queries import PRODUCT_PLAN
+from store.renderers import FastJSONRenderer
+from store.seed import seed_catalog
+from store.serializers import ProductSerializer
+
+
+class Command(BaseCommand):
+    help = "Compara ProductSerializer + JSONRenderer contra la vía rápida (.values() + orjson)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with disposable_database():
+            self._run(options)
+
+    def _time(self, fn, repeat):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples), result
+
+    def _run(self, options):
+        seeded = 0
+        self.stdout.write(f"{'filas':>8} {'DRF ms':>10} {'rápido ms':>10} {'x':>6}  idénticos")
+        for size in sorted(options['sizes']):
+            seeded += seed_catalog(size - seeded, seed=size)
+            queryset = Product.objects.order_by('id')
+
+            def slow():
+                rows = PRODUCT_PLAN.apply(queryset)
+                return JSONRenderer().render(ProductSerializer(rows, many=True).data)
+
+            def fast():
+                serializer = FastProductSerializer()
+                rows = list(queryset.values(*serializer.columns()))
+                return FastJSONRenderer().render(serializer.serialize(rows))
+
+            slow_ms, slow_bytes = self._time(slow, options['repeat'])
+            fast_ms, fast_bytes = self._time(fast, options['repeat'])
+            self.stdout.write(
+                f"{size:>8} {slow_ms:>10.1f} {fast_ms:>10.1f} {slow_ms / fast_ms:>6.1f}  {slow_bytes == fast_bytes}"
+            )
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store import cache, images
+from store.models import Product, ProductImage
+
+
+class Command(BaseCommand):
+    help = "Genera las derivadas WebP/AVIF y placeholders de las imágenes que aún no las tienen."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Regenera también las ya procesadas.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        total = 0
+        with cache.batch():
+            for model in (Product, ProductImage):
+                queryset = model.objects.exclude(image='').exclude(image=None)
+                if not options['force']:
+                    # image_meta=None compararía contra el null de JSON, no contra NULL
+                    queryset = queryset.filter(image_meta__isnull=True)
+                for pk in queryset.order_by('pk').values_list('pk', flat=True).iterator():
+                    images.process(model, pk)
+                    total += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Derivadas de {total} imágenes en {time.perf_counter() - start:.1f}s"
+        ))
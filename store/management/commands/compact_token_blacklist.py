@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store import tokens
+
+
+class Command(BaseCommand):
+    help = ("Borra de a lotes los JWT vencidos de OutstandingToken/BlacklistedToken "
+            "(reemplaza a flushexpiredtokens: sin un DELETE gigante ni locks largos).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.05, help="Segundos de espera entre lotes.")
+        parser.add_argument('--max-batches', type=int, help="Tope de lotes por ejecución.")
+
+    def handle(self, *args, **options):
+        before = tokens.table_sizes()
+        self.stdout.write(f"Antes: {before['outstanding']} emitidos, {before['blacklisted']} en lista negra")
+        start = time.perf_counter()
+
+        def progress(deleted, batches):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"  lote {batches}: {deleted} borrados "
+                                  f"({deleted / (time.perf_counter() - start):,.0f} filas/s)")
+
+        deleted, batches = tokens.prune_expired(options['batch_size'], pause=options['pause'],
+                                                max_batches=options['max_batches'], progress=progress)
+        elapsed = time.perf_counter() - start
+        after = tokens.table_sizes()
+        self.stdout.write(self.style.SUCCESS(
+            f"{deleted} tokens vencidos borrados en {batches} lotes, {elapsed:.1f}s "
+            f"({deleted / elapsed if elapsed else 0:,.0f} filas/s). "
+            f"Después: {after['outstanding']} emitidos, {after['blacklisted']} en lista negra"
+        ))
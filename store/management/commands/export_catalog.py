@@ -0,0 +1,36 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from store import catalog_io
+from store.models import Product
+
+
+class Command(BaseCommand):
+    help = "Exporta el catálogo a CSV o JSONL (mismo formato que import_catalog), en streaming."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help="Archivo de salida ('-' = salida estándar).")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Por defecto, según la extensión.")
+        parser.add_argument('--active', action='store_true', help="Solo productos activos.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = catalog_io.detect_format(path, options['format'])
+        queryset = Product.objects.filter(is_active=True) if options['active'] else None
+        start = time.perf_counter()
+        skipped = catalog_io.without_sku(queryset).count()
+        if skipped:
+            self.stderr.write(f"Aviso: {skipped} productos sin SKU quedan fuera "
+                              "(import_catalog usa el SKU como clave).")
+        rows = catalog_io.export_rows(queryset)
+        if path == '-':
+            self.stdout.ending = ''  # las filas ya traen su salto de línea
+            catalog_io.write_rows(rows, self.stdout, fmt)
+            return
+        with open(path, 'w', encoding='utf-8', newline='') as stream:
+            total = catalog_io.write_rows(rows, stream, fmt)
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} productos exportados a {path} en {time.perf_counter() - start:.1f}s"
+        ))
@@ -0,0 +1,52 @@
+import io
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store import catalog_io
+
+
+class Command(BaseCommand):
+    help = ("Importa/actualiza productos en lote desde CSV o JSONL (clave: sku). "
+            "Lee en streaming y escribe por trozos con bulk_create/bulk_update.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Archivo a importar ('-' = entrada estándar).")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Por defecto, según la extensión.")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--dry-run', action='store_true', help="Valida y cuenta sin escribir nada.")
+        parser.add_argument('--max-errors', type=int, default=20, help="Errores a listar al final.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = catalog_io.detect_format(path, options['format'])
+        if path == '-':
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+        else:
+            try:
+                stream = open(path, encoding='utf-8-sig', newline='')
+            except OSError as exc:
+                raise CommandError(f"No se pudo abrir {path}: {exc}")
+
+        def progress(stats):
+            self.stdout.write(
+                f"  {stats.rows:>9} filas | {stats.created} nuevas, {stats.updated} actualizadas, "
+                f"{stats.unchanged} sin cambios, {len(stats.errors)} con error | {stats.rate:,.0f} filas/s"
+            )
+
+        with stream:
+            stats = catalog_io.import_rows(catalog_io.read_rows(stream, fmt), chunk_size=options['chunk_size'],
+                                           dry_run=options['dry_run'], progress=progress)
+
+        for line, message in stats.errors[:options['max_errors']]:
+            self.stderr.write(f"  fila {line}: {message}")
+        if len(stats.errors) > options['max_errors']:
+            self.stderr.write(f"  ... y {len(stats.errors) - options['max_errors']} errores más")
+        prefix = "[simulación] " if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{stats.rows} filas en {stats.elapsed:.1f}s ({stats.rate:,.0f} filas/s): "
+            f"{stats.created} nuevas, {stats.updated} actualizadas, {stats.unchanged} sin cambios, "
+            f"{len(stats.errors)} con error"
+        ))
+        if stats.created and not options['dry_run']:
+            self.stdout.write("Productos nuevos: corré rebuild_recommendations y build_image_derivatives.")
@@ -0,0 +1,147 @@
+import asyncio
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import httpx
+import uvicorn
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.test.utils import override_settings
+
+from store.benchmark import disposable_database
+from store.models import Product
+from store.mp_standin import MercadoPagoStandIn
+from store.seed import seed_catalog
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class _PooledWSGIServer(ThreadingMixIn, WSGIServer):
+    """Servidor WSGI con N hilos fijos: se comporta como N workers sync de gunicorn."""
+    daemon_threads = True
+    workers = 3
+
+    def process_request(self, request, client_address):
+        if not hasattr(self, '_pool'):
+            self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        self._pool.submit(self.process_request_thread, request, client_address)
+
+
+class Command(BaseCommand):
+    help = ("Prueba de carga del checkout contra el doble local de Mercado Pago: mide cuántas "
+            "peticiones de catálogo por segundo se siguen atendiendo mientras MP tarda en responder.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--server', choices=['asgi', 'wsgi', 'both'], default='both',
+                            help="asgi = uvicorn (1 proceso); wsgi = 3 workers sync simulados.")
+        parser.add_argument('--delays', nargs='+', type=float, default=[0, 2],
+                            help="Latencia añadida por el doble de MP (segundos).")
+        parser.add_argument('--duration', type=float, default=6)
+        parser.add_argument('--checkouts', type=int, default=10, help="Checkouts concurrentes.")
+        parser.add_argument('--browsers', type=int, default=10, help="Clientes concurrentes navegando el catálogo.")
+
+    def handle(self, *args, **options):
+        # BD desechable en archivo (varios hilos escriben pedidos a la vez)
+        with tempfile.TemporaryDirectory() as tmp, disposable_database(f'{tmp}/loadtest.sqlite3'), \
+                MercadoPagoStandIn() as standin:
+            seed_catalog(500)
+            product_ids = list(Product.objects.filter(is_active=True).values_list('id', flat=True)[:20])
+            with override_settings(MERCADOPAGO_API_URL=standin.url, MERCADOPAGO_TIMEOUT=8.0,
+                                   ALLOWED_HOSTS=['*']):
+                self._run(options, standin, product_ids)
+
+    def _run(self, options, standin, product_ids):
+        servers = ['asgi', 'wsgi'] if options['server'] == 'both' else [options['server']]
+        self.stdout.write(f"{'servidor':<8} {'MP +s':>6} {'catálogo req/s':>15} {'catálogo p95 ms':>16} "
+                          f"{'checkouts/s':>12} {'checkout p50 ms':>16}")
+        for server in servers:
+            url, stop = self._start(server)
+            try:
+                for delay in options['delays']:
+                    standin.delay = delay
+                    result = asyncio.run(self._load(url, options, product_ids))
+                    self.stdout.write(
+                        f"{server:<8} {delay:>6.1f} {result['catalog_rps']:>15.1f} {result['catalog_p95']:>16.0f} "
+                        f"{result['checkout_rps']:>12.1f} {result['checkout_p50']:>16.0f}"
+                    )
+            finally:
+                stop()
+
+    def _start(self, kind):
+        port = free_port()
+        if kind == 'asgi':
+            server = uvicorn.Server(uvicorn.Config(get_asgi_application(), host='127.0.0.1', port=port,
+                                                   log_level='warning', lifespan='off'))
+            thread = threading.Thread(target=server.run, daemon=True)
+            thread.start()
+            while not server.started:
+                time.sleep(0.05)
+
+            def stop():
+                server.should_exit = True
+                thread.join()
+        else:
+            server = make_server('127.0.0.1', port, get_wsgi_application(),
+                                 server_class=_PooledWSGIServer, handler_class=_QuietHandler)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+
+            def stop():
+                server.shutdown()
+                server.server_close()
+        return f'http://127.0.0.1:{port}', stop
+
+    async def _load(self, url, options, product_ids):
+        deadline = time.perf_counter() + options['duration']
+        catalog, checkouts = [], []
+        payload = {
+            'items': [{'id': pk, 'quantity': 1} for pk in product_ids[:3]],
+            'payer': {'name': 'Carga', 'email': 'carga@example.com'},
+        }
+
+        async def browse(client):
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.get(f'{url}/api/products/', params={'limit': 24})
+                if response.status_code == 200:
+                    catalog.append(time.perf_counter() - start)
+
+        async def buy(client):
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.post(f'{url}/api/create_preference/', json=payload)
+                if response.status_code == 200:
+                    checkouts.append(time.perf_counter() - start)
+
+        limits = httpx.Limits(max_connections=options['browsers'] + options['checkouts'])
+        async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+            started = time.perf_counter()
+            await asyncio.gather(*[browse(client) for _ in range(options['browsers'])],
+                                 *[buy(client) for _ in range(options['checkouts'])])
+            elapsed = time.perf_counter() - started
+
+        def ms(samples, pct):
+            return statistics.quantiles(samples, n=100)[pct - 1] * 1000 if len(samples) > 1 else float('nan')
+
+        return {
+            'catalog_rps': len(catalog) / elapsed,
+            'catalog_p95': ms(catalog, 95),
+            'checkout_rps': len(checkouts) / elapsed,
+            'checkout_p50': ms(checkouts, 50),
+        }
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from store import payments, stock
+
+
+class Command(BaseCommand):
+    help = ("Worker de avisos de pago: aplica la cola PaymentEvent a los pedidos (idempotente) "
+            "y libera las reservas de stock vencidas.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Procesa lo pendiente y termina.")
+        parser.add_argument('--batch', type=int, default=50)
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help="Segundos de espera cuando la cola está vacía.")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            close_old_connections()
+            processed = payments.process_pending(options['batch'])
+            stock.release_expired()
+            total += processed
+            if options['once'] and not processed:
+                break
+            if not processed:
+                time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f"Avisos procesados: {total}"))
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store import cache, recommendations
+
+
+class Command(BaseCommand):
+    help = "Recalcula en lote la tabla de productos recomendados (vecinos por producto)."
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        total = recommendations.rebuild(carts=recommendations.order_carts())
+        cache.bump_version()
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomendaciones de {total} productos en {time.perf_counter() - start:.1f}s"
+        ))
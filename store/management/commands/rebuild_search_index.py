@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.models import Product
+from store.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda (necesario tras cargas con bulk_create, que no disparan señales)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        total = rebuild_index(Product.objects.all(), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} productos indexados en {time.perf_counter() - start:.1f}s"
+        ))
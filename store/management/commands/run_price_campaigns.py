@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from store import campaigns
+
+
+class Command(BaseCommand):
+    help = "Aplica y revierte las campañas de precios programadas cuando llega su hora."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Revisa una vez y termina (cron).")
+        parser.add_argument('--interval', type=float, default=30.0, help="Segundos entre revisiones.")
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            applied, reverted = campaigns.run_due()
+            if applied or reverted or options['once']:
+                self.stdout.write(self.style.SUCCESS(f"Campañas aplicadas: {applied}, revertidas: {reverted}"))
+            if options['once']:
+                break
+            time.sleep(options['interval'])
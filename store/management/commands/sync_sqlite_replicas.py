@@ -0,0 +1,32 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = ("Copia la base SQLite principal sobre las réplicas SQLite de DATABASE_REPLICA_URLS "
+            "(doble local de la replicación de PostgreSQL). Correrlo de nuevo simula el atraso.")
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError("Solo para SQLite: en PostgreSQL las réplicas se alimentan por replicación.")
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("No hay réplicas configuradas (DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3).")
+        primary.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            replica = connections[alias]
+            if replica.vendor != 'sqlite':
+                raise CommandError(f"{alias} no es SQLite.")
+            replica.close()
+            start = time.perf_counter()
+            target = sqlite3.connect(replica.settings_dict['NAME'])
+            try:
+                # API de backup de SQLite: copia consistente aunque la principal esté recibiendo escrituras
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f"{alias}: copiada en {time.perf_counter() - start:.2f}s")
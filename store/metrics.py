@@ -0,0 +1,219 @@
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# MÉTRICAS POR PETICIÓN
+# ==========================================
+# PerformanceMiddleware abre un RequestMetrics por petición (en un ContextVar,
+# así también lo ven las queries que una vista async corre en sync_to_async) y:
+#   - suma tiempo y cantidad de queries con un execute_wrapper instalado en cada
+#     conexión al abrirse (ver signals.py)
+#   - suma los tramos marcados con span(): 'serialize' (serializadores),
+#     'render' (JSON) y 'storage' (URLs de imágenes)
+#   - con SERVER_TIMING=1, responde con la cabecera Server-Timing (la muestran
+#     las DevTools; desactivada por defecto: expone tiempos internos a cualquiera)
+#   - deja una línea de log JSON por petición (WARNING si fue lenta)
+#   - acumula histogramas por ruta en memoria del proceso: /api/metrics/
+# Los tramos pueden solaparse: 'serialize' incluye las queries perezosas que
+# dispare un serializador.
+
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'db', 'spans', 'depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.spans = defaultdict(float)
+        self.depth = defaultdict(int)
+
+
+# --- MEDICIÓN ---
+def record_query(execute, sql, params, many, context):
+    current = _current.get()
+    if current is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        current.queries += 1
+        current.db += time.perf_counter() - start
+
+
+def install(conn):
+    if record_query not in conn.execute_wrappers:
+        conn.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def span(name):
+    """Suma la duración del bloque al tramo 'name' de la petición en curso (solo el más externo)."""
+    current = _current.get()
+    if current is None or current.depth[name]:
+        yield
+        return
+    current.depth[name] += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        current.depth[name] -= 1
+        current.spans[name] += time.perf_counter() - start
+
+
+def timed(name):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# --- HISTOGRAMAS (por proceso) ---
+class _Histogram:
+    __slots__ = ('count', 'total_ms', 'db_ms', 'queries', 'bytes', 'buckets', 'statuses')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = self.db_ms = 0.0
+        self.queries = self.bytes = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)  # el último es +Inf
+        self.statuses = defaultdict(int)
+
+
+_histograms = defaultdict(_Histogram)
+_lock = threading.Lock()
+
+
+def observe(key, total_ms, metrics, size, status):
+    with _lock:
+        histogram = _histograms[key]
+        histogram.count += 1
+        histogram.total_ms += total_ms
+        histogram.db_ms += metrics.db * 1000
+        histogram.queries += metrics.queries
+        histogram.bytes += size or 0
+        histogram.buckets[bisect_left(BUCKETS_MS, total_ms)] += 1
+        histogram.statuses[f'{status // 100}xx'] += 1
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def snapshot():
+    """Histogramas acumulados: {'GET api/products/': {...}}"""
+    with _lock:
+        items = [(key, histogram) for key, histogram in _histograms.items()]
+        return {
+            f'{method} {route}': {
+                'count': h.count,
+                'avg_ms': round(h.total_ms / h.count, 2),
+                'avg_db_ms': round(h.db_ms / h.count, 2),
+                'avg_queries': round(h.queries / h.count, 2),
+                'avg_bytes': round(h.bytes / h.count),
+                'buckets_ms': dict(zip([*map(str, BUCKETS_MS), '+Inf'], h.buckets)),
+                'statuses': dict(h.statuses),
+            }
+            for (method, route), h in sorted(items)
+        }
+
+
+def prometheus():
+    """Los mismos histogramas en formato de texto de Prometheus."""
+    lines = ['# TYPE danshop_request_duration_ms histogram']
+    with _lock:
+        items = sorted(_histograms.items())
+        for (method, route), h in items:
+            labels = f'method="{method}",route="{route}"'
+            cumulative = 0
+            for bound, count in zip([*map(str, BUCKETS_MS), '+Inf'], h.buckets):
+                cumulative += count
+                lines.append(f'danshop_request_duration_ms_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'danshop_request_duration_ms_sum{{{labels}}} {h.total_ms:.3f}')
+            lines.append(f'danshop_request_duration_ms_count{{{labels}}} {h.count}')
+        lines.append('# TYPE danshop_db_duration_ms_sum counter')
+        lines += [f'danshop_db_duration_ms_sum{{method="{m}",route="{r}"}} {h.db_ms:.3f}' for (m, r), h in items]
+        lines.append('# TYPE danshop_db_queries_total counter')
+        lines += [f'danshop_db_queries_total{{method="{m}",route="{r}"}} {h.queries}' for (m, r), h in items]
+    return '\n'.join(lines) + '\n'
+
+
+# --- MIDDLEWARE ---
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics, start = RequestMetrics(), time.perf_counter()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        metrics, start = RequestMetrics(), time.perf_counter()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics, start)
+
+    def _finish(self, request, response, metrics, start):
+        total_ms = (time.perf_counter() - start) * 1000
+        size = None if response.streaming else len(response.content)
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match else 'unmatched'  # la ruta, no el path: claves acotadas
+
+        if settings.SERVER_TIMING:
+            entries = [f'db;dur={metrics.db * 1000:.2f};desc="{metrics.queries} queries"']
+            entries += [f'{name};dur={seconds * 1000:.2f}' for name, seconds in metrics.spans.items()]
+            entries.append(f'total;dur={total_ms:.2f}')
+            response['Server-Timing'] = ', '.join(entries)
+
+        observe((request.method, route), total_ms, metrics, size, response.status_code)
+        slow = total_ms >= settings.PERF_SLOW_REQUEST_MS
+        if slow or logger.isEnabledFor(logging.INFO):
+            logger.log(logging.WARNING if slow else logging.INFO, json.dumps({
+                'method': request.method,
+                'route': route,
+                'path': request.path,
+                'status': response.status_code,
+                'ms': round(total_ms, 2),
+                'db_ms': round(metrics.db * 1000, 2),
+                'queries': metrics.queries,
+                **{f'{name}_ms': round(seconds * 1000, 2) for name, seconds in metrics.spans.items()},
+                'bytes': size,
+            }))
+        return response
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from store.search import get_backend, index_products
+
+    backend = get_backend(schema_editor.connection)
+    if backend is None:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        backend.create(cursor)
+
+    Product = apps.get_model('store', 'Product')
+    products = list(Product.objects.only('id', 'name', 'brand', 'description'))
+    index_products(products, conn=schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    from store.search import get_backend
+
+    backend = get_backend(schema_editor.connection)
+    if backend is None:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        backend.drop(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_alter_category_options_alter_product_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
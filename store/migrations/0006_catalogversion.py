@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_product_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='is_active',
+            field=models.BooleanField(default=True, verbose_name='¿Visible en Tienda?'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='is_black_friday',
+            field=models.BooleanField(default=False, verbose_name='¿Es Black Friday? (Check)'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='label',
+            field=models.CharField(choices=[('NONE', 'Sin etiqueta'), ('BF', 'Black Friday'), ('OF', 'Oferta'), ('LQ', 'Liquidación'), ('NW', 'Nuevo')], default='NONE', max_length=4, verbose_name='Etiqueta de Marketing'),
+        ),
+    ]
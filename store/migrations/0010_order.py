@@ -0,0 +1,57 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:22
+
+import django.db.models.deletion
+import store.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_image_meta'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('external_reference', models.CharField(default=store.models.new_external_reference, editable=False, max_length=64, unique=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pendiente de pago'), ('APPROVED', 'Pagado'), ('REJECTED', 'Rechazado'), ('CANCELLED', 'Cancelado')], default='PENDING', max_length=10)),
+                ('name', models.CharField(max_length=255)),
+                ('email', models.EmailField(max_length=254)),
+                ('phone', models.CharField(blank=True, max_length=30)),
+                ('dni', models.CharField(blank=True, max_length=20)),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('address', models.CharField(blank=True, max_length=255)),
+                ('reference', models.CharField(blank=True, max_length=255, verbose_name='Referencia de la dirección')),
+                ('coupon', models.CharField(blank=True, max_length=30)),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('discount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('preference_id', models.CharField(blank=True, max_length=100)),
+                ('init_point', models.URLField(blank=True, max_length=500)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Pedido',
+                'verbose_name_plural': 'Pedidos',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('quantity', models.PositiveIntegerField()),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='store.order')),
+                ('product', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_items', to='store.product')),
+            ],
+        ),
+    ]
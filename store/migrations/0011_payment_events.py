@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:26
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0010_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='payment_id',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.CreateModel(
+            name='PaymentEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=100, unique=True)),
+                ('topic', models.CharField(max_length=50)),
+                ('resource_id', models.CharField(max_length=50)),
+                ('payload', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('PENDING', 'Pendiente'), ('PROCESSING', 'Procesando'), ('DONE', 'Procesado'), ('FAILED', 'Fallido')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Aviso de pago',
+                'verbose_name_plural': 'Avisos de pago',
+                'ordering': ['received_at'],
+                'indexes': [models.Index(condition=models.Q(('status', 'PENDING')), fields=['available_at', 'id'], name='store_payevent_pending_idx')],
+            },
+        ),
+    ]
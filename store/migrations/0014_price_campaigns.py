@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:40
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0013_product_sku'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceCampaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='Nombre')),
+                ('brand', models.CharField(blank=True, max_length=255, verbose_name='Marca')),
+                ('percent_off', models.DecimalField(decimal_places=2, max_digits=5, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(90)], verbose_name='% de descuento')),
+                ('label', models.CharField(choices=[('BF', 'Black Friday'), ('OF', 'Oferta'), ('LQ', 'Liquidación')], default='OF', max_length=4, verbose_name='Etiqueta de Marketing')),
+                ('starts_at', models.DateTimeField(verbose_name='Empieza')),
+                ('ends_at', models.DateTimeField(blank=True, null=True, verbose_name='Termina')),
+                ('status', models.CharField(choices=[('SCHEDULED', 'Programada'), ('ACTIVE', 'Activa'), ('ENDED', 'Terminada'), ('CANCELLED', 'Cancelada')], default='SCHEDULED', max_length=10)),
+                ('products_count', models.PositiveIntegerField(default=0, verbose_name='Productos')),
+                ('applied_at', models.DateTimeField(blank=True, null=True)),
+                ('reverted_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='campaigns', to='store.category', verbose_name='Categoría')),
+            ],
+            options={
+                'verbose_name': 'Campaña de precios',
+                'verbose_name_plural': 'Campañas de precios',
+                'ordering': ['-starts_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PriceCampaignItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('original_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('label', models.CharField(max_length=4)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='store.pricecampaign')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='campaign_items', to='store.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('campaign', 'product'), name='store_campaign_item_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índice sobre expires_at de OutstandingToken (tabla de simplejwt, que no lo
+    trae): lo recorre compact_token_blacklist para encontrar vencidos sin barrer
+    la tabla. La consulta de la lista negra (jti único + token_id único) ya
+    tenía índices.
+    """
+
+    dependencies = [
+        ('store', '0014_price_campaigns'),
+        ('token_blacklist', '0013_alter_blacklistedtoken_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS store_outstanding_expires_idx '
+            'ON token_blacklist_outstandingtoken (expires_at)',
+            reverse_sql='DROP INDEX IF EXISTS store_outstanding_expires_idx',
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Lower, Trim
+
+INDEX = 'store_user_email_ci_uniq'
+
+
+def normalize_emails(apps, schema_editor):
+    """Pasa emails (y usernames que son el email) a minúsculas antes de crear el índice único."""
+    User = apps.get_model('auth', 'User')
+    # La misma normalización que se aplica abajo (strip + lower): ' Ana@x.com' y 'ana@x.com' chocan
+    duplicated = (User.objects.annotate(key=Trim(Lower('email'))).exclude(key='')
+                  .values('key').annotate(n=Count('id')).filter(n__gt=1).values_list('key', flat=True))
+    if duplicated:
+        raise RuntimeError(
+            f"Hay usuarios con el mismo email (sin distinguir mayúsculas): {', '.join(duplicated[:20])}. "
+            "Unificarlos antes de migrar."
+        )
+    taken = set(User.objects.values_list('username', flat=True))
+    for user in User.objects.exclude(email='').iterator():
+        email = user.email.strip().lower()
+        fields = {}
+        if user.email != email:
+            fields['email'] = email
+        if user.username.lower() == email and user.username != email and email not in taken:
+            fields['username'] = email
+            taken.add(email)
+        if fields:
+            User.objects.filter(pk=user.pk).update(**fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('store', '0015_outstanding_token_expiry_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_emails, migrations.RunPython.noop),
+        # Único sin distinguir mayúsculas; los emails vacíos (NULLIF -> NULL) no chocan entre sí
+        migrations.RunSQL(
+            f"CREATE UNIQUE INDEX {INDEX} ON auth_user (LOWER(NULLIF(email, '')))",
+            reverse_sql=f'DROP INDEX IF EXISTS {INDEX}',
+        ),
+    ]
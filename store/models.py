@@ -1,4 +1,10 @@
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils import timezone
 
 # --- MODELO CATEGORÍA ---
 class Category(models.Model):
@@ -23,6 +29,8 @@ class Product(models.Model):
 
     # 2. Campos Básicos
     category = models.ForeignKey(Category, related_name='products', on_delete=models.CASCADE, verbose_name="Categoría")
+    # Código propio del producto: la clave de import_catalog/export_catalog
+    sku = models.CharField(max_length=64, unique=True, blank=True, null=True, verbose_name="SKU")
     name = models.CharField(max_length=255, verbose_name="Nombre del Producto")
     brand = models.CharField(max_length=255, blank=True, null=True, verbose_name="Marca")
     description = models.TextField(blank=True, null=True, verbose_name="Descripción")
@@ -31,7 +39,13 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Precio Actual")
     original_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True, verbose_name="Precio Original (Antes)")
     image = models.ImageField(upload_to='products/', blank=True, null=True, verbose_name="Imagen Principal")
+    # Derivadas WebP/AVIF, placeholder y dimensiones (las genera images.py al subir)
+    image_meta = models.JSONField(blank=True, null=True, editable=False)
     
+    # Unidades disponibles para vender (ya descontadas las reservas de checkouts
+    # en curso). Vacío = sin control de stock. Ver stock.py
+    stock = models.PositiveIntegerField(blank=True, null=True, verbose_name="Stock disponible")
+
     # 4. Estado y Marketing
     is_active = models.BooleanField(default=True, verbose_name="¿Visible en Tienda?")
     
@@ -53,6 +67,23 @@ class Product(models.Model):
         ordering = ['-created_at']
         verbose_name = "Producto"
         verbose_name_plural = "Productos"
+        # Índices alineados con las consultas de store.views: solo productos
+        # visibles (parciales), con 'id' al final como desempate del cursor.
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(is_active=True),
+                         name='store_prod_new_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], condition=models.Q(is_active=True),
+                         name='store_prod_cat_new_idx'),
+            models.Index(fields=['price', 'id'], condition=models.Q(is_active=True),
+                         name='store_prod_price_idx'),
+            models.Index(fields=['category', 'price', 'id'], condition=models.Q(is_active=True),
+                         name='store_prod_cat_price_idx'),
+            models.Index(fields=['brand', 'price', 'id'], condition=models.Q(is_active=True),
+                         name='store_prod_brand_idx'),
+            # Facetas (GROUP BY) y DISTINCT de marcas se resuelven leyendo solo el índice
+            models.Index(fields=['is_active', 'brand', 'label', 'category', 'price'],
+                         name='store_prod_facets_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -61,6 +92,236 @@ class Product(models.Model):
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, related_name='images', on_delete=models.CASCADE)
     image = models.ImageField(upload_to='products/gallery/')
+    image_meta = models.JSONField(blank=True, null=True, editable=False)
+
+    def __str__(self):
+        return f"Imagen de {self.product.name}"
+
+# --- VERSIÓN DEL CATÁLOGO (invalidación de caché) ---
+class CatalogVersion(models.Model):
+    """
+    Fila única que sube de versión cada vez que cambia el catálogo.
+    Vive en la BD (y no en la caché) para que todos los workers de gunicorn
+    vean la misma versión aunque cada uno tenga su propia caché en memoria.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Catálogo v{self.version}"
+
+
+# --- RECOMENDACIONES PRECALCULADAS ---
+class ProductRecommendation(models.Model):
+    """Vecinos de cada producto, ya ordenados (ver recommendations.py)."""
+    product = models.ForeignKey(Product, related_name='recommendations', on_delete=models.CASCADE)
+    recommended = models.ForeignKey(Product, related_name='recommended_in', on_delete=models.CASCADE)
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['product', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'rank'], name='store_recommendation_product_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.recommended_id} (#{self.rank})"
+
+
+# --- PEDIDOS (CHECKOUT) ---
+def new_external_reference():
+    return f"DS-{uuid.uuid4().hex[:20].upper()}"
+
+
+class Order(models.Model):
+    """
+    Pedido creado al pedir el link de pago. Los precios se copian del catálogo
+    en ese momento (nunca del carrito del navegador). 'external_reference' es
+    lo que Mercado Pago nos devuelve en sus avisos para encontrar el pedido.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pendiente de pago'
+        APPROVED = 'APPROVED', 'Pagado'
+        REJECTED = 'REJECTED', 'Rechazado'
+        CANCELLED = 'CANCELLED', 'Cancelado'
+
+    external_reference = models.CharField(max_length=64, unique=True, default=new_external_reference, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='orders', on_delete=models.SET_NULL,
+                             blank=True, null=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+
+    # Datos de entrega (formulario del carrito)
+    name = models.CharField(max_length=255)
+    email = models.EmailField()
+    phone = models.CharField(max_length=30, blank=True)
+    dni = models.CharField(max_length=20, blank=True)
+    city = models.CharField(max_length=100, blank=True)
+    address = models.CharField(max_length=255, blank=True)
+    reference = models.CharField(max_length=255, blank=True, verbose_name="Referencia de la dirección")
+
+    coupon = models.CharField(max_length=30, blank=True)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2)
+    discount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total = models.DecimalField(max_digits=12, decimal_places=2)
+
+    # Respuesta de Mercado Pago
+    preference_id = models.CharField(max_length=100, blank=True)
+    init_point = models.URLField(max_length=500, blank=True)
+    payment_id = models.CharField(max_length=50, blank=True)  # último pago informado por el webhook
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Pedido"
+        verbose_name_plural = "Pedidos"
+
+    def __str__(self):
+        return self.external_reference
+
+
+class OrderItem(models.Model):
+    order = models.ForeignKey(Order, related_name='items', on_delete=models.CASCADE)
+    # Si el producto se borra, el pedido conserva título y precio
+    product = models.ForeignKey(Product, related_name='order_items', on_delete=models.SET_NULL, null=True)
+    title = models.CharField(max_length=255)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.quantity} x {self.title}"
+
+
+# --- AVISOS DE PAGO (WEBHOOK) ---
+class PaymentEvent(models.Model):
+    """
+    Cola durable de avisos de Mercado Pago. El webhook solo inserta aquí y
+    responde; el comando process_payment_events los aplica a los pedidos.
+    'event_id' es único: un reintento de MP con el mismo aviso no se encola dos veces.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pendiente'
+        PROCESSING = 'PROCESSING', 'Procesando'
+        DONE = 'DONE', 'Procesado'
+        FAILED = 'FAILED', 'Fallido'
+
+    event_id = models.CharField(max_length=100, unique=True)
+    topic = models.CharField(max_length=50)
+    resource_id = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)  # no se reintenta antes de esto
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['received_at']
+        verbose_name = "Aviso de pago"
+        verbose_name_plural = "Avisos de pago"
+        indexes = [
+            # Lo que lee el worker: pendientes por orden de llegada
+            models.Index(fields=['available_at', 'id'], condition=models.Q(status='PENDING'),
+                         name='store_payevent_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} {self.resource_id} ({self.event_id})"
+
+
+# --- RESERVAS DE STOCK (CHECKOUT) ---
+class StockReservation(models.Model):
+    """
+    Unidades apartadas por un pedido mientras se paga. El stock ya se descontó
+    de Product.stock al reservar; al confirmarse el pago la reserva se
+    consolida y si el pago falla o vence se devuelve (ver stock.py).
+    """
+    class Status(models.TextChoices):
+        ACTIVE = 'ACTIVE', 'Reservado'
+        COMMITTED = 'COMMITTED', 'Vendido'
+        RELEASED = 'RELEASED', 'Liberado'
+
+    order = models.ForeignKey(Order, related_name='reservations', on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, related_name='reservations', on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.ACTIVE)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Reserva de stock"
+        verbose_name_plural = "Reservas de stock"
+        indexes = [
+            # Lo que barre release_expired: reservas activas ya vencidas
+            models.Index(fields=['expires_at'], condition=models.Q(status='ACTIVE'),
+                         name='store_reservation_active_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} ({self.order_id})"
+
+
+# --- CAMPAÑAS DE PRECIOS ---
+class PriceCampaign(models.Model):
+    """
+    Descuento por regla (categoría y/o marca) que se aplica y se revierte solo
+    en las fechas indicadas, con UPDATEs sobre el conjunto (ver campaigns.py).
+    """
+    class Status(models.TextChoices):
+        SCHEDULED = 'SCHEDULED', 'Programada'
+        ACTIVE = 'ACTIVE', 'Activa'
+        ENDED = 'ENDED', 'Terminada'
+        CANCELLED = 'CANCELLED', 'Cancelada'
+
+    LABELS = [(value, name) for value, name in Product.Label.choices
+              if value in (Product.Label.BLACK_FRIDAY, Product.Label.OFFER, Product.Label.LIQUIDATION)]
+
+    name = models.CharField(max_length=255, verbose_name="Nombre")
+    # Regla: sin categoría ni marca la campaña alcanza a todo el catálogo
+    category = models.ForeignKey(Category, related_name='campaigns', on_delete=models.PROTECT,
+                                 blank=True, null=True, verbose_name="Categoría")
+    brand = models.CharField(max_length=255, blank=True, verbose_name="Marca")
+    percent_off = models.DecimalField(max_digits=5, decimal_places=2, verbose_name="% de descuento",
+                                      validators=[MinValueValidator(1), MaxValueValidator(90)])
+    label = models.CharField(max_length=4, choices=LABELS, default=Product.Label.OFFER,
+                             verbose_name="Etiqueta de Marketing")
+    starts_at = models.DateTimeField(verbose_name="Empieza")
+    ends_at = models.DateTimeField(blank=True, null=True, verbose_name="Termina")
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.SCHEDULED)
+    products_count = models.PositiveIntegerField(default=0, verbose_name="Productos")
+    applied_at = models.DateTimeField(blank=True, null=True)
+    reverted_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-starts_at']
+        verbose_name = "Campaña de precios"
+        verbose_name_plural = "Campañas de precios"
+
+    def clean(self):
+        if self.ends_at and self.starts_at and self.ends_at <= self.starts_at:
+            raise ValidationError({'ends_at': "Tiene que terminar después de empezar."})
+
+    def __str__(self):
+        return self.name
+
+
+class PriceCampaignItem(models.Model):
+    """Precio y etiqueta de cada producto antes de la campaña: lo que se restaura al revertir."""
+    campaign = models.ForeignKey(PriceCampaign, related_name='items', on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, related_name='campaign_items', on_delete=models.CASCADE)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    original_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    label = models.CharField(max_length=4)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'product'], name='store_campaign_item_unique'),
+        ]
 
     def __str__(self):
-        return f"Imagen de {self.product.name}"
\ No newline at end of file
+        return f"{self.campaign_id}: {self.product_id}"
@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ==========================================
+# DOBLE LOCAL DE LA API DE MERCADO PAGO
+# ==========================================
+# Servidor HTTP mínimo que imita POST /checkout/preferences. Lo usan los tests
+# y las pruebas de carga (MP_API_URL=http://127.0.0.1:<puerto>) para no
+# depender de la red ni de credenciales reales.
+# También GET /v1/payments/<id>, con los pagos que el test cargue en 'payments'.
+#   delay:  segundos de latencia añadida a cada respuesta
+#   status: código HTTP a devolver (201 = éxito)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        standin = self.server.standin
+        status, delay = standin.status, standin.delay  # la configuración vigente al llegar
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        payload = json.loads(body or b'{}')
+        standin.record(self.path, dict(self.headers), payload)
+        if delay:
+            time.sleep(delay)
+
+        if self.path.split('?')[0] != '/checkout/preferences':
+            return self._reply(404, {'message': 'not found'})
+        if status >= 400:
+            return self._reply(status, {'message': 'invalid request', 'status': status})
+        preference_id = f'standin-{uuid.uuid4().hex[:12]}'
+        self._reply(status, {
+            'id': preference_id,
+            'external_reference': payload.get('external_reference'),
+            'items': payload.get('items', []),
+            'init_point': f'https://www.mercadopago.com/checkout/v1/redirect?pref_id={preference_id}',
+        })
+
+    def do_GET(self):
+        standin = self.server.standin
+        standin.record(self.path, dict(self.headers), None)
+        if standin.delay:
+            time.sleep(standin.delay)
+        prefix = '/v1/payments/'
+        payment = standin.payments.get(self.path[len(prefix):]) if self.path.startswith(prefix) else None
+        if payment is None:
+            return self._reply(404, {'message': 'Payment not found', 'status': 404})
+        self._reply(200, payment)
+
+    def _reply(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass  # el cliente se cansó de esperar (timeout): no es un error del doble
+
+
+class MercadoPagoStandIn:
+    def __init__(self, host='127.0.0.1', port=0, delay=0.0, status=201):
+        self.delay = delay
+        self.status = status
+        self.requests = []
+        self.payments = {}  # id (str) -> {'id', 'status', 'external_reference', ...}
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _Handler)
+        self._server.standin = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def record(self, path, headers, payload):
+        with self._lock:
+            self.requests.append({'path': path, 'headers': headers, 'json': payload})
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
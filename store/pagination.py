@@ -0,0 +1,180 @@
+import base64
+import json
+import math
+from decimal import Decimal, InvalidOperation
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.dateparse import parse_datetime
+
+# ==========================================
+# PAGINACIÓN POR CURSOR (KEYSET)
+# ==========================================
+# En vez de OFFSET (que obliga a la BD a recorrer todas las filas anteriores),
+# el cursor guarda el último valor visto + su id como desempate. La página
+# siguiente es un simple "WHERE (campo, id) > (valor, id)" sobre el índice,
+# así que la página 1000 cuesta lo mismo que la página 1.
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+# ordering (parámetro del frontend) -> (campo, descendente)
+ORDERINGS = {
+    'newest': ('created_at', True),
+    'min_price': ('price', False),
+    'max_price': ('price', True),
+    'relevance': ('search_rank', False),  # solo con ?search= (ver search.py)
+}
+DEFAULT_ORDERING = 'newest'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _dump_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def _load_value(field, raw):
+    if field == 'created_at':
+        value = parse_datetime(raw)
+        if value is None:
+            raise InvalidCursor(raw)
+        return value
+    if field == 'search_rank':
+        try:
+            value = float(raw)
+        except ValueError:
+            raise InvalidCursor(raw)
+        if not math.isfinite(value):
+            raise InvalidCursor(raw)
+        return value
+    try:
+        value = Decimal(raw)
+    except InvalidOperation:
+        raise InvalidCursor(raw)
+    # 'NaN' e 'Infinity' son Decimal válidos pero no son precios
+    if not value.is_finite():
+        raise InvalidCursor(raw)
+    return value
+
+
+def encode_cursor(value, pk):
+    payload = json.dumps([_dump_value(value), pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(field, cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return _load_value(field, raw), int(pk)
+    except (ValueError, TypeError, OverflowError):
+        raise InvalidCursor(cursor)
+
+
+def parse_limit(raw):
+    """Tamaño de página acotado: nunca más de MAX_PAGE_SIZE filas por petición."""
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+class KeysetPage:
+    """
+    Ordena el queryset con desempate estable por 'id' y corta una página.
+    Lanza InvalidCursor si el cursor del cliente está corrupto.
+    """
+
+    def __init__(self, queryset, ordering=None, cursor=None, limit=None):
+        if ordering not in ORDERINGS:
+            ordering = DEFAULT_ORDERING
+        self.field, self.descending = ORDERINGS[ordering]
+        self.limit = parse_limit(limit)
+
+        prefix = '-' if self.descending else ''
+        queryset = queryset.order_by(f'{prefix}{self.field}', f'{prefix}id')
+
+        if cursor:
+            value, pk = decode_cursor(self.field, cursor)
+            op = 'lt' if self.descending else 'gt'
+            # (campo >= valor) es redundante pero le da al planificador el inicio
+            # del rango en el índice; sin él, el OR obliga a recorrer desde el principio.
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__{op}e': value}),
+                Q(**{f'{self.field}__{op}': value}) | Q(**{f'id__{op}': pk}),
+            )
+
+        # Pedimos una fila extra para saber si existe página siguiente sin COUNT(*)
+        rows = list(queryset[:self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        self.object_list = rows[:self.limit]
+
+    @property
+    def next_cursor(self):
+        if not self.has_next:
+            return None
+        last = self.object_list[-1]
+        # Las filas pueden ser instancias o dicts de .values() (ver fast.py)
+        if isinstance(last, dict):
+            return encode_cursor(last[self.field], last['id'])
+        return encode_cursor(getattr(last, self.field), last.pk)
+
+    def apply_headers(self, request, response):
+        """
+        El cuerpo sigue siendo una lista (compatibilidad con el frontend);
+        el cursor viaja en cabeceras.
+        """
+        cursor = self.next_cursor
+        if cursor:
+            params = request.GET.copy()
+            params['cursor'] = cursor
+            response['X-Next-Cursor'] = cursor
+            response['Link'] = f'<{request.build_absolute_uri(request.path)}?{params.urlencode()}>; rel="next"'
+        return response
+
+
+# ==========================================
+# CONTEO ESTIMADO (ADMIN)
+# ==========================================
+# El paginador del admin hace COUNT(*) de toda la tabla en cada carga del
+# listado. Sin filtros, en tablas grandes alcanza con una estimación: en
+# Postgres la de las estadísticas del planificador (pg_class.reltuples), en
+# otras bases el mayor id (lectura del extremo del índice de la PK).
+
+ESTIMATE_THRESHOLD = 10_000  # por debajo de esto el COUNT(*) exacto es barato
+
+
+def estimated_count(model, using='default'):
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+        else:
+            pk = model._meta.pk.column
+            cursor.execute(f"SELECT MAX({connection.ops.quote_name(pk)}) FROM {connection.ops.quote_name(table)}")
+        row = cursor.fetchone()
+    return max(int(row[0] or 0), 0) if row else 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator que, sin filtros y con muchas filas, usa estimated_count() en vez de COUNT(*)."""
+
+    threshold = ESTIMATE_THRESHOLD
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if hasattr(queryset, 'query') and not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate >= self.threshold:
+                return estimate
+        return super().count
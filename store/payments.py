@@ -0,0 +1,165 @@
+import hashlib
+import hmac
+import logging
+from collections import namedtuple
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import stock
+from .checkout import get_sdk, request_options
+from .models import Order, PaymentEvent, StockReservation
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# AVISOS DE PAGO (WEBHOOK DE MERCADO PAGO)
+# ==========================================
+# 1. El webhook valida la firma, inserta el aviso en PaymentEvent (event_id
+#    único: los reintentos de MP no duplican nada) y responde enseguida.
+# 2. El comando process_payment_events reclama avisos pendientes con un
+#    UPDATE condicional (varios workers no procesan el mismo), consulta el
+#    pago en MP y mueve el pedido de estado con otro UPDATE condicional, así
+#    que reprocesar un aviso nunca aplica dos veces la misma transición.
+#    Con la transición se confirma o se devuelve el stock reservado.
+
+MAX_ATTEMPTS = 8
+LEASE = timedelta(minutes=5)   # si un worker muere procesando, el aviso vuelve a la cola
+BACKOFF = timedelta(seconds=15)
+
+# estado del pago en MP -> (estado del pedido, estados desde los que se puede llegar)
+TRANSITIONS = {
+    'approved': (Order.Status.APPROVED, [Order.Status.PENDING, Order.Status.REJECTED]),
+    'rejected': (Order.Status.REJECTED, [Order.Status.PENDING]),
+    'cancelled': (Order.Status.CANCELLED, [Order.Status.PENDING, Order.Status.REJECTED]),
+    'refunded': (Order.Status.CANCELLED, [Order.Status.APPROVED]),
+    'charged_back': (Order.Status.CANCELLED, [Order.Status.APPROVED]),
+}
+
+Notification = namedtuple('Notification', 'event_id topic resource_id')
+
+
+class PaymentError(Exception):
+    pass
+
+
+# --- 1. ENTRADA ---
+def parse_notification(query, body):
+    """
+    Acepta el formato actual (JSON con 'type', 'data.id' e 'id' del aviso) y el
+    IPN antiguo (?topic=payment&id=123). Devuelve Notification o None.
+    """
+    topic = body.get('type') or body.get('topic') or query.get('type') or query.get('topic')
+    data = body.get('data')
+    if not isinstance(data, dict):
+        data = {}  # JSON válido pero con otra forma: se trata como aviso sin data.id
+    resource_id = data.get('id') or query.get('data.id') or query.get('id')
+    if not topic or not resource_id:
+        return None
+    resource_id = str(resource_id)
+    # Sin id de aviso (IPN), el mismo recurso+acción cuenta como el mismo aviso
+    event_id = str(body.get('id') or f"{topic}:{resource_id}:{body.get('action', '')}")
+    return Notification(event_id, str(topic), resource_id)
+
+
+def verify_signature(request, resource_id):
+    """Firma x-signature de MP (HMAC-SHA256). Sin secreto configurado no se valida."""
+    secret = settings.MERCADOPAGO_WEBHOOK_SECRET
+    if not secret:
+        return True
+    parts = dict(part.strip().split('=', 1) for part in request.headers.get('x-signature', '').split(',') if '=' in part)
+    if 'ts' not in parts or 'v1' not in parts:
+        return False
+    data_id = request.GET.get('data.id', resource_id)
+    manifest = f"id:{data_id.lower()};request-id:{request.headers.get('x-request-id', '')};ts:{parts['ts']};"
+    expected = hmac.new(secret.encode(), manifest.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, parts['v1'])
+
+
+def enqueue(notification, payload):
+    """Un solo INSERT; si el aviso ya estaba encolado no hace nada."""
+    PaymentEvent.objects.bulk_create([
+        PaymentEvent(event_id=notification.event_id, topic=notification.topic,
+                     resource_id=notification.resource_id, payload=payload)
+    ], ignore_conflicts=True)
+
+
+# --- 2. WORKER ---
+def fetch_payment(payment_id):
+    try:
+        result = get_sdk().payment().get(payment_id, request_options())
+    except requests.RequestException as exc:
+        raise PaymentError(f"Mercado Pago no respondió: {exc}")
+    if result.get('status') != 200 or not result.get('response'):
+        raise PaymentError(f"Pago {payment_id}: status {result.get('status')}")
+    return result['response']
+
+
+def apply_payment(payment):
+    """Mueve el pedido del pago a su nuevo estado. Devuelve True si cambió algo."""
+    reference, status = payment.get('external_reference'), payment.get('status')
+    if not reference or status not in TRANSITIONS:
+        return False  # pending / in_process / authorized: el pedido sigue pendiente
+    new_status, allowed = TRANSITIONS[status]
+    order_id = Order.objects.filter(external_reference=reference).values_list('pk', flat=True).first()
+    if order_id is None:
+        return False
+    with transaction.atomic():
+        changed = (Order.objects
+                   .filter(pk=order_id, status__in=allowed)
+                   .update(status=new_status, payment_id=str(payment.get('id', '')), updated_at=timezone.now()))
+        if not changed:
+            return False
+        if new_status == Order.Status.APPROVED:
+            stock.commit(order_id)
+        else:
+            stock.release(order_id, statuses=(StockReservation.Status.ACTIVE, StockReservation.Status.COMMITTED))
+    logger.info("Pedido %s -> %s (pago %s)", reference, new_status, payment.get('id'))
+    return True
+
+
+def claim(batch_size):
+    """Reclama hasta batch_size avisos pendientes para este worker."""
+    now = timezone.now()
+    # Avisos de un worker caído: su lease venció, vuelven a la cola
+    PaymentEvent.objects.filter(status=PaymentEvent.Status.PROCESSING, available_at__lte=now).update(
+        status=PaymentEvent.Status.PENDING)
+    candidates = (PaymentEvent.objects
+                  .filter(status=PaymentEvent.Status.PENDING, available_at__lte=now)
+                  .order_by('available_at', 'id').values_list('id', flat=True)[:batch_size])
+    claimed = []
+    for pk in candidates:
+        won = PaymentEvent.objects.filter(pk=pk, status=PaymentEvent.Status.PENDING).update(
+            status=PaymentEvent.Status.PROCESSING, attempts=F('attempts') + 1, available_at=now + LEASE)
+        if won:
+            claimed.append(pk)
+    return list(PaymentEvent.objects.filter(pk__in=claimed).order_by('available_at', 'id'))
+
+
+def process_pending(batch_size=50):
+    """Procesa un lote. Devuelve cuántos avisos se reclamaron."""
+    events = claim(batch_size)
+    fetched = {}  # en una ráfaga llegan varios avisos del mismo pago: una consulta por lote
+    for event in events:
+        try:
+            # merchant_order y otros temas no cambian el pedido: se marcan como procesados
+            if event.topic == 'payment':
+                if event.resource_id not in fetched:
+                    fetched[event.resource_id] = fetch_payment(event.resource_id)
+                apply_payment(fetched[event.resource_id])
+        except Exception as exc:
+            failed = event.attempts >= MAX_ATTEMPTS
+            logger.warning("Aviso %s falló (intento %s): %s", event.event_id, event.attempts, exc)
+            PaymentEvent.objects.filter(pk=event.pk).update(
+                status=PaymentEvent.Status.FAILED if failed else PaymentEvent.Status.PENDING,
+                available_at=timezone.now() + BACKOFF * 2 ** (event.attempts - 1),
+                last_error=str(exc)[:2000],
+            )
+        else:
+            PaymentEvent.objects.filter(pk=event.pk).update(
+                status=PaymentEvent.Status.DONE, processed_at=timezone.now(), last_error='')
+    return len(events)
@@ -0,0 +1,64 @@
+from django.db.models import Prefetch
+
+from .models import ProductImage
+
+# ==========================================
+# PLANES DE CONSULTA POR SERIALIZADOR
+# ==========================================
+# Cada serializador declara qué columnas y relaciones necesita cada uno de sus
+# campos. Las vistas aplican el plan al queryset y así el número de queries de
+# un listado no depende de cuántos productos devuelve (nada de N+1).
+
+
+class QueryPlan:
+    def __init__(self, columns, prefetch=None, select=None):
+        self.columns = columns            # campo del serializador -> columnas del modelo
+        self.prefetch = prefetch or {}    # campo del serializador -> Prefetch
+        self.select = select or {}        # campo del serializador -> ruta para select_related
+
+    def apply(self, queryset, fields=None, extra_columns=()):
+        """
+        fields: campos pedidos (None = todos). extra_columns: columnas que la vista
+        necesita aunque no se serialicen (p. ej. la clave del cursor).
+        """
+        if fields is None:
+            fields = list(self.columns) + list(self.prefetch) + list(self.select)
+
+        only = {'id', *extra_columns}
+        for name in fields:
+            only.update(self.columns.get(name, ()))
+
+        selects = [self.select[name] for name in fields if name in self.select]
+        for path in selects:
+            only.add(path)
+
+        prefetches = [self.prefetch[name] for name in fields if name in self.prefetch]
+
+        queryset = queryset.only(*only)
+        if selects:
+            queryset = queryset.select_related(*selects)
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+        return queryset
+
+
+PRODUCT_PLAN = QueryPlan(
+    columns={
+        'id': ('id',),
+        'name': ('name',),
+        'brand': ('brand',),
+        'image': ('image',),
+        'image_srcset': ('image', 'image_meta'),
+        'description': ('description',),
+        'price': ('price',),
+        'original_price': ('original_price',),
+        'category': ('category_id',),
+        'is_active': ('is_active',),
+        'is_black_friday': ('is_black_friday',),
+        'label': ('label',),
+        'label_display': ('label',),
+    },
+    prefetch={
+        'images': Prefetch('images', queryset=ProductImage.objects.only('id', 'image', 'image_meta', 'product_id').order_by('product_id', 'id')),
+    },
+)
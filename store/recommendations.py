@@ -0,0 +1,203 @@
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from itertools import combinations
+
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from .models import Order, OrderItem, Product, ProductRecommendation
+
+# ==========================================
+# RECOMENDADOR PRECALCULADO
+# ==========================================
+# Para cada producto guardamos sus TOP_N vecinos en ProductRecommendation, así
+# /api/recommendations/<pk>/ es una sola lectura por índice.
+# Candidatos: los WINDOW productos de precio más cercano dentro de la misma
+# categoría y dentro de la misma marca (evita comparar todo con todo).
+# Puntaje: categoría + marca + cercanía de precio + etiqueta + co-compras.
+
+TOP_N = 8
+WINDOW = 50
+MAX_CART_SUGGESTIONS = 12
+
+WEIGHTS = {
+    'category': 3.0,
+    'brand': 2.0,
+    'price': 2.0,
+    'label': 1.0,
+    'co_purchase': 4.0,
+}
+
+FIELDS = ('id', 'category_id', 'brand', 'price', 'label')
+
+
+def score(a, b, co_purchase=0.0):
+    """a y b son dicts con FIELDS. co_purchase ya normalizado a [0, 1]."""
+    total = 0.0
+    if a['category_id'] == b['category_id']:
+        total += WEIGHTS['category']
+    if a['brand'] and a['brand'] == b['brand']:
+        total += WEIGHTS['brand']
+    price_a, price_b = float(a['price']), float(b['price'])
+    high = max(price_a, price_b)
+    if high:
+        total += WEIGHTS['price'] * (1 - abs(price_a - price_b) / high)
+    if a['label'] != Product.Label.NONE and a['label'] == b['label']:
+        total += WEIGHTS['label']
+    return total + WEIGHTS['co_purchase'] * co_purchase
+
+
+def co_purchase_counts(carts):
+    """carts: iterable de listas de ids comprados juntos -> {(a, b): veces}"""
+    counts = Counter()
+    for cart in carts:
+        for a, b in combinations(sorted(set(cart)), 2):
+            counts[a, b] += 1
+    return counts
+
+
+def _nearest_by_price(group, price, window):
+    """group: lista de (precio, id) ordenada. Devuelve los 'window' ids más cercanos."""
+    center = bisect_left(group, (price, 0))
+    lo, hi = max(0, center - window // 2), min(len(group), center + window // 2 + 1)
+    return [pk for _, pk in group[lo:hi]]
+
+
+def build_neighbors(rows, carts=(), top_n=TOP_N, window=WINDOW, targets=None):
+    """
+    rows: dicts con FIELDS de productos activos -> {id: [(id_vecino, puntaje), ...]}
+    targets: ids para los que calcular vecinos (None = todos).
+    """
+    by_id = {row['id']: row for row in rows}
+    by_category, by_brand = defaultdict(list), defaultdict(list)
+    for row in rows:
+        by_category[row['category_id']].append((row['price'], row['id']))
+        if row['brand']:
+            by_brand[row['brand']].append((row['price'], row['id']))
+    for group in (*by_category.values(), *by_brand.values()):
+        group.sort()
+
+    pairs = co_purchase_counts(carts)
+    top_pair = max(pairs.values(), default=0)
+    bought_with = defaultdict(set)
+    for a, b in pairs:
+        bought_with[a].add(b)
+        bought_with[b].add(a)
+
+    neighbors = {}
+    for row in rows:
+        if targets is not None and row['id'] not in targets:
+            continue
+        candidates = set(_nearest_by_price(by_category[row['category_id']], row['price'], window))
+        if row['brand']:
+            candidates.update(_nearest_by_price(by_brand[row['brand']], row['price'], window))
+        candidates.update(pk for pk in bought_with[row['id']] if pk in by_id)
+        candidates.discard(row['id'])
+
+        scored = []
+        for pk in candidates:
+            pair = (min(row['id'], pk), max(row['id'], pk))
+            co = pairs[pair] / top_pair if top_pair else 0.0
+            scored.append((score(row, by_id[pk], co), pk))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        neighbors[row['id']] = [(pk, value) for value, pk in scored[:top_n]]
+    return neighbors
+
+
+def order_carts():
+    """Productos comprados juntos en cada pedido pagado -> carts para co_purchase_counts."""
+    carts = defaultdict(list)
+    paid = (OrderItem.objects
+            .filter(order__status=Order.Status.APPROVED, product__isnull=False)
+            .values_list('order_id', 'product_id'))
+    for order_id, product_id in paid.iterator():
+        carts[order_id].append(product_id)
+    return list(carts.values())
+
+
+def _save(neighbors):
+    ProductRecommendation.objects.bulk_create(
+        [ProductRecommendation(product_id=pk, recommended_id=other, rank=rank, score=value)
+         for pk, items in neighbors.items()
+         for rank, (other, value) in enumerate(items)],
+        batch_size=5000,
+    )
+
+
+def rebuild(carts=()):
+    """Recalcula toda la tabla (comando rebuild_recommendations). Devuelve nº de productos."""
+    rows = list(Product.objects.filter(is_active=True).values(*FIELDS))
+    neighbors = build_neighbors(rows, carts=carts)
+    with transaction.atomic():
+        ProductRecommendation.objects.all().delete()
+        _save(neighbors)
+    return len(neighbors)
+
+
+def refresh_product(product, window=WINDOW):
+    """
+    Recalcula solo los vecinos de 'product' (al guardarlo en el admin).
+    Los demás productos lo verán como vecino en el siguiente rebuild.
+    """
+    if not product.is_active:
+        ProductRecommendation.objects.filter(product=product).delete()
+        return
+    active = Product.objects.filter(is_active=True).exclude(pk=product.pk)
+    half = window // 2
+    candidates = []
+    groups = [active.filter(category_id=product.category_id)]
+    if product.brand:
+        groups.append(active.filter(brand=product.brand))
+    for group in groups:
+        candidates += group.filter(price__gte=product.price).order_by('price').values(*FIELDS)[:half]
+        candidates += group.filter(price__lt=product.price).order_by('-price').values(*FIELDS)[:half]
+
+    rows = {row['id']: row for row in candidates}
+    rows[product.pk] = {field: getattr(product, field) for field in FIELDS}
+    neighbors = build_neighbors(list(rows.values()), window=len(rows), targets={product.pk})
+    with transaction.atomic():
+        ProductRecommendation.objects.filter(product=product).delete()
+        _save({product.pk: neighbors[product.pk]})
+
+
+def same_category(pk):
+    """
+    Respaldo para productos sin vecinos precalculados (p. ej. una base que aún
+    no corrió rebuild_recommendations): los activos de su misma categoría.
+    """
+    category = Product.objects.filter(pk=pk).values('category_id')
+    return (Product.objects.filter(is_active=True, category_id__in=category)
+            .exclude(pk=pk).order_by('-created_at', '-id'))
+
+
+def for_cart(cart_ids, limit):
+    """
+    Sugerencias para un carrito: suma los puntajes de los vecinos precalculados
+    de cada producto del carrito (sin repetir lo que ya está en él). Si no
+    alcanza, completa con productos de las mismas categorías/marcas y, con el
+    carrito vacío, con las novedades. Devuelve ids ordenados (a lo sumo 'limit').
+    """
+    limit = max(1, min(limit, MAX_CART_SUGGESTIONS))
+    cart_ids = set(cart_ids)
+
+    found = list(
+        ProductRecommendation.objects
+        .filter(product_id__in=cart_ids, recommended__is_active=True)
+        .exclude(recommended_id__in=cart_ids)
+        .values('recommended_id')
+        .annotate(total=Sum('score'))
+        .order_by('-total', 'recommended_id')
+        .values_list('recommended_id', flat=True)[:limit]
+    ) if cart_ids else []
+    if len(found) >= limit:
+        return found
+
+    fallback = Product.objects.filter(is_active=True).exclude(id__in=cart_ids | set(found))
+    if cart_ids:
+        related = Product.objects.filter(id__in=cart_ids)
+        fallback = fallback.filter(
+            Q(category_id__in=related.values('category_id'))
+            | Q(brand__in=related.exclude(brand=None).values('brand'))
+        )
+    found += fallback.order_by('-created_at', '-id').values_list('id', flat=True)[:limit - len(found)]
+    return found
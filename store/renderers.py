@@ -0,0 +1,31 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .metrics import timed
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él usamos el renderer normal de DRF
+    orjson = None
+
+# ==========================================
+# RENDERER JSON RÁPIDO
+# ==========================================
+# Mismos bytes que JSONRenderer de DRF (compacto, UTF-8 sin escapar, U+2028/2029
+# escapados) pero serializando con orjson. Los tipos que orjson no conoce o
+# formatea distinto (Decimal, fechas, lazy strings...) pasan por el encoder de DRF.
+
+_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+
+class FastJSONRenderer(JSONRenderer):
+    @timed('render')
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=JSONEncoder().default, option=_OPTIONS)
+        except TypeError:
+            # Claves no-str, floats fuera de rango, etc.: que decida DRF
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
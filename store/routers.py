@@ -0,0 +1,61 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+# ==========================================
+# RÉPLICAS DE LECTURA
+# ==========================================
+# Las escrituras (y las lecturas fuera de read_replica()) van siempre a la
+# principal. cached_catalog_view abre read_replica() al calcular una respuesta
+# que no estaba en caché: las lecturas de los modelos de store de esa petición
+# van a una réplica elegida al azar, la misma para toda la petición. El
+# login, el registro, el checkout y los pedidos nunca leen de una réplica.
+# Si el catálogo cambió hace menos de DATABASE_REPLICA_LAG segundos se lee de
+# la principal: la versión sale de la principal y una réplica atrasada
+# dejaría datos viejos cacheados bajo la versión nueva.
+
+_replica = ContextVar('read_replica', default=None)
+
+
+def choose_replica(last_modified=None):
+    """Alias de la réplica para esta petición, o None para leer de la principal."""
+    replicas = settings.DATABASE_REPLICAS
+    if not replicas:
+        return None
+    if last_modified and timezone.now() - last_modified < timedelta(seconds=settings.DATABASE_REPLICA_LAG):
+        return None
+    return random.choice(replicas)
+
+
+@contextmanager
+def read_replica(last_modified=None):
+    """Solo para código de solo lectura (vistas de catálogo)."""
+    token = _replica.set(choose_replica(last_modified))
+    try:
+        yield _replica.get()
+    finally:
+        _replica.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        if alias is None or model._meta.app_label != 'store':
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        # Aunque la instancia se haya leído de una réplica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # las réplicas son copias de la principal
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # El esquema llega a las réplicas por la replicación (o sync_sqlite_replicas)
+        return False if db in settings.DATABASE_REPLICAS else None
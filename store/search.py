@@ -0,0 +1,178 @@
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+# ==========================================
+# BÚSQUEDA DE TEXTO COMPLETO
+# ==========================================
+# Índice invertido sobre nombre/marca/descripción, en una tabla aparte con la
+# misma clave que store_product:
+#   - SQLite (local): tabla virtual FTS5 'store_product_fts'.
+#   - Postgres: tabla 'store_product_search' con un tsvector + índice GIN.
+# El texto se guarda "plegado" (minúsculas, sin tildes) para que "camion"
+# encuentre "camión". Cada palabra de la consulta se busca por prefijo
+# (búsqueda mientras se escribe) y el ranking pesa nombre > marca > descripción.
+# El índice se mantiene en cada save/delete de Product (ver signals.py).
+
+SEARCH_WEIGHTS = (10.0, 4.0, 1.0)  # nombre, marca, descripción
+
+
+def fold(text):
+    """'Camión ÑANDÚ' -> 'camion nandu'"""
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def tokenize(query):
+    return re.findall(r'\w+', fold(query))
+
+
+def _document(product):
+    return fold(product.name), fold(product.brand), fold(product.description)
+
+
+class SQLiteSearchBackend:
+    table = 'store_product_fts'
+
+    def create(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+            "USING fts5(name, brand, description, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+    def drop(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def index(self, cursor, products):
+        rows = [(p.pk, *_document(p)) for p in products]
+        cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {self.table} (rowid, name, brand, description) VALUES (%s, %s, %s, %s)", rows
+        )
+
+    def remove(self, cursor, pk):
+        cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [pk])
+
+    def query(self, tokens):
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def match_sql(self):
+        return f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s"
+
+    def rank_sql(self):
+        # bm25: menor = más relevante
+        weights = ', '.join(str(w) for w in SEARCH_WEIGHTS)
+        return (f"(SELECT bm25({self.table}, {weights}) FROM {self.table} "
+                f"WHERE {self.table} MATCH %s AND rowid = store_product.id)")
+
+
+class PostgresSearchBackend:
+    table = 'store_product_search'
+    vector = ("setweight(to_tsvector('simple', %s), 'A') || "
+              "setweight(to_tsvector('simple', %s), 'B') || "
+              "setweight(to_tsvector('simple', %s), 'C')")
+
+    def create(self, cursor):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "product_id bigint PRIMARY KEY REFERENCES store_product(id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)"
+        )
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_gin ON {self.table} USING GIN (document)")
+
+    def drop(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def index(self, cursor, products):
+        cursor.executemany(
+            f"INSERT INTO {self.table} (product_id, document) VALUES (%s, {self.vector}) "
+            "ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document",
+            [(p.pk, *_document(p)) for p in products],
+        )
+
+    def remove(self, cursor, pk):
+        cursor.execute(f"DELETE FROM {self.table} WHERE product_id = %s", [pk])
+
+    def query(self, tokens):
+        return ' & '.join(f'{token}:*' for token in tokens)
+
+    def match_sql(self):
+        return f"SELECT product_id FROM {self.table} WHERE document @@ to_tsquery('simple', %s)"
+
+    def rank_sql(self):
+        # Negamos ts_rank para que, igual que en SQLite, menor = más relevante
+        # Orden de pesos en ts_rank: {D, C, B, A}
+        return (f"(SELECT -ts_rank('{{0.1, 0.1, 0.4, 1.0}}', document, to_tsquery('simple', %s)) "
+                f"FROM {self.table} WHERE product_id = store_product.id)")
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend(),
+    'postgresql': PostgresSearchBackend(),
+}
+
+
+def get_backend(conn=None):
+    return BACKENDS.get((conn or connection).vendor)
+
+
+# --- MANTENIMIENTO DEL ÍNDICE ---
+
+def index_products(products, conn=None):
+    backend = get_backend(conn)
+    if backend and products:
+        with (conn or connection).cursor() as cursor:
+            backend.index(cursor, products)
+
+
+def remove_product(pk, conn=None):
+    backend = get_backend(conn)
+    if backend:
+        with (conn or connection).cursor() as cursor:
+            backend.remove(cursor, pk)
+
+
+def rebuild_index(queryset, batch_size=2000):
+    """Reindexa en lotes (tras bulk_create/importaciones, que no disparan señales)."""
+    total = 0
+    queryset = queryset.only('id', 'name', 'brand', 'description').order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return total
+        index_products(batch)
+        total += len(batch)
+        last_pk = batch[-1].pk
+
+
+# --- CONSULTA ---
+
+def search_products(queryset, query, rank=True):
+    """
+    Filtra 'queryset' por la búsqueda y, si rank=True, anota 'search_rank'
+    (menor = más relevante). En motores sin backend de texto completo cae a
+    icontains sobre los tres campos.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return queryset
+
+    backend = get_backend()
+    if backend is None:
+        condition = Q()
+        for token in tokens:
+            condition &= Q(name__icontains=token) | Q(brand__icontains=token) | Q(description__icontains=token)
+        queryset = queryset.filter(condition)
+        return queryset.annotate(search_rank=RawSQL('0', [], output_field=FloatField())) if rank else queryset
+
+    expression = backend.query(tokens)
+    queryset = queryset.filter(id__in=RawSQL(backend.match_sql(), [expression]))
+    if rank:
+        queryset = queryset.annotate(search_rank=RawSQL(backend.rank_sql(), [expression], output_field=FloatField()))
+    return queryset
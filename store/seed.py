@@ -0,0 +1,49 @@
+import random
+from decimal import Decimal
+
+from .models import Category, Product, ProductImage
+
+# ==========================================
+# DATOS SINTÉTICOS PARA BENCHMARKS
+# ==========================================
+# Genera un catálogo falso (reproducible con 'seed') usando bulk_create.
+# Solo se debe usar contra una BD de pruebas, nunca contra la de producción.
+# Las imágenes son rutas ficticias: alcanzan para armar URLs, no hay archivos.
+
+BRANDS = ['Apple', 'Samsung', 'Xiaomi', 'Sony', 'Lenovo', 'HP', 'Huawei', 'Motorola', 'LG', 'Asus']
+CATEGORIES = ['Celulares', 'Laptops', 'Audio', 'Televisores', 'Accesorios', 'Gaming']
+WORDS = ['Pro', 'Max', 'Ultra', 'Lite', 'Plus', 'Mini', 'Air', 'Neo', 'Edge', 'Prime']
+
+
+def seed_catalog(n_products, seed=42, batch_size=5000, images_per_product=0):
+    rng = random.Random(seed)
+    categories = [
+        Category.objects.get_or_create(slug=f'bench-{i}', defaults={'name': name})[0]
+        for i, name in enumerate(CATEGORIES)
+    ]
+    labels = [value for value, _ in Product.Label.choices]
+
+    created = 0
+    while created < n_products:
+        batch = []
+        for i in range(created, min(created + batch_size, n_products)):
+            price = Decimal(rng.randint(1000, 500000)) / 100
+            batch.append(Product(
+                category=rng.choice(categories),
+                name=f'{rng.choice(BRANDS)} {rng.choice(WORDS)} {i}',
+                brand=rng.choice(BRANDS),
+                description='Producto de prueba generado para benchmark. ' * 4,
+                price=price,
+                original_price=price * Decimal('1.20') if rng.random() < 0.3 else None,
+                label=rng.choice(labels),
+                image=f'products/bench-{i}.jpg' if images_per_product else None,
+            ))
+        Product.objects.bulk_create(batch)
+        if images_per_product:
+            ProductImage.objects.bulk_create([
+                ProductImage(product=product, image=f'products/gallery/bench-{product.pk}-{j}.jpg')
+                for product in batch for j in range(images_per_product)
+            ])
+        created += len(batch)
+
+    return created
@@ -3,6 +3,9 @@ from django.contrib.auth.models import User
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.tokens import RefreshToken # <--- FALTABA ESTA IMPORTACIÓN VITAL
 from .models import Product, Category, ProductImage      # <--- IMPORTAMOS ProductImage
+from .images import srcset
+from .metrics import span
+from .accounts import normalize_email
 
 # ==========================================
 # 1. SERIALIZADORES DE USUARIO (AUTH)
@@ -37,6 +40,11 @@ class UserSerializerWithToken(UserSerializer):
         fields = ['id', '_id', 'username', 'email', 'name', 'isAdmin', 'token']
 
     def get_token(self, obj):
+        # El login ya emitió el par de tokens: se reutiliza su access (ver
+        # MyTokenObtainPairSerializer). Emitir otro aquí firma dos veces y deja
+        # un segundo OutstandingToken en la BD por cada login.
+        if 'access' in self.context:
+            return self.context['access']
         token = RefreshToken.for_user(obj)
         return str(token.access_token)
 
@@ -50,11 +58,29 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class ProductImageSerializer(serializers.ModelSerializer):
+    # Derivadas WebP/AVIF listas para <img srcset> (None hasta que se procesen)
+    image_srcset = serializers.SerializerMethodField(read_only=True)
+
     class Meta:
         model = ProductImage
-        fields = '__all__'
-
-class ProductSerializer(serializers.ModelSerializer):
+        fields = ['id', 'image', 'product', 'image_srcset']
+
+    def get_image_srcset(self, obj):
+        return srcset(obj.image_meta, obj.image.storage, obj.image.name)
+
+class DynamicFieldsMixin:
+    """
+    Permite pedir solo algunos campos: ProductSerializer(qs, many=True, fields=['id', 'name']).
+    Los listados usan esto para no mandar 'description' ni 'images' cuando no se muestran.
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+class ProductSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     # Campo mágico 1: Texto bonito de la etiqueta ("🔥 Black Friday")
     label_display = serializers.CharField(source='get_label_display', read_only=True)
     
@@ -64,6 +90,9 @@ class ProductSerializer(serializers.ModelSerializer):
     # 🔴 CORRECCIÓN: Forzamos la obtención de la URL de la imagen
     image = serializers.SerializerMethodField(read_only=True)
 
+    # Campo mágico 3: thumbnails responsive + placeholder borroso de la imagen principal
+    image_srcset = serializers.SerializerMethodField(read_only=True)
+
     class Meta:
         model = Product
         # Lista explícita y profesional de campos
@@ -72,6 +101,7 @@ class ProductSerializer(serializers.ModelSerializer):
             'name', 
             'brand', 
             'image', 
+            'image_srcset',
             'description', 
             'price', 
             'original_price', 
@@ -92,6 +122,14 @@ class ProductSerializer(serializers.ModelSerializer):
             return obj.image.url
         return None
 
+    def get_image_srcset(self, obj):
+        return srcset(obj.image_meta, obj.image.storage, obj.image.name)
+
+    def to_representation(self, instance):
+        # Tramo 'serialize' de Server-Timing (ver metrics.py)
+        with span('serialize'):
+            return super().to_representation(instance)
+
 
 # ==========================================
 # 3. SERIALIZADOR DE LOGIN JWT
@@ -99,8 +137,35 @@ class ProductSerializer(serializers.ModelSerializer):
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     def validate(self, attrs):
-        data = super().validate(attrs)
-        serializer = UserSerializerWithToken(self.user).data
-        for k, v in serializer.items():
-            data[k] = v
-        return data
\ No newline at end of file
+        # Se registra con el email normalizado (accounts.normalize_email): 'Ana@X.com' entra igual
+        if '@' in attrs.get(self.username_field, ''):
+            attrs[self.username_field] = normalize_email(attrs[self.username_field])
+        data = super().validate(attrs)  # un solo par refresh/access (y un solo OutstandingToken)
+        data.update(UserSerializerWithToken(self.user, context={'access': data['access']}).data)
+        return data
+
+# ==========================================
+# 4. CHECKOUT (ENTRADA DEL CARRITO)
+# ==========================================
+# Del carrito solo se aceptan ids y cantidades: nombre y precio los pone el
+# servidor (ver checkout.py). Campos extra del navegador se ignoran.
+
+class CheckoutItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1, max_value=99, default=1)
+
+
+class PayerSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=255)
+    email = serializers.EmailField()
+    phone = serializers.CharField(max_length=30, required=False, allow_blank=True)
+    dni = serializers.CharField(max_length=20, required=False, allow_blank=True)
+    city = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    address = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    reference = serializers.CharField(max_length=255, required=False, allow_blank=True)
+
+
+class CheckoutSerializer(serializers.Serializer):
+    items = CheckoutItemSerializer(many=True, allow_empty=False, max_length=50)
+    payer = PayerSerializer()
+    coupon = serializers.CharField(max_length=30, required=False, allow_blank=True, default='')
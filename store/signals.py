@@ -0,0 +1,48 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache, images, metrics, recommendations, search
+from .models import Category, Product, ProductImage
+
+
+# --- ÍNDICE DE BÚSQUEDA (incremental) ---
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_products([instance])
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    search.remove_product(instance.pk)
+
+
+# --- RECOMENDACIONES (vecinos del producto editado) ---
+@receiver(post_save, sender=Product)
+def refresh_recommendations(sender, instance, raw=False, **kwargs):
+    if not raw:
+        recommendations.refresh_product(instance)
+
+
+# --- CACHÉ DEL CATÁLOGO ---
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=ProductImage)
+def invalidate_catalog_cache(sender, raw=False, **kwargs):
+    if not raw:
+        cache.bump_version()
+
+
+# --- DERIVADAS DE IMAGEN (en segundo plano) ---
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=ProductImage)
+def process_uploaded_image(sender, instance, raw=False, **kwargs):
+    if not raw:
+        images.schedule(instance)
+
+
+# --- MÉTRICAS POR PETICIÓN (tiempo de queries) ---
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    metrics.install(connection)
@@ -0,0 +1,89 @@
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+# ==========================================
+# ESTÁTICOS Y FRONTEND COMPILADO (WHITENOISE)
+# ==========================================
+# Sirve desde el mismo proceso, con los archivos ya comprimidos en el build
+# (.br/.gz, según el Accept-Encoding del navegador):
+#   - /static/: collectstatic con CompressedManifestStaticFilesStorage
+#     (nombres con hash -> caché de un año, immutable)
+#   - frontend/dist (WHITENOISE_ROOT): assets/*-<hash>.js|css de Vite también
+#     immutable; lo demás (logo.png, vite.svg) max-age corto
+#   - *.html siempre no-cache: index.html apunta a los assets del último
+#     build y el navegador debe revalidarlo (responde 304 si no cambió)
+# WhiteNoiseMiddleware es solo sync: bajo uvicorn obligaría a Django a pasar
+# cada petición (también las vistas async) por un hilo. Esta versión es async:
+# solo la apertura y lectura del archivo van a un hilo, nunca al event loop.
+# Hasta MAX_IN_MEMORY se responde desde memoria; lo más grande (media,
+# WHITENOISE_ROOT) se envía de a CHUNK_SIZE.
+
+VITE_ASSET = re.compile(r'^/assets/.+-[0-9A-Za-z_-]{8,}\.\w+$')
+MAX_IN_MEMORY = 512 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+def _load(static_file, request):
+    """Abre el archivo (bloqueante). Devuelve (respuesta de WhiteNoise, contenido o None si es grande)."""
+    result = static_file.get_response(request.method, request.META)
+    if result.file is None:
+        return result, b''
+    if int(dict(result.headers).get('Content-Length', 0)) > MAX_IN_MEMORY:
+        return result, None
+    with result.file as file:
+        return result, file.read()
+
+
+async def _chunks(file):
+    try:
+        while chunk := await sync_to_async(file.read, thread_sensitive=False)(CHUNK_SIZE):
+            yield chunk
+    finally:
+        await sync_to_async(file.close, thread_sensitive=False)()
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings=settings)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def immutable_file_test(self, path, url):
+        return bool(VITE_ASSET.match(url)) or super().immutable_file_test(path, url)
+
+    def add_cache_headers(self, headers, path, url):
+        super().add_cache_headers(headers, path, url)
+        if url.endswith('.html'):
+            headers['Cache-Control'] = 'no-cache'
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is None:
+            return await self.get_response(request)
+        # Un FileResponse bajo ASGI se lee con un iterador sync (y Django avisa
+        # con un Warning en cada uno): el cuerpo va en memoria o por un iterador async
+        result, body = await sync_to_async(_load, thread_sensitive=False)(static_file, request)
+        if body is None:
+            response = StreamingHttpResponse(_chunks(result.file), status=int(result.status))
+        else:
+            response = HttpResponse(body, status=int(result.status))
+        del response['Content-Type']
+        for key, value in result.headers:
+            response[key] = value
+        return response
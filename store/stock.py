@@ -0,0 +1,105 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Product, StockReservation
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# STOCK Y RESERVAS
+# ==========================================
+# Reservar = un UPDATE condicional por producto:
+#     UPDATE product SET stock = stock - n WHERE id = X AND stock >= n
+# Si no afecta filas, no hay stock. No hay SELECT ... FOR UPDATE ni lectura
+# previa: la base de datos decide en una sola sentencia, así que dos checkouts
+# simultáneos nunca venden la misma unidad y nadie espera un lock más de lo
+# que dura ese UPDATE. Productos con stock vacío (NULL) no se controlan.
+# Las reservas también se cierran con UPDATE condicionales sobre su estado,
+# de modo que liberar o confirmar dos veces no devuelve stock dos veces.
+
+
+class OutOfStock(Exception):
+    def __init__(self, product_ids):
+        super().__init__(f"Sin stock: {product_ids}")
+        self.product_ids = product_ids
+
+
+def reservation_ttl():
+    return timedelta(minutes=settings.STOCK_RESERVATION_MINUTES)
+
+
+def take(product_id, quantity):
+    """Descuenta 'quantity' si alcanza. Devuelve True si se pudo."""
+    return bool(Product.objects
+                .filter(Q(stock__isnull=True) | Q(stock__gte=quantity), pk=product_id)
+                .update(stock=F('stock') - quantity))
+
+
+def give_back(product_id, quantity):
+    Product.objects.filter(pk=product_id).update(stock=F('stock') + quantity)
+
+
+@transaction.atomic
+def reserve(order, lines):
+    """
+    lines: [(product_id, cantidad), ...]. Reserva todo o nada (si falta stock de
+    algún producto, la transacción deshace lo ya descontado) y lanza OutOfStock.
+    """
+    # Mismo orden de productos en todos los checkouts: sin esperas cruzadas en Postgres
+    lines = sorted(lines)
+    missing = [product_id for product_id, quantity in lines if not take(product_id, quantity)]
+    if missing:
+        raise OutOfStock(missing)
+    expires_at = timezone.now() + reservation_ttl()
+    StockReservation.objects.bulk_create([
+        StockReservation(order=order, product_id=product_id, quantity=quantity, expires_at=expires_at)
+        for product_id, quantity in lines
+    ])
+    return expires_at
+
+
+def commit(order_id):
+    """El pedido se pagó: las reservas activas pasan a venta."""
+    with transaction.atomic():
+        StockReservation.objects.filter(order_id=order_id, status=StockReservation.Status.ACTIVE).update(
+            status=StockReservation.Status.COMMITTED)
+        # Pago tardío: la reserva ya venció y su stock se devolvió; se vuelve a tomar si queda
+        late = StockReservation.objects.filter(order_id=order_id, status=StockReservation.Status.RELEASED)
+        for reservation in late:
+            if not _close(reservation, StockReservation.Status.RELEASED, StockReservation.Status.COMMITTED):
+                continue
+            if not take(reservation.product_id, reservation.quantity):
+                logger.error("Pedido %s pagado sin stock de %s (reserva vencida)", order_id, reservation.product_id)
+
+
+def release(order_id, statuses=(StockReservation.Status.ACTIVE,)):
+    """Pago rechazado/cancelado (o reembolsado si se pasa COMMITTED): devuelve el stock."""
+    with transaction.atomic():
+        for reservation in StockReservation.objects.filter(order_id=order_id, status__in=statuses):
+            if _close(reservation, reservation.status, StockReservation.Status.RELEASED):
+                give_back(reservation.product_id, reservation.quantity)
+
+
+def release_expired(now=None):
+    """Devuelve el stock de reservas vencidas (lo llama el worker de pagos). Devuelve cuántas."""
+    now = now or timezone.now()
+    released = 0
+    expired = (StockReservation.objects
+               .filter(status=StockReservation.Status.ACTIVE, expires_at__lte=now)
+               .only('id', 'product_id', 'quantity', 'status')[:500])
+    for reservation in expired:
+        with transaction.atomic():
+            if _close(reservation, StockReservation.Status.ACTIVE, StockReservation.Status.RELEASED):
+                give_back(reservation.product_id, reservation.quantity)
+                released += 1
+    return released
+
+
+def _close(reservation, current, new):
+    # Solo quien gana este UPDATE mueve el stock: liberar dos veces no suma dos veces
+    return bool(StockReservation.objects.filter(pk=reservation.pk, status=current).update(status=new))
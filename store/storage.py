@@ -0,0 +1,44 @@
+from functools import lru_cache
+
+from cloudinary_storage.storage import MediaCloudinaryStorage
+from django.core.files.storage import FileSystemStorage
+
+from .metrics import span
+
+# ==========================================
+# ALMACENAMIENTO CON URLs MEMORIZADAS
+# ==========================================
+# Con Cloudinary, cada .url pasa por el SDK (config, firma, armado de la URL).
+# Los nombres de archivo son únicos por subida y su URL no cambia, así que la
+# memorizamos por nombre con un LRU acotado: al pintar un listado ya no se toca
+# el backend de almacenamiento.
+
+URL_CACHE_SIZE = 8192
+
+
+class CachedURLMixin:
+    url_cache_size = URL_CACHE_SIZE
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cached_url = lru_cache(maxsize=self.url_cache_size)(super().url)
+
+    def url(self, name):
+        with span('storage'):
+            return self._cached_url(name)
+
+    def delete(self, name):
+        super().delete(name)
+        # lru_cache no borra claves sueltas; borrar archivos es raro
+        self._cached_url.cache_clear()
+
+    def url_cache_info(self):
+        return self._cached_url.cache_info()
+
+
+class CachedMediaCloudinaryStorage(CachedURLMixin, MediaCloudinaryStorage):
+    """Producción: Cloudinary."""
+
+
+class CachedFileSystemStorage(CachedURLMixin, FileSystemStorage):
+    """Local / tests: MEDIA_ROOT en disco, sin red ni credenciales."""
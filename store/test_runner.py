@@ -0,0 +1,13 @@
+from django.test.runner import DiscoverRunner
+
+
+class StoreTestRunner(DiscoverRunner):
+    """
+    Sin --tag, deja afuera los tests marcados 'slow' (siembran 100k productos):
+    `manage.py test store` queda rápido. Para correrlos: manage.py test store --tag slow
+    """
+
+    def __init__(self, *args, tags=None, exclude_tags=None, **kwargs):
+        if not tags:
+            exclude_tags = {*(exclude_tags or ()), 'slow'}
+        super().__init__(*args, tags=tags, exclude_tags=exclude_tags, **kwargs)
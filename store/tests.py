@@ -1,3 +1,1279 @@
-from django.test import TestCase
+import base64
+import hashlib
+import hmac
+import importlib
+import json
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.apps import apps
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import (accounts, benchmark, campaigns, catalog_io, checkout, images, metrics, payments, recommendations, routers,
+               static, stock, tokens)
+from .cache import batch, get_version
+from .fast import FastProductSerializer
+from .hashers import TunedPBKDF2PasswordHasher
+from .mp_standin import MercadoPagoStandIn
+from .models import (Category, Order, PaymentEvent, PriceCampaign, Product, ProductImage, ProductRecommendation,
+                     StockReservation)
+from .pagination import EstimatedCountPaginator
+from .queries import PRODUCT_PLAN
+from .renderers import FastJSONRenderer
+from .serializers import ProductSerializer
+from .seed import seed_catalog
+from .storage import CachedFileSystemStorage
+
+
+# Los tests nunca hablan con Cloudinary: almacenamiento local en su lugar
+LOCAL_STORAGES = {
+    'default': {'BACKEND': 'store.storage.CachedFileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+@override_settings(STORAGES=LOCAL_STORAGES)
+class StoreTestCase(TestCase):
+    pass
+
+
+def make_catalog(n, category=None, **extra):
+    category = category or Category.objects.create(name='Celulares', slug='celulares')
+    return [
+        Product.objects.create(category=category, name=f'Producto {i}', brand='Marca',
+                               description='Texto largo', price=Decimal(10 + i % 5), **extra)
+        for i in range(n)
+    ]
+
+
+class ProductPaginationTests(StoreTestCase):
+    def setUp(self):
+        make_catalog(30)
+
+    def walk(self, **params):
+        seen, cursor = [], None
+        while True:
+            query = {**params, **({'cursor': cursor} if cursor else {})}
+            response = self.client.get('/api/products/', query)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(p['id'] for p in response.json())
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                return seen
+
+    def test_pages_cover_catalog_without_duplicates(self):
+        for ordering in ('newest', 'min_price', 'max_price'):
+            ids = self.walk(ordering=ordering, limit=7)
+            self.assertEqual(len(ids), 30)
+            self.assertEqual(len(set(ids)), 30)
+
+    def test_price_ordering_uses_id_as_tiebreaker(self):
+        ids = self.walk(ordering='min_price', limit=4)
+        expected = list(Product.objects.order_by('price', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_limit_param(self):
+        response = self.client.get('/api/products/', {'limit': 10000})
+        self.assertEqual(len(response.json()), 30)
+        response = self.client.get('/api/products/', {'limit': 5})
+        self.assertEqual(len(response.json()), 5)
+        self.assertIn('rel="next"', response.headers['Link'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/products/', {'cursor': 'no-es-un-cursor'})
+        self.assertEqual(response.status_code, 400)
+        # Cursores armados a mano: JSON válido con valores fuera de rango
+        for payload in ('["1",1e400]', '["NaN",1]', '["Infinity",1]', '["-Infinity",1]'):
+            cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+            response = self.client.get('/api/products/', {'cursor': cursor, 'ordering': 'min_price'})
+            self.assertEqual(response.status_code, 400, payload)
+
+    def test_fields_projection(self):
+        response = self.client.get('/api/products/', {'fields': 'name,price', 'limit': 1})
+        self.assertEqual(set(response.json()[0]), {'id', 'name', 'price'})
+
+
+class QueryCountTests(StoreTestCase):
+    """Guardia anti N+1: el número de queries de un listado no debe crecer con los resultados."""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Audio', slug='audio')
+
+    def add_products(self, n):
+        for product in make_catalog(n, category=self.category):
+            ProductImage.objects.create(product=product, image='products/gallery/a.jpg')
+            ProductImage.objects.create(product=product, image='products/gallery/b.jpg')
+
+    def count_queries(self, url, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def assertConstantQueries(self, url, params=None):
+        self.add_products(2)
+        small = self.count_queries(url, params)
+        self.add_products(10)
+        large = self.count_queries(url, params)
+        self.assertEqual(small, large)
+
+    def test_product_list(self):
+        self.assertConstantQueries('/api/products/')
+
+    def test_product_list_projection(self):
+        self.assertConstantQueries('/api/products/', {'fields': 'id,name,price'})
+
+    def test_related_products(self):
+        product = make_catalog(1, category=self.category)[0]
+        self.assertConstantQueries(f'/api/recommendations/{product.pk}/')
+
+
+class CatalogFacetTests(StoreTestCase):
+    def setUp(self):
+        phones = Category.objects.create(name='Celulares', slug='celulares')
+        audio = Category.objects.create(name='Audio', slug='audio')
+        self.phones, self.audio = phones, audio
+        for brand, category, label, price in [
+            ('Samsung', phones, 'BF', 100), ('Samsung', phones, 'NONE', 200),
+            ('Apple', phones, 'OF', 900), ('Sony', audio, 'BF', 50), ('Sony', audio, 'NONE', 80),
+        ]:
+            Product.objects.create(category=category, name=f'{brand} {price}', brand=brand,
+                                   label=label, price=Decimal(price))
+        Product.objects.create(category=audio, name='Oculto', brand='Sony', price=1, is_active=False)
+
+    def test_products_filter_by_brand(self):
+        response = self.client.get('/api/products/?brand=Samsung&brand=Apple')
+        self.assertEqual({p['brand'] for p in response.json()}, {'Samsung', 'Apple'})
+        self.assertEqual(len(response.json()), 3)
+
+    def test_non_decimal_digits_in_category_are_ignored(self):
+        # '²'.isdigit() es True pero int('²') falla
+        response = self.client.get('/api/catalog/', {'category': ['²', self.audio.pk]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['facets']['total'], 2)
+
+    def test_price_range_and_label(self):
+        response = self.client.get('/api/products/', {'label': 'BF', 'min_price': 60})
+        self.assertEqual([p['name'] for p in response.json()], ['Samsung 100'])
+
+    def test_facet_counts_ignore_own_filter(self):
+        response = self.client.get('/api/catalog/?brand=Samsung&label=BF')
+        facets = response.json()['facets']
+        self.assertEqual(facets['total'], 1)
+        self.assertEqual(len(response.json()['results']), 1)
+        # Marcas: cuenta con label=BF pero sin filtrar por marca
+        self.assertEqual(facets['brand'], [{'value': 'Samsung', 'count': 1}, {'value': 'Sony', 'count': 1}])
+        # Etiquetas: cuenta con brand=Samsung pero sin filtrar por etiqueta
+        self.assertEqual(facets['label'], [{'value': 'BF', 'count': 1}, {'value': 'NONE', 'count': 1}])
+        self.assertEqual(facets['category'], [{'value': self.phones.pk, 'count': 1}])
+
+    def test_catalog_is_one_aggregate(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/catalog/', {'fields': 'id,name,price'})
+        # Versión del catálogo (caché) + página + GROUP BY de facetas
+        self.assertEqual(len(ctx.captured_queries), 3)
+
+
+class ProductSearchTests(StoreTestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Juguetes', slug='juguetes')
+        self.truck = Product.objects.create(category=category, name='Camión de bomberos', brand='Hot Wheels', price=50)
+        self.car = Product.objects.create(category=category, name='Auto a control remoto', brand='Camiones SAC',
+                                          description='Incluye un camión pequeño', price=80)
+        self.doll = Product.objects.create(category=category, name='Muñeca', brand='Barbie', price=40)
+
+    def search(self, term, **params):
+        response = self.client.get('/api/products/', {'search': term, **params})
+        self.assertEqual(response.status_code, 200)
+        return [p['id'] for p in response.json()]
+
+    def test_accent_folding(self):
+        self.assertIn(self.truck.pk, self.search('camion'))
+        self.assertEqual(self.search('MUNECA'), [self.doll.pk])
+
+    def test_prefix_matching(self):
+        self.assertEqual(self.search('bomb'), [self.truck.pk])
+        self.assertEqual(self.search('hot whe'), [self.truck.pk])
+
+    def test_name_ranks_above_brand_and_description(self):
+        self.assertEqual(self.search('cami'), [self.truck.pk, self.car.pk])
+
+    def test_relevance_pagination(self):
+        first = self.client.get('/api/products/', {'search': 'cami', 'limit': 1})
+        second = self.client.get('/api/products/', {'search': 'cami', 'limit': 1,
+                                                    'cursor': first.headers['X-Next-Cursor']})
+        self.assertEqual([p['id'] for p in first.json() + second.json()], [self.truck.pk, self.car.pk])
+
+    def test_index_follows_save_and_delete(self):
+        self.doll.name = 'Peluche'
+        self.doll.save()
+        self.assertEqual(self.search('muneca'), [])
+        self.assertEqual(self.search('peluche'), [self.doll.pk])
+        self.doll.delete()
+        self.assertEqual(self.search('peluche'), [])
+
+
+class CatalogCacheTests(StoreTestCase):
+    def setUp(self):
+        self.product = make_catalog(3)[0]
+
+    def test_second_request_is_served_from_cache(self):
+        first = self.client.get('/api/products/')
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get('/api/products/')
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(len(ctx.captured_queries), 1)  # solo la versión
+
+    def test_conditional_get(self):
+        response = self.client.get(f'/api/products/{self.product.pk}/')
+        self.assertIn('Last-Modified', response.headers)
+        again = self.client.get(f'/api/products/{self.product.pk}/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_save_invalidates(self):
+        etag = self.client.get('/api/products/')['ETag']
+        self.product.name = 'Renombrado'
+        self.product.save()
+        response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Renombrado', [p['name'] for p in response.json()])
+
+    def test_batch_bumps_once(self):
+        before = get_version()[0]
+        with batch():
+            for product in Product.objects.all():
+                product.save()
+        self.assertEqual(get_version()[0], before + 1)
+
+
+class RecommendationTests(StoreTestCase):
+    def setUp(self):
+        phones = Category.objects.create(name='Celulares', slug='celulares')
+        audio = Category.objects.create(name='Audio', slug='audio')
+        self.base = Product.objects.create(category=phones, name='Galaxy', brand='Samsung', price=1000)
+        self.close = Product.objects.create(category=phones, name='Galaxy Lite', brand='Samsung', price=900)
+        self.far = Product.objects.create(category=phones, name='Básico', brand='Nokia', price=100)
+        self.other = Product.objects.create(category=audio, name='Buds', brand='Samsung', price=300)
+        self.hidden = Product.objects.create(category=phones, name='Oculto', brand='Samsung', price=1000,
+                                             is_active=False)
+        recommendations.rebuild()
+
+    def related(self, product):
+        return [p['id'] for p in self.client.get(f'/api/recommendations/{product.pk}/').json()]
+
+    def test_ranking(self):
+        self.assertEqual(self.related(self.base), [self.close.pk, self.far.pk, self.other.pk])
+
+    def test_single_indexed_read(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(f'/api/recommendations/{self.base.pk}/')
+        # Versión del catálogo + vecinos (JOIN) + imágenes
+        self.assertEqual(len(ctx.captured_queries), 3)
+
+    def test_falls_back_to_category_before_first_rebuild(self):
+        ProductRecommendation.objects.all().delete()
+        self.assertEqual(self.related(self.base), [self.far.pk, self.close.pk])
+        self.assertEqual(self.client.get('/api/recommendations/999999/').json(), [])
+
+    def test_co_purchases_boost(self):
+        neighbors = recommendations.build_neighbors(
+            list(Product.objects.filter(is_active=True).values(*recommendations.FIELDS)),
+            carts=[[self.base.pk, self.far.pk]] * 3,
+        )
+        self.assertEqual(neighbors[self.base.pk][0][0], self.far.pk)
+
+    def test_refresh_on_save(self):
+        self.far.brand = 'Samsung'
+        self.far.save()
+        self.assertIn(self.base.pk, [r.recommended_id for r in self.far.recommendations.all()])
+        self.far.is_active = False
+        self.far.save()
+        self.assertFalse(self.far.recommendations.exists())
+
+
+class CartRecommendationTests(StoreTestCase):
+    def setUp(self):
+        phones = Category.objects.create(name='Celulares', slug='celulares')
+        audio = Category.objects.create(name='Audio', slug='audio')
+        self.phone = Product.objects.create(category=phones, name='Galaxy', brand='Samsung', price=1000)
+        self.case = Product.objects.create(category=phones, name='Funda', brand='Samsung', price=950)
+        self.buds = Product.objects.create(category=audio, name='Buds', brand='Samsung', price=300)
+        self.radio = Product.objects.create(category=audio, name='Radio', brand='Philips', price=80)
+        recommendations.rebuild()
+
+    def suggest(self, ids, **params):
+        response = self.client.get('/api/recommendations/cart/', {'ids': ids, **params})
+        self.assertEqual(response.status_code, 200)
+        return [p['id'] for p in response.json()]
+
+    def test_excludes_cart_items(self):
+        suggested = self.suggest(f'{self.phone.pk},{self.buds.pk}')
+        self.assertNotIn(self.phone.pk, suggested)
+        self.assertNotIn(self.buds.pk, suggested)
+        self.assertEqual(suggested[0], self.case.pk)
+
+    def test_garbage_ids_are_ignored(self):
+        # '²'.isdigit() es True pero int('²') falla
+        self.assertEqual(self.suggest(f'{self.phone.pk},²,x'), self.suggest(str(self.phone.pk)))
+
+    def test_limit_is_bounded(self):
+        self.assertLessEqual(len(self.suggest(str(self.phone.pk), limit=500)), recommendations.MAX_CART_SUGGESTIONS)
+        self.assertEqual(len(self.suggest(str(self.phone.pk), limit=1)), 1)
+
+    def test_empty_cart_gets_newest(self):
+        self.assertEqual(self.suggest('', limit=2), [self.radio.pk, self.buds.pk])
+
+    def test_cache_key_ignores_id_order(self):
+        first = self.client.get('/api/recommendations/cart/', {'ids': f'{self.phone.pk},{self.buds.pk}'})
+        second = self.client.get('/api/recommendations/cart/', {'ids': f'{self.buds.pk},{self.phone.pk}'},
+                                 HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+
+
+
+@tag('slow')
+@override_settings(CACHES={**settings.CACHES, 'catalog': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+class IndexUsageTests(StoreTestCase):
+    """
+    Con 100k productos, cada query que ejecutan las vistas del catálogo debe
+    resolverse con índices (sin recorrer la tabla ni ordenar en memoria).
+    No corren por defecto: manage.py test store --tag slow (ver test_runner.py).
+    Sin la caché del catálogo: un acierto solo mediría la lectura de la versión.
+    """
+    SIZE = 100_000
+    # Tablas diminutas donde un SCAN completo es lo correcto
+    SMALL_TABLES = ('store_category',)
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalog(cls.SIZE)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.product = Product.objects.order_by('id')[cls.SIZE // 2]
+        recommendations.refresh_product(cls.product)
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                return [row[-1] for row in cursor.fetchall()]
+            cursor.execute(f'EXPLAIN {sql}')
+            return [row[0] for row in cursor.fetchall()]
+
+    def assertIndexed(self, url, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(ctx.captured_queries), 1, f'{url}: solo la versión (¿respuesta cacheada?)')
+        for query in ctx.captured_queries:
+            for line in self.plan(query['sql']):
+                if any(table in line for table in self.SMALL_TABLES):
+                    continue
+                if connection.vendor == 'sqlite':
+                    if line.startswith('SCAN'):
+                        self.assertIn('INDEX', line, f'{url}: {line}\n{query["sql"]}')
+                    # Ordenar un agregado ya acotado (GROUP BY) en memoria es aceptable
+                    if 'GROUP BY' not in query['sql']:
+                        self.assertNotIn('TEMP B-TREE FOR ORDER BY', line, f'{url}: {line}\n{query["sql"]}')
+                else:
+                    self.assertNotIn('Seq Scan on store_product', line, f'{url}: {line}\n{query["sql"]}')
+
+    def test_listings(self):
+        category = self.product.category_id
+        for params in [
+            {}, {'ordering': 'min_price'}, {'ordering': 'max_price'},
+            {'category': category}, {'category': category, 'ordering': 'min_price'},
+            {'brand': self.product.brand, 'ordering': 'min_price'},
+        ]:
+            first = self.client.get('/api/products/', params)
+            self.assertIndexed('/api/products/', params)
+            self.assertIndexed('/api/products/', {**params, 'cursor': first['X-Next-Cursor']})
+
+    def test_catalog_and_brands(self):
+        self.assertIndexed('/api/catalog/')
+        self.assertIndexed('/api/brands/')
+        self.assertIndexed('/api/categories/')
+
+    def test_detail_and_recommendations(self):
+        self.assertIndexed(f'/api/products/{self.product.pk}/')
+        self.assertIndexed(f'/api/recommendations/{self.product.pk}/')
+        self.assertIndexed('/api/recommendations/cart/', {'ids': self.product.pk})
+
+
+
+class FastSerializerTests(StoreTestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Ñandú', slug='nandu')
+        full = Product.objects.create(category=category, name='Cámara “Pro”\u2028 ✓', brand='Sony',
+                                      description='Línea 1\nLínea 2', price=Decimal('1999.9'),
+                                      original_price=Decimal('2500'), label='BF', image='products/a.jpg')
+        ProductImage.objects.create(product=full, image='products/gallery/b.jpg')
+        gallery = ProductImage.objects.create(product=full, image='products/gallery/a.jpg')
+        Product.objects.create(category=category, name='Sin nada', price=Decimal('0.5'), label='NONE')
+        meta = {'source': 'products/a.jpg', 'width': 800, 'height': 600, 'placeholder': 'data:image/webp;base64,AA==',
+                'variants': {'webp': {'640': 'products/derivatives/a-640.webp', '320': 'products/derivatives/a-320.webp'}}}
+        Product.objects.filter(pk=full.pk).update(image_meta=meta)
+        ProductImage.objects.filter(pk=gallery.pk).update(image_meta={**meta, 'source': 'products/gallery/a.jpg'})
+
+    def render_both(self, fields=None):
+        queryset = Product.objects.order_by('id')
+        slow = JSONRenderer().render(ProductSerializer(PRODUCT_PLAN.apply(queryset), many=True, fields=fields).data)
+        fast_serializer = FastProductSerializer(fields)
+        fast = FastJSONRenderer().render(fast_serializer.serialize(list(queryset.values(*fast_serializer.columns()))))
+        return slow, fast
+
+    def test_byte_identical(self):
+        slow, fast = self.render_both()
+        self.assertEqual(slow, fast)
+
+    def test_byte_identical_with_projection(self):
+        slow, fast = self.render_both(fields=['id', 'name', 'price', 'label_display', 'image', 'image_srcset'])
+        self.assertEqual(slow, fast)
+
+    def test_renderer_matches_drf(self):
+        data = {'a': [1, 2.5, None, True], 'b': Decimal('1.10'), 'c': 'ñ\u2029', 'd': {'x': []}}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+
+class StorageURLCacheTests(StoreTestCase):
+    def test_url_is_memoized_per_name(self):
+        with mock.patch.object(FileSystemStorage, 'url', autospec=True,
+                               side_effect=lambda self, name: f'/media/{name}') as backend_url:
+            storage = CachedFileSystemStorage()
+            for _ in range(3):
+                self.assertEqual(storage.url('products/a.jpg'), '/media/products/a.jpg')
+            storage.url('products/b.jpg')
+        self.assertEqual(backend_url.call_count, 2)
+
+    def test_listing_resolves_each_name_once(self):
+        category = Category.objects.create(name='Audio', slug='audio')
+        for i in range(5):
+            Product.objects.create(category=category, name=f'P{i}', price=1, image='products/mismo.jpg')
+        default_storage._cached_url.cache_clear()
+        self.client.get('/api/products/')
+        self.client.get('/api/products/?fields=id,image&limit=3')
+        info = default_storage.url_cache_info()
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.hits, 7)
+
+
+def make_jpeg(width, height):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), (200, 30, 30)).save(buffer, format='JPEG')
+    return SimpleUploadedFile('foto.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+
+class ImagePipelineTests(StoreTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        overrides = override_settings(MEDIA_ROOT=self.media_root, IMAGE_PIPELINE_SYNC=True)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.category = Category.objects.create(name='Foto', slug='foto')
+
+    def test_upload_builds_derivatives_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.create(category=self.category, name='Cámara', price=1,
+                                             image=make_jpeg(800, 600))
+        product.refresh_from_db()
+        meta = product.image_meta
+        self.assertEqual((meta['width'], meta['height']), (800, 600))
+        self.assertTrue(meta['placeholder'].startswith('data:image/webp;base64,'))
+        for fmt in images.FORMATS:
+            # Nunca se agranda: 1024 no aplica a una original de 800px
+            self.assertEqual(sorted(meta['variants'][fmt], key=int), ['320', '640'])
+            for name in meta['variants'][fmt].values():
+                with default_storage.open(name) as derivative:
+                    self.assertEqual(Image.open(derivative).format, fmt.upper())
+
+        data = self.client.get(f'/api/products/{product.pk}/').json()
+        self.assertRegex(data['image_srcset']['webp'], r'^/media/\S+-320\.webp 320w, /media/\S+-640\.webp 640w$')
+
+    def test_small_image_and_gallery(self):
+        product = Product.objects.create(category=self.category, name='Mini', price=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductImage.objects.create(product=product, image=make_jpeg(200, 100))
+        gallery = self.client.get(f'/api/products/{product.pk}/').json()['images']
+        self.assertEqual(gallery[0]['image_srcset']['webp'].split(' ')[1], '200w')
+
+    def test_resave_does_not_reprocess(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.create(category=self.category, name='Cámara', price=1,
+                                             image=make_jpeg(400, 400))
+        product.refresh_from_db()
+        with self.captureOnCommitCallbacks() as callbacks:
+            product.name = 'Cámara 2'
+            product.save()
+        self.assertEqual(callbacks, [])
+
+    def test_replaced_image_hides_stale_derivatives(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.create(category=self.category, name='Cámara', price=1,
+                                             image=make_jpeg(400, 300))
+        product.refresh_from_db()
+        with self.captureOnCommitCallbacks():  # el trabajo en segundo plano todavía no corrió
+            product.image = make_jpeg(600, 600)
+            product.save()
+        detail = self.client.get(f'/api/products/{product.pk}/').json()
+        self.assertIsNone(detail['image_srcset'])
+        listing = self.client.get('/api/products/', {'fields': 'id,image_srcset'}).json()
+        self.assertEqual(listing, [{'id': product.pk, 'image_srcset': None}])
+
+    def test_backfill_command_processes_rows_without_meta(self):
+        # Filas de antes del pipeline: imagen subida, image_meta en NULL
+        product = Product.objects.create(category=self.category, name='Vieja', price=1, image=make_jpeg(400, 300))
+        Product.objects.filter(pk=product.pk).update(image_meta=None)
+        out = StringIO()
+        call_command('build_image_derivatives', stdout=out)
+        self.assertIn('Derivadas de 1 imágenes', out.getvalue())
+        product.refresh_from_db()
+        self.assertEqual((product.image_meta['width'], product.image_meta['height']), (400, 300))
+
+
+PAYER = {'name': 'Ana Pérez', 'email': 'ana@example.com', 'phone': '999888777', 'dni': '12345678',
+         'city': 'Lima', 'address': 'Av. Siempre Viva 123'}
+
+
+class CheckoutTests(StoreTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.standin = MercadoPagoStandIn().start()
+        cls.addClassCleanup(cls.standin.stop)
+
+    def setUp(self):
+        self.standin.requests.clear()
+        self.standin.status, self.standin.delay = 201, 0
+        overrides = override_settings(MERCADOPAGO_API_URL=self.standin.url, MERCADOPAGO_TIMEOUT=1.0,
+                                     MERCADOPAGO_RETRIES=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.phone, self.case = make_catalog(2)
+        Product.objects.filter(pk=self.phone.pk).update(price=Decimal('1999.90'))
+        Product.objects.filter(pk=self.case.pk).update(price=Decimal('25.00'))
+
+    def pay(self, items, **extra):
+        return self.client.post('/api/create_preference/', {'items': items, 'payer': PAYER, **extra},
+                                content_type='application/json')
+
+    def test_prices_come_from_catalog(self):
+        # El navegador manda un precio falso: se ignora
+        response = self.pay([{'id': self.phone.pk, 'quantity': 1, 'price': '1.00', 'name': 'Truco'},
+                             {'id': self.case.pk, 'quantity': 2}, {'id': self.case.pk, 'quantity': 1}])
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertIn('pref_id=standin-', data['init_point'])
+        self.assertEqual(data['total'], '2074.90')
+
+        order = Order.objects.get(external_reference=data['external_reference'])
+        self.assertEqual(order.status, Order.Status.PENDING)
+        self.assertEqual(order.init_point, data['init_point'])
+        sent = self.standin.requests[-1]
+        self.assertEqual(sent['json']['external_reference'], order.external_reference)
+        self.assertEqual(sent['headers']['x-idempotency-key'], order.external_reference)
+        self.assertEqual(sorted((i['title'], i['quantity'], i['unit_price']) for i in sent['json']['items']),
+                         [(self.phone.name, 1, 1999.9), (self.case.name, 3, 25.0)])
+
+    def test_external_reference_is_unique_per_order(self):
+        refs = {self.pay([{'id': self.case.pk, 'quantity': 1}]).json()['external_reference'] for _ in range(3)}
+        self.assertEqual(len(refs), 3)
+
+    def test_coupon_is_applied_server_side(self):
+        data = self.pay([{'id': self.case.pk, 'quantity': 2}], coupon='danshop10').json()
+        self.assertEqual(data['total'], '45.00')
+        self.assertEqual(self.pay([{'id': self.case.pk}], coupon='GRATIS').status_code, 400)
+
+    def test_invalid_carts(self):
+        Product.objects.filter(pk=self.case.pk).update(is_active=False)
+        response = self.pay([{'id': self.case.pk, 'quantity': 1}])
+        self.assertEqual((response.status_code, response.json()['detail']), (400, {'missing': [self.case.pk]}))
+        self.assertEqual(self.pay([]).status_code, 400)
+        self.assertEqual(self.pay([{'id': self.phone.pk, 'quantity': 0}]).status_code, 400)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(self.standin.requests, [])
+
+    def test_repricing_is_one_query(self):
+        items = [{'id': self.phone.pk, 'quantity': 1}, {'id': self.case.pk, 'quantity': 4}]
+        with self.assertNumQueries(1):
+            checkout.price_cart(items)
+
+    def test_upstream_errors(self):
+        self.standin.status = 400
+        with self.assertLogs('store.checkout', 'ERROR'):
+            response = self.pay([{'id': self.case.pk, 'quantity': 1}])
+        self.assertEqual(response.status_code, 502)
+        order = Order.objects.get()
+        self.assertEqual((order.init_point, order.status), ('', Order.Status.CANCELLED))
+
+    def test_failed_preference_releases_stock(self):
+        # Quedan 2: sin liberar, el reintento del mismo cliente chocaría con su propia reserva
+        Product.objects.filter(pk=self.case.pk).update(stock=2)
+        self.standin.status = 500
+        with self.assertLogs('store.checkout', 'ERROR'):
+            self.assertEqual(self.pay([{'id': self.case.pk, 'quantity': 2}]).status_code, 502)
+        self.assertFalse(StockReservation.objects.filter(status=StockReservation.Status.ACTIVE).exists())
+        self.assertEqual(Product.objects.get(pk=self.case.pk).stock, 2)
+        self.standin.status = 201
+        self.assertEqual(self.pay([{'id': self.case.pk, 'quantity': 2}]).status_code, 200)
+
+    def test_timeout_budget(self):
+        self.standin.delay = 2
+        with override_settings(MERCADOPAGO_TIMEOUT=0.3), self.assertLogs('store.checkout', 'WARNING'):
+            response = self.pay([{'id': self.case.pk, 'quantity': 1}])
+        self.assertEqual(response.status_code, 503)
+
+    def test_sync_sdk_fallback_without_httpx(self):
+        with mock.patch.object(checkout, 'httpx', None):
+            response = self.pay([{'id': self.case.pk, 'quantity': 1}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.standin.requests[-1]['headers']['x-idempotency-key'],
+                         response.json()['external_reference'])
+        self.assertIs(checkout.get_sdk(), checkout.get_sdk())
+
+    def test_authenticated_buyer_is_linked(self):
+        user = User.objects.create_user('ana', 'ana@example.com', 'secreta-123')
+        token = RefreshToken.for_user(user).access_token
+        response = self.client.post('/api/create_preference/', {'items': [{'id': self.case.pk}], 'payer': PAYER},
+                                    content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(Order.objects.get(external_reference=response.json()['external_reference']).user, user)
+
+
+class AsyncCheckoutTests(CheckoutTests):
+    """Los mismos casos a través de la vía ASGI (el view corre en el event loop)."""
+
+    def pay(self, items, **extra):
+        return async_to_sync(self.async_client.post)(
+            '/api/create_preference/', {'items': items, 'payer': PAYER, **extra}, content_type='application/json'
+        )
+
+
+    def test_client_is_closed_with_its_loop(self):
+        # Bajo WSGI cada petición async corre en su propio loop: el cliente no sobrevive al loop
+        async def client():
+            return checkout._get_async_client()
+
+        first, second = async_to_sync(client)(), async_to_sync(client)()
+        self.assertIsNot(first, second)
+        self.assertTrue(first.is_closed and second.is_closed)
+        self.assertEqual(len(checkout._async_clients), 0)
+
+
+class PaymentWebhookTests(StoreTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.standin = MercadoPagoStandIn().start()
+        cls.addClassCleanup(cls.standin.stop)
+
+    def setUp(self):
+        self.standin.payments.clear()
+        self.standin.requests.clear()
+        overrides = override_settings(MERCADOPAGO_API_URL=self.standin.url, MERCADOPAGO_RETRIES=0,
+                                     MERCADOPAGO_WEBHOOK_SECRET='')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.order = Order.objects.create(name='Ana', email='ana@example.com', subtotal=10, total=10)
+        self.standin.payments['555'] = {'id': 555, 'status': 'approved',
+                                        'external_reference': self.order.external_reference}
+
+    def notify(self, event_id, payment_id='555', **headers):
+        return self.client.post(f'/api/payments/webhook/?data.id={payment_id}&type=payment',
+                                {'id': event_id, 'type': 'payment', 'action': 'payment.updated',
+                                 'data': {'id': payment_id}},
+                                content_type='application/json', **headers)
+
+    def test_ack_only_enqueues(self):
+        with self.assertNumQueries(1):
+            response = self.notify(1001)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.standin.requests, [])  # no se consulta a MP dentro del request
+        self.notify(1001)  # reintento de MP
+        self.assertEqual(PaymentEvent.objects.get().status, PaymentEvent.Status.PENDING)
+
+    def test_worker_applies_transition_once(self):
+        for event_id in range(20):  # ráfaga: varios avisos del mismo pago
+            self.notify(2000 + event_id)
+        with self.assertLogs('store.payments', 'INFO') as logs:
+            self.assertEqual(payments.process_pending(), 20)
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(len(self.standin.requests), 1)  # una consulta a MP por pago y lote
+        self.order.refresh_from_db()
+        self.assertEqual((self.order.status, self.order.payment_id), (Order.Status.APPROVED, '555'))
+        self.assertEqual(PaymentEvent.objects.filter(status=PaymentEvent.Status.DONE).count(), 20)
+        self.assertEqual(payments.process_pending(), 0)
+
+    def test_malformed_data_is_rejected(self):
+        response = self.client.post('/api/payments/webhook/', {'type': 'payment', 'data': '123'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PaymentEvent.objects.exists())
+
+    def test_claim_is_exclusive(self):
+        self.notify(3001)
+        self.assertEqual(len(payments.claim(10)), 1)
+        self.assertEqual(payments.claim(10), [])
+
+    def test_failures_are_retried_later(self):
+        self.notify(4001, payment_id='999')  # MP aún no conoce el pago
+        with self.assertLogs('store.payments', 'WARNING'):
+            payments.process_pending()
+        event = PaymentEvent.objects.get()
+        self.assertEqual((event.status, event.attempts), (PaymentEvent.Status.PENDING, 1))
+        self.assertGreater(event.available_at, timezone.now())
+        self.assertEqual(payments.process_pending(), 0)
+
+    def test_refund_after_approval(self):
+        self.notify(5001)
+        payments.process_pending()
+        self.standin.payments['555']['status'] = 'refunded'
+        self.notify(5002)
+        payments.process_pending()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, Order.Status.CANCELLED)
+
+    @override_settings(MERCADOPAGO_WEBHOOK_SECRET='s3cr3t')
+    def test_signature(self):
+        manifest = 'id:555;request-id:req-1;ts:1700000000;'
+        signature = hmac.new(b's3cr3t', manifest.encode(), hashlib.sha256).hexdigest()
+        ok = self.notify(6001, HTTP_X_SIGNATURE=f'ts=1700000000,v1={signature}', HTTP_X_REQUEST_ID='req-1')
+        bad = self.notify(6002, HTTP_X_SIGNATURE='ts=1700000000,v1=deadbeef', HTTP_X_REQUEST_ID='req-1')
+        self.assertEqual((ok.status_code, bad.status_code), (200, 401))
+        self.assertEqual(PaymentEvent.objects.count(), 1)
+
+    def test_order_status_endpoint(self):
+        response = self.client.get(f'/api/orders/{self.order.external_reference}/')
+        self.assertEqual(response.json()['status'], 'PENDING')
+        self.assertEqual(self.client.get('/api/orders/DS-NOPE/').status_code, 404)
+
+
+class StockReservationTests(StoreTestCase):
+    def setUp(self):
+        self.product, self.untracked = make_catalog(2)
+        Product.objects.filter(pk=self.product.pk).update(stock=3)
+
+    def order(self, quantity, product=None):
+        product = product or self.product
+        return checkout.create_order([{'id': product.pk, 'quantity': quantity}], PAYER)
+
+    def stock(self):
+        return Product.objects.get(pk=self.product.pk).stock
+
+    def test_reserve_and_out_of_stock(self):
+        self.order(2)
+        self.assertEqual(self.stock(), 1)
+        with self.assertRaises(checkout.CheckoutError) as ctx:
+            self.order(2)
+        self.assertEqual((ctx.exception.status, ctx.exception.detail), (409, {'out_of_stock': [self.product.pk]}))
+        self.assertEqual((self.stock(), Order.objects.count()), (1, 1))  # el pedido fallido no quedó a medias
+
+    def test_untracked_products_always_sell(self):
+        self.order(50, product=self.untracked)
+        self.assertIsNone(Product.objects.get(pk=self.untracked.pk).stock)
+
+    def test_payment_outcome(self):
+        paid, rejected = self.order(1), self.order(2)
+        payments.apply_payment({'id': 1, 'status': 'approved', 'external_reference': paid.external_reference})
+        payments.apply_payment({'id': 2, 'status': 'rejected', 'external_reference': rejected.external_reference})
+        payments.apply_payment({'id': 2, 'status': 'rejected', 'external_reference': rejected.external_reference})
+        self.assertEqual(self.stock(), 2)
+        self.assertEqual(paid.reservations.get().status, StockReservation.Status.COMMITTED)
+        # Reembolso: la unidad vendida vuelve al stock
+        payments.apply_payment({'id': 1, 'status': 'refunded', 'external_reference': paid.external_reference})
+        self.assertEqual(self.stock(), 3)
+
+    def test_expired_reservations_are_released_once(self):
+        order = self.order(3)
+        later = timezone.now() + timedelta(minutes=settings.STOCK_RESERVATION_MINUTES + 1)
+        self.assertEqual(stock.release_expired(now=later), 1)
+        self.assertEqual(stock.release_expired(now=later), 0)
+        self.assertEqual(self.stock(), 3)
+        # Pago tardío: se vuelve a tomar el stock
+        payments.apply_payment({'id': 3, 'status': 'approved', 'external_reference': order.external_reference})
+        self.assertEqual(self.stock(), 0)
+
+
+@override_settings(STORAGES=LOCAL_STORAGES)
+class StockConcurrencyTests(TransactionTestCase):
+    """Muchos checkouts a la vez sobre un solo producto (BD real, un hilo por comprador)."""
+
+    BUYERS = 40
+    STOCK = 15
+
+    def test_no_oversell_under_contention(self):
+        product = make_catalog(1)[0]
+        Product.objects.filter(pk=product.pk).update(stock=self.STOCK)
+        barrier = threading.Barrier(self.BUYERS)
+        sold, rejected, errors, latencies = [], [], [], []
+
+        def buyer():
+            try:
+                barrier.wait()
+                start = time.perf_counter()
+                try:
+                    sold.append(checkout.create_order([{'id': product.pk, 'quantity': 1}], PAYER).pk)
+                except checkout.CheckoutError:
+                    rejected.append(1)
+                latencies.append(time.perf_counter() - start)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buyer) for _ in range(self.BUYERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual((len(sold), len(rejected)), (self.STOCK, self.BUYERS - self.STOCK))
+        self.assertEqual(Product.objects.get(pk=product.pk).stock, 0)
+        self.assertEqual(StockReservation.objects.count(), self.STOCK)
+        self.assertLess(max(latencies), 5)
+
+
+class CatalogImportTests(StoreTestCase):
+    CSV = (
+        "sku,name,brand,category,price,original_price,label,description,is_active,stock\n"
+        "A-1,Funda,Marca,celulares,10.5,,NEW,Texto,1,4\n"
+        "A-2,Cargador,Marca,celulares,20,25,,,si,\n"
+        "A-3,Sin categoría,Marca,no-existe,5,,,,1,\n"
+        "A-4,Precio roto,Marca,celulares,abc,,,,1,\n"
+    )
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Celulares', slug='celulares')
+
+    def run_import(self, text, fmt='csv', **kwargs):
+        return catalog_io.import_rows(catalog_io.read_rows(StringIO(text), fmt), **kwargs)
+
+    def test_csv_import_reports_bad_rows(self):
+        stats = self.run_import(self.CSV)
+        self.assertEqual((stats.rows, stats.created, stats.updated), (4, 2, 0))
+        self.assertEqual([line for line, _ in stats.errors], [4, 5])
+        funda = Product.objects.get(sku='A-1')
+        self.assertEqual((funda.price, funda.label, funda.stock, funda.category_id),
+                         (Decimal('10.50'), Product.Label.NEW, 4, self.category.pk))
+        self.assertIsNone(Product.objects.get(sku='A-2').stock)
+
+    def test_reimport_skips_unchanged_rows(self):
+        self.run_import(self.CSV)
+        stats = self.run_import(self.CSV)
+        self.assertEqual((stats.created, stats.updated, stats.unchanged), (0, 0, 2))
+
+    def test_partial_columns_keep_other_fields(self):
+        self.run_import(self.CSV)
+        stats = self.run_import('{"sku": "A-1", "price": "9.99"}\n{"sku": "B-1", "price": "1"}\n', fmt='jsonl')
+        self.assertEqual((stats.updated, len(stats.errors)), (1, 1))  # B-1 es nuevo y le faltan datos
+        funda = Product.objects.get(sku='A-1')
+        self.assertEqual((funda.price, funda.name, funda.stock), (Decimal('9.99'), 'Funda', 4))
+
+    def test_queries_and_cache_bumps_per_chunk(self):
+        rows = [{'sku': f'S-{i}', 'name': f'P {i}', 'category': 'celulares', 'price': '10'} for i in range(30)]
+        before = get_version()[0]
+        with CaptureQueriesContext(connection) as ctx:
+            stats = catalog_io.import_rows(rows, chunk_size=10)
+        self.assertEqual(stats.created, 30)
+        self.assertEqual(get_version()[0], before + 1)
+        # No crece con las filas: categorías + por trozo (SELECT + INSERT + índice) + versión
+        self.assertLess(len(ctx.captured_queries), 30)
+
+    def test_dry_run_writes_nothing(self):
+        stats = self.run_import(self.CSV, dry_run=True)
+        self.assertEqual(stats.created, 2)
+        self.assertFalse(Product.objects.exists())
+
+    def test_export_round_trip(self):
+        self.run_import(self.CSV)
+        for fmt in ('csv', 'jsonl'):
+            out = StringIO()
+            call_command('export_catalog', format=fmt, stdout=out)
+            stats = self.run_import(out.getvalue(), fmt=fmt)
+            self.assertEqual((stats.rows, stats.unchanged, stats.errors), (2, 2, []))
+
+    def test_export_skips_products_without_sku(self):
+        self.run_import(self.CSV)
+        Product.objects.create(category=self.category, name='Sin SKU', price=1)
+        out, err = StringIO(), StringIO()
+        call_command('export_catalog', format='jsonl', stdout=out, stderr=err)
+        self.assertIn('1 productos sin SKU', err.getvalue())
+        self.assertEqual(self.run_import(out.getvalue(), fmt='jsonl').errors, [])
+
+    def test_broken_jsonl_lines_are_row_errors(self):
+        text = ('{"sku": "J-1", "name": "Uno", "category": "celulares", "price": "1"}\n'
+                '{"sku": "J-2", "name": \n'
+                '\n'
+                '["no", "es", "objeto"]\n'
+                '{"sku": "J-3", "name": "Tres", "category": "celulares", "price": "3"}\n')
+        stats = self.run_import(text, fmt='jsonl', chunk_size=2)
+        self.assertEqual(stats.created, 2)
+        self.assertEqual([line for line, _ in stats.errors], [2, 4])
+
+
+class PriceCampaignTests(StoreTestCase):
+    def setUp(self):
+        self.phones = make_catalog(12)
+        self.other = Category.objects.create(name='Audio', slug='audio')
+        self.headphones = make_catalog(3, category=self.other)
+        Product.objects.filter(pk=self.phones[0].pk).update(original_price=Decimal('20'))
+        self.now = timezone.now()
+
+    def campaign(self, **fields):
+        defaults = {'name': 'Hot Sale', 'category': self.phones[0].category, 'percent_off': Decimal('25'),
+                    'label': Product.Label.OFFER, 'starts_at': self.now, 'ends_at': self.now + timedelta(days=1)}
+        return PriceCampaign.objects.create(**{**defaults, **fields})
+
+    def prices(self):
+        return list(Product.objects.order_by('pk').values_list('price', 'original_price', 'label'))
+
+    def test_apply_and_revert_with_constant_queries(self):
+        before, version = self.prices(), get_version()[0]
+        campaign = self.campaign()
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(campaigns.run_due(self.now), (1, 0))
+        self.assertLessEqual(len(ctx.captured_queries), 10)  # no depende de la cantidad de productos
+        self.assertEqual(get_version()[0], version + 1)
+
+        first = Product.objects.get(pk=self.phones[0].pk)
+        self.assertEqual((first.price, first.original_price, first.label), (Decimal('7.50'), Decimal('20'), 'OF'))
+        second = Product.objects.get(pk=self.phones[1].pk)
+        self.assertEqual((second.price, second.original_price), (Decimal('8.25'), Decimal('11')))
+        self.assertEqual(Product.objects.get(pk=self.headphones[0].pk).label, Product.Label.NONE)
+        self.assertEqual(PriceCampaign.objects.get(pk=campaign.pk).products_count, 12)
+
+        self.assertEqual(campaigns.run_due(self.now + timedelta(days=2)), (0, 1))
+        self.assertEqual(self.prices(), before)
+        self.assertEqual(get_version()[0], version + 2)
+
+    def test_revert_keeps_prices_edited_during_the_campaign(self):
+        campaign = self.campaign()
+        campaigns.apply(campaign, self.now)
+        Product.objects.filter(pk=self.phones[1].pk).update(price=Decimal('9.99'))  # edición del staff
+        campaign.refresh_from_db()
+        with self.assertLogs('store.campaigns', 'WARNING'):
+            self.assertEqual(campaigns.revert(campaign, self.now), 11)
+        edited = Product.objects.get(pk=self.phones[1].pk)
+        self.assertEqual(edited.price, Decimal('9.99'))
+        self.assertEqual(edited.label, Product.Label.OFFER)
+        self.assertEqual(Product.objects.get(pk=self.phones[2].pk).price, self.phones[2].price)
+
+    def test_applies_once(self):
+        campaign = self.campaign()
+        self.assertEqual(campaigns.apply(campaign, self.now), 12)
+        self.assertIsNone(campaigns.apply(campaign, self.now))
+        self.assertEqual(Product.objects.get(pk=self.phones[1].pk).price, Decimal('8.25'))
+
+    def test_products_in_active_campaign_are_skipped(self):
+        campaigns.apply(self.campaign(brand='marca'), self.now)
+        everything = self.campaign(category=None, percent_off=Decimal('50'), label=Product.Label.LIQUIDATION)
+        self.assertEqual(campaigns.apply(everything, self.now), 3)
+        self.assertEqual(Product.objects.filter(label='LQ').count(), 3)
+
+    def test_expired_before_applying_is_cancelled(self):
+        campaign = self.campaign()
+        with self.assertLogs('store.campaigns', 'WARNING'):
+            self.assertEqual(campaigns.run_due(self.now + timedelta(days=2)), (0, 0))
+        self.assertEqual(PriceCampaign.objects.get(pk=campaign.pk).status, PriceCampaign.Status.CANCELLED)
+
+
+@override_settings(STORAGES=LOCAL_STORAGES)
+class ProductAdminTests(StoreTestCase):
+    URL = '/admin/store/product/'
+
+    def setUp(self):
+        self.products = make_catalog(30)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+
+    def test_changelist_queries(self):
+        self.client.get(self.URL)  # calienta la caché de marcas
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 200)
+        sql = [q['sql'].upper() for q in ctx.captured_queries]
+        self.assertFalse([q for q in sql if 'DISTINCT' in q])
+        self.assertLess(len(sql), 15)  # no crece con las filas (categoría en el mismo SELECT)
+
+    def test_estimated_count_without_filters(self):
+        with mock.patch.object(EstimatedCountPaginator, 'threshold', 10):
+            paginator = EstimatedCountPaginator(Product.objects.order_by('pk'), 10)
+            self.assertEqual(paginator.count, max(p.pk for p in self.products))
+            filtered = EstimatedCountPaginator(Product.objects.filter(price__lt=12).order_by('pk'), 10)
+            self.assertEqual(filtered.count, Product.objects.filter(price__lt=12).count())
+
+    def test_bulk_actions_are_single_updates(self):
+        version = get_version()[0]
+        ids = [p.pk for p in self.products[:20]]
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(self.URL, {'action': 'relabel_liquidation', '_selected_action': ids})
+        updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "store_product"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(Product.objects.filter(label=Product.Label.LIQUIDATION).count(), 20)
+        self.assertEqual(get_version()[0], version + 1)
+        self.client.post(self.URL, {'action': 'deactivate', '_selected_action': ids})
+        self.assertEqual(Product.objects.filter(is_active=False).count(), 20)
+
+
+@override_settings(STORAGES=LOCAL_STORAGES)
+class BenchmarkFlowTests(StoreTestCase):
+    def test_flows_run_and_regressions_are_detected(self):
+        seed_catalog(300, images_per_product=1)
+        recommendations.rebuild()
+        ids = list(Product.objects.filter(is_active=True).values_list('id', flat=True))
+        brands = sorted(set(Product.objects.values_list('brand', flat=True)))
+        with MercadoPagoStandIn() as standin, override_settings(MERCADOPAGO_API_URL=standin.url):
+            report = benchmark.run(self.client, ids, brands, sessions=3, seed=1)
+        self.assertTrue({'home', 'catalog', 'product_detail', 'recommendations', 'cart_recommendations',
+                         'create_preference', 'order_status'} <= set(report['steps']))
+        self.assertEqual(benchmark.compare(report, report), [])
+
+        worse = {'steps': {'catalog': {**report['steps']['catalog'], 'max_queries': 99}}, 'total': report['total']}
+        self.assertEqual(len(benchmark.compare(worse, report, latency=False)), 1)
+
+
+@override_settings(STORAGES=LOCAL_STORAGES, SERVER_TIMING=True)
+class RequestMetricsTests(StoreTestCase):
+    def setUp(self):
+        metrics.reset()
+        make_catalog(5)
+
+    def test_server_timing_is_off_by_default(self):
+        with override_settings(SERVER_TIMING=False):
+            self.assertNotIn('Server-Timing', self.client.get('/api/products/'))
+
+    def timing(self, response):
+        return {entry.split(';')[0]: entry for entry in response['Server-Timing'].split(', ')}
+
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/products/', {'fields': 'id,name,image'})
+        timing = self.timing(response)
+        self.assertIn(f'desc="{len(ctx.captured_queries)} queries"', timing['db'])
+        self.assertIn('serialize', timing)
+        self.assertIn('total', timing)
+
+    def test_async_view_queries_are_counted(self):
+        with MercadoPagoStandIn() as standin, override_settings(MERCADOPAGO_API_URL=standin.url):
+            response = self.client.post('/api/create_preference/', {
+                'items': [{'id': Product.objects.first().pk, 'quantity': 1}], 'payer': PAYER,
+            }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('desc="0 queries"', self.timing(response)['db'])
+
+    def test_histograms_and_endpoint(self):
+        for _ in range(3):
+            self.client.get('/api/categories/')
+        with self.assertLogs('store.metrics', 'WARNING') as logs, override_settings(PERF_SLOW_REQUEST_MS=0):
+            self.client.get('/api/products/')
+        self.assertEqual(json.loads(logs.records[0].getMessage())['route'], 'api/products/')
+
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 401)
+        token = RefreshToken.for_user(User.objects.create_superuser('admin', 'admin@example.com', 'x')).access_token
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        routes = self.client.get('/api/metrics/', **auth).json()['routes']
+        self.assertEqual(routes['GET api/categories/']['count'], 3)
+        self.assertEqual(sum(routes['GET api/categories/']['buckets_ms'].values()), 3)
+        text = self.client.get('/api/metrics/', {'output': 'prometheus'}, **auth).content.decode()
+        self.assertIn('danshop_request_duration_ms_count{method="GET",route="api/categories/"} 3', text)
+
+
+class LoginTests(StoreTestCase):
+    def test_login_issues_a_single_token_pair(self):
+        User.objects.create_user(username='ana@example.com', email='ana@example.com', password='clave-segura-123')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/login/', {'username': 'ana@example.com', 'password': 'clave-segura-123'},
+                                        content_type='application/json')
+        data = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['token'], data['access'])
+        self.assertEqual(data['email'], 'ana@example.com')
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        self.assertEqual(len([q for q in ctx.captured_queries if q['sql'].startswith('INSERT')]), 1)
+
+    def test_pbkdf2_iterations_default_to_django(self):
+        self.assertEqual(TunedPBKDF2PasswordHasher().iterations, PBKDF2PasswordHasher.iterations)
+        with override_settings(PBKDF2_ITERATIONS=1000):
+            self.assertEqual(TunedPBKDF2PasswordHasher().iterations, 1000)
+
+
+class RegistrationTests(StoreTestCase):
+    def register(self, email, password='clave-segura-123'):
+        return self.client.post('/api/register/', {'first_name': 'Ana', 'last_name': 'Pérez', 'email': email,
+                                                   'password': password}, content_type='application/json')
+
+    def test_email_is_normalized_and_unique(self):
+        response = self.register('  Ana@Example.COM ')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['email'], 'ana@example.com')
+        user = User.objects.get()
+        self.assertEqual(user.username, 'ana@example.com')
+        self.assertTrue(user.password.startswith(settings.PASSWORD_HASHER))
+
+        response = self.register('ANA@example.com')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message': 'Existe'})
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_unique_index_rejects_a_concurrent_duplicate(self):
+        # La carrera que el chequeo previo no ve: decide el índice
+        accounts.create_user('ana@example.com', 'x')
+        with self.assertRaisesMessage(accounts.RegistrationError, 'Existe'):
+            accounts.create_user('ana@example.com', 'x')
+        User.objects.create_user('admin', email='')
+        User.objects.create_user('staff', email='')  # los emails vacíos no chocan
+
+    def test_email_migration_detects_duplicates_after_trimming(self):
+        migration = importlib.import_module('store.migrations.0016_user_email_unique')
+        # create() y no create_user(): datos viejos, sin pasar por normalize_email
+        User.objects.create(username='ana', email='ana@example.com')
+        User.objects.create(username='ana2', email=' Ana@Example.com ')
+        with self.assertRaisesMessage(RuntimeError, 'ana@example.com'):
+            migration.normalize_emails(apps, None)
+
+    def test_invalid_email(self):
+        response = self.register('no-es-un-email')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(User.objects.exists())
+
+    def test_login_with_mixed_case_email(self):
+        self.register('ana@example.com')
+        response = self.client.post('/api/login/', {'username': 'Ana@Example.com', 'password': 'clave-segura-123'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_email_lookup_uses_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("EXPLAIN QUERY PLAN de SQLite")
+        queryset = User.objects.alias(key=accounts.EmailKey('email')).filter(key='ana@example.com')
+        self.assertIn('store_user_email_ci_uniq', queryset.explain())
+
+
+class ReplicaRoutingTests(StoreTestCase):
+    router = routers.ReplicaRouter()
+
+    @override_settings(DATABASE_REPLICAS=['replica_1'], DATABASE_REPLICA_LAG=5)
+    def test_catalog_reads_go_to_replica(self):
+        self.assertIsNone(self.router.db_for_read(Product))
+        with routers.read_replica(timezone.now() - timedelta(minutes=1)):
+            self.assertEqual(self.router.db_for_read(Product), 'replica_1')
+            self.assertIsNone(self.router.db_for_read(User))
+            self.assertEqual(self.router.db_for_write(Product), 'default')
+        # Recién cambiado: la réplica puede estar atrasada
+        with routers.read_replica(timezone.now()):
+            self.assertIsNone(self.router.db_for_read(Product))
+        self.assertFalse(self.router.allow_migrate('replica_1', 'store'))
+        self.assertIsNone(self.router.allow_migrate('default', 'store'))
+
+    def test_without_replicas_everything_reads_primary(self):
+        with routers.read_replica():
+            self.assertIsNone(self.router.db_for_read(Product))
+
+    def test_only_cache_misses_open_the_replica(self):
+        make_catalog(3)
+        with mock.patch.object(routers, 'choose_replica', return_value=None) as choose:
+            self.client.get('/api/products/')
+            self.client.get('/api/products/')  # de la caché
+            self.client.post('/api/create_preference/', '{}', content_type='application/json')
+        self.assertEqual(choose.call_count, 1)
+
+
+class StaticFilesTests(StoreTestCase):
+    ASSET = '/assets/index-AbCd1234.js'
+
+    def setUp(self):
+        dist = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, dist, ignore_errors=True)
+        (dist / 'assets').mkdir()
+        (dist / 'index.html').write_text('<div id="root"></div>')
+        (dist / 'logo.png').write_bytes(b'png')
+        (dist / 'assets' / 'index-AbCd1234.js').write_text('console.log(1);' * 100)
+        (dist / 'assets' / 'index-AbCd1234.js.br').write_bytes(b'brotli')
+        # El middleware se arma con el primer request de cada cliente
+        overrides = override_settings(FRONTEND_DIST=dist, WHITENOISE_ROOT=dist)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def get(self, path, **extra):
+        response = self.client.get(path, **extra)
+        self.addCleanup(response.close)
+        return response
+
+    def test_hashed_assets_are_immutable_and_precompressed(self):
+        response = self.get(self.ASSET, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertNotIn('immutable', self.get('/logo.png')['Cache-Control'])
+        self.assertEqual(self.get('/index.html')['Cache-Control'], 'no-cache')
+
+    def test_frontend_routes_return_index(self):
+        response = self.get('/product/5')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'<div id="root"></div>')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertEqual(self.get('/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.get('/api/no-existe/').status_code, 404)
+
+    def test_reserved_prefixes_without_slash_are_not_frontend(self):
+        response = self.get('/admin')
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response['Location'], '/admin/')
+        self.assertNotEqual(self.get('/api').content, b'<div id="root"></div>')
+        self.assertEqual(self.get('/administracion').content, b'<div id="root"></div>')
+
+    async def test_async_stack_serves_from_memory(self):
+        response = await self.async_client.get(self.ASSET, headers={'accept-encoding': 'br'})
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.content, b'brotli')
+        self.assertIn('immutable', response['Cache-Control'])
+
+    async def test_async_stack_streams_large_files(self):
+        with mock.patch.object(static, 'MAX_IN_MEMORY', 100), mock.patch.object(static, 'CHUNK_SIZE', 512):
+            response = await self.async_client.get(self.ASSET)
+            self.assertTrue(response.streaming)
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(b''.join(chunks), b'console.log(1);' * 100)
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(response['Content-Length'], '1500')
+
+
+class TokenCompactionTests(StoreTestCase):
+    def setUp(self):
+        now = timezone.now()
+        rows = [OutstandingToken(jti=f'jti-{i}', token='x', created_at=now,
+                                 expires_at=now + timedelta(days=-1 if i < 7 else 1)) for i in range(10)]
+        OutstandingToken.objects.bulk_create(rows)
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token)
+                                              for token in OutstandingToken.objects.filter(jti__in=['jti-0', 'jti-8'])])
+
+    def test_prunes_expired_in_batches(self):
+        self.assertEqual(tokens.prune_expired(batch_size=3), (7, 3))
+        self.assertEqual(tokens.table_sizes(), {'outstanding': 3, 'blacklisted': 1})
+        self.assertEqual(tokens.prune_expired(batch_size=3), (0, 0))
+
+    def test_expiry_lookup_uses_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("EXPLAIN QUERY PLAN de SQLite")
+        queryset = OutstandingToken.objects.filter(expires_at__lte=timezone.now()).order_by('expires_at')
+        self.assertIn('store_outstanding_expires_idx', queryset.explain())
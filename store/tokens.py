@@ -0,0 +1,45 @@
+import time
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+# ==========================================
+# COMPACTACIÓN DE LA LISTA NEGRA DE JWT
+# ==========================================
+# Con ROTATE_REFRESH_TOKENS + BLACKLIST_AFTER_ROTATION cada login/refresh deja
+# filas en OutstandingToken/BlacklistedToken y nadie las borra. Un token vencido
+# ya no pasa la validación de firma/exp, así que sus filas sobran.
+# flushexpiredtokens de simplejwt lo borra todo en un solo DELETE (un lock largo
+# sobre una tabla enorme); aquí se borra de a lotes de 'batch_size' ids, cada uno
+# en su propia transacción corta, recorriendo el índice de expires_at
+# (migración 0015_outstanding_token_expiry_index).
+
+
+def table_sizes():
+    # Conteo exacto: es un trabajo nocturno y una estimación no refleja lo recién borrado
+    return {'outstanding': OutstandingToken.objects.count(), 'blacklisted': BlacklistedToken.objects.count()}
+
+
+def prune_expired(batch_size=1000, now=None, pause=0.0, max_batches=None, progress=None):
+    """
+    Borra tokens vencidos (y su entrada en la lista negra) de a lotes.
+    Devuelve (borrados, lotes). progress(borrados, lotes) se llama tras cada lote.
+    """
+    now = now or timezone.now()
+    deleted = batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = list(OutstandingToken.objects
+                   .filter(expires_at__lte=now)
+                   .order_by('expires_at').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            BlacklistedToken.objects.filter(token_id__in=ids).delete()
+            deleted += OutstandingToken.objects.filter(id__in=ids).delete()[1].get(OutstandingToken._meta.label, 0)
+        batches += 1
+        if progress:
+            progress(deleted, batches)
+        if pause:
+            time.sleep(pause)  # deja pasar a los logins entre lote y lote
+    return deleted, batches
@@ -1,127 +1,272 @@
-import mercadopago
-from rest_framework.decorators import api_view
+import hashlib
+import json
+import os
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_POST, require_safe
+from django.views.static import serve
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
-from django.contrib.auth.models import User 
-from .models import Product, Category
+from .models import Product, Category, Order
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.views import TokenObtainPairView 
-from .serializers import ProductSerializer, CategorySerializer, UserSerializer, MyTokenObtainPairSerializer
+from .serializers import ProductSerializer, CategorySerializer, UserSerializer, MyTokenObtainPairSerializer, CheckoutSerializer
+from .pagination import KeysetPage, InvalidCursor
+from .queries import PRODUCT_PLAN
+from .fast import FastProductSerializer
+from .filters import CatalogFilter
+from .cache import cached_catalog_view, get_stats as get_cache_stats
+from . import accounts, checkout, metrics, payments, recommendations
 
 # --- AUTENTICACIÓN ---
 class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
 
-@api_view(['POST'])
-def register_user(request):
+@csrf_exempt
+@require_POST
+async def register_user(request):
+    """
+    Vista async: el hash de la contraseña corre en el pool de accounts, así una
+    ráfaga de registros no deja al worker sin atender el catálogo.
+    """
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'message': 'JSON inválido'}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({'message': 'JSON inválido'}, status=400)
     try:
-        data = request.data
-        if User.objects.filter(email=data['email']).exists():
-            return Response({'message': 'Existe'}, status=400)
-        user = User.objects.create_user(username=data['email'], email=data['email'], password=data['password'], first_name=data.get('first_name',''), last_name=data.get('last_name',''))
-        return Response(UserSerializer(user, many=False).data)
-    except Exception as e: return Response({'message': str(e)}, status=400)
+        user = await accounts.aregister(data)
+    except accounts.RegistrationError as exc:
+        return JsonResponse({'message': exc.message}, status=400)
+    return JsonResponse(UserSerializer(user, many=False).data)
 
 # --- TIENDA ---
+def _requested_fields(request):
+    """
+    ?fields=id,name,price -> lista de campos válidos de ProductSerializer.
+    'id' siempre va incluido porque el cursor y el frontend lo necesitan.
+    """
+    raw = request.GET.get('fields')
+    if not raw:
+        return None
+    allowed = ProductSerializer.Meta.fields
+    fields = [f for f in raw.split(',') if f in allowed]
+    if 'id' not in fields:
+        fields.insert(0, 'id')
+    return fields
+
+def _product_page(request, queryset, ordering):
+    """Listado por la vía rápida (.values() + FastProductSerializer). Lanza InvalidCursor."""
+    fast = FastProductSerializer(_requested_fields(request))
+    extra = ['created_at', 'price'] + (['search_rank'] if 'search_rank' in queryset.query.annotations else [])
+    queryset = queryset.values(*fast.columns(extra=extra))
+
+    # Paginación por cursor: ?ordering=min_price|max_price&limit=24&cursor=...
+    page = KeysetPage(queryset, ordering=ordering,
+                      cursor=request.GET.get('cursor'), limit=request.GET.get('limit'))
+    return page, fast.serialize(page.object_list)
+
 @api_view(['GET'])
+@cached_catalog_view
 def get_products(request):
-    queryset = Product.objects.filter(is_active=True)
-    
-    # Filtros que ya tenías
-    if request.GET.get('search'): queryset = queryset.filter(name__icontains=request.GET.get('search'))
-    if request.GET.get('category'): queryset = queryset.filter(category_id=request.GET.get('category'))
-    
-    # --- AGREGA SOLO ESTO AQUÍ ---
-    ordering = request.GET.get('ordering')
-    if ordering == 'min_price':
-        queryset = queryset.order_by('price')
-    elif ordering == 'max_price':
-        queryset = queryset.order_by('-price')
-    # -----------------------------
-
-    return Response(ProductSerializer(queryset, many=True).data)
+    # search, category, brand, label, min_price, max_price (multivalor donde aplica)
+    catalog_filter = CatalogFilter(request.GET)
+    ordering = catalog_filter.ordering(request.GET.get('ordering'))
+
+    try: page, data = _product_page(request, catalog_filter.apply(), ordering)
+    except InvalidCursor: return Response({'message': 'Cursor inválido'}, status=400)
+
+    return page.apply_headers(request, Response(data))
 
 @api_view(['GET'])
+@cached_catalog_view
+def get_catalog(request):
+    """Grilla + facetas con conteos en una sola ida y vuelta (sidebar del catálogo)."""
+    catalog_filter = CatalogFilter(request.GET)
+    ordering = catalog_filter.ordering(request.GET.get('ordering'))
+
+    try: page, data = _product_page(request, catalog_filter.apply(), ordering)
+    except InvalidCursor: return Response({'message': 'Cursor inválido'}, status=400)
+
+    response = Response({'results': data, 'next': page.next_cursor, 'facets': catalog_filter.facets()})
+    return page.apply_headers(request, response)
+
+@api_view(['GET'])
+@cached_catalog_view
 def get_product(request, pk):
-    try: return Response(ProductSerializer(Product.objects.get(pk=pk), many=False).data)
+    try: return Response(ProductSerializer(PRODUCT_PLAN.apply(Product.objects.all()).get(pk=pk), many=False).data)
     except: return Response({'message': 'No encontrado'}, status=404)
 
 @api_view(['GET'])
+@cached_catalog_view
 def get_categories(request): return Response(CategorySerializer(Category.objects.all(), many=True).data)
 
 @api_view(['GET'])
-def get_unique_brands(request): return Response(Product.objects.values_list('brand', flat=True).distinct().order_by('brand'))
+@cached_catalog_view
+def get_unique_brands(request): return Response(list(Product.objects.values_list('brand', flat=True).distinct().order_by('brand')))
 
 @api_view(['GET'])
+@cached_catalog_view
 def get_related_products(request, pk):
-    try: return Response(ProductSerializer(Product.objects.filter(category=Product.objects.get(pk=pk).category).exclude(pk=pk)[:4], many=True).data)
-    except: return Response([])
+    # Vecinos precalculados (recommendations.py): una lectura por índice
+    queryset = Product.objects.filter(is_active=True, recommended_in__product_id=pk).order_by('recommended_in__rank')
+    data = ProductSerializer(PRODUCT_PLAN.apply(queryset)[:4], many=True).data
+    if not data:
+        data = ProductSerializer(PRODUCT_PLAN.apply(recommendations.same_category(pk))[:4], many=True).data
+    return Response(data)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats(request): return Response(get_cache_stats())
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def request_metrics(request):
+    """Histogramas de este proceso. ?output=prometheus para el formato de texto de Prometheus."""
+    if request.GET.get('output') == 'prometheus':
+        return HttpResponse(metrics.prometheus(), content_type='text/plain; version=0.0.4')
+    return Response({'pid': os.getpid(), 'routes': metrics.snapshot()})
+
+def _cart_ids(request):
+    """?ids=3,1,2 -> {1, 2, 3} (ignora basura)"""
+    return sorted({int(pk) for pk in request.GET.get('ids', '').split(',') if pk.strip().isdecimal()})
+
+def _cart_signature(request):
+    # Misma clave de caché sin importar el orden de los ids
+    ids = ','.join(map(str, _cart_ids(request)))
+    return f"cart:{ids}:{request.GET.get('limit', '')}:{request.GET.get('fields', '')}"
+
+@api_view(['GET'])
+@cached_catalog_view(key=_cart_signature)
+def get_cart_recommendations(request):
+    """Sugerencias del carrito calculadas en el servidor (CartPage ya no baja todo el catálogo)."""
+    try: limit = int(request.GET.get('limit', 4))
+    except ValueError: limit = 4
+
+    fields = _requested_fields(request)
+    ids = recommendations.for_cart(_cart_ids(request), limit)
+    products = PRODUCT_PLAN.apply(Product.objects.order_by(), fields).in_bulk(ids)
+    ordered = [products[pk] for pk in ids if pk in products]
+    return Response(ProductSerializer(ordered, many=True, fields=fields).data)
 
 # ==========================================
-# 3. PAGOS (MODO DEBUG - SIN CRASH)
+# 3. PAGOS (CHECKOUT)
 # ==========================================
 
-# 🟢 TU TOKEN DE PRUEBA (Verificado)
-MP_ACCESS_TOKEN = "APP_USR-4002223461716540-120200-b3ca03a7f86ff3bc6ed70a4e66f0c4c1-1331103831"
+def _jwt_user(request):
+    """Usuario del token JWT (si viene); el checkout también admite invitados."""
+    try:
+        result = JWTAuthentication().authenticate(Request(request))
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+def _place_order(request, data):
+    # Todo lo que toca la BD antes de llamar a MP, en un solo salto a hilo síncrono
+    order = checkout.create_order(data['items'], data['payer'], data['coupon'], user=_jwt_user(request))
+    return order, list(order.items.all())
+
 
-@api_view(['POST'])
-def create_preference(request):
+def _checkout_error(exc):
+    body = {'error': exc.message}
+    if exc.detail is not None:
+        body['detail'] = exc.detail
+    return JsonResponse(body, status=exc.status)
+
+
+@csrf_exempt
+@require_POST
+async def create_preference(request):
+    """
+    Carrito -> Order (precios del catálogo) -> preferencia de Mercado Pago.
+    Vista async: mientras esperamos a MP el worker sigue atendiendo otras
+    peticiones (bajo uvicorn). Devuelve el link de pago y la referencia del pedido.
+    """
+    try:
+        payload = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'error': 'JSON inválido'}, status=400)
+    serializer = CheckoutSerializer(data=payload)
+    if not serializer.is_valid():
+        return JsonResponse({'error': 'Datos de compra inválidos', 'detail': serializer.errors}, status=400)
     try:
-        sdk = mercadopago.SDK(MP_ACCESS_TOKEN)
-        cart_items = request.data.get('items', [])
-        items_list = []
-
-        # 1. LIMPIEZA DE DATOS (Vital)
-        # Convertimos a float e int aquí para que no falle aunque el frontend envíe texto
-        for item in cart_items:
-            try:
-                precio_final = float(item['price'])
-                cantidad_final = int(item.get('quantity', 1))
-            except ValueError:
-                print(f"❌ Dato inválido en producto: {item}")
-                return Response({'error': 'Precio o cantidad inválidos'}, status=400)
-
-            items_list.append({
-                "title": item['name'],
-                "quantity": cantidad_final,
-                "unit_price": precio_final,
-                "currency_id": "PEN"
-            })
-
-        # 2. CONFIGURACIÓN SIMPLE
-        preference_data = {
-            "items": items_list,
-            # Quitamos auto_return temporalmente para ver si es la causa del bloqueo
-            # "auto_return": "approved", 
-            "back_urls": {
-                "success": "http://localhost:5173/success",
-                "failure": "http://localhost:5173/failure",
-                "pending": "http://localhost:5173/pending"
-            },
-            "statement_descriptor": "DAN STORE",
-            "external_reference": "PRUEBA-001"
-        }
-
-        # 3. CREACIÓN Y ANÁLISIS DE RESPUESTA
-        print("🔵 Enviando a Mercado Pago...")
-        preference_response = sdk.preference().create(preference_data)
-        preference = preference_response["response"]
-
-        # 🚨 AQUÍ ESTÁ EL CAMBIO CRÍTICO 🚨
-        # Verificamos si Mercado Pago aceptó (Status 201) ANTES de pedir el link.
-        status_mp = preference_response.get("status")
-        
-        if status_mp not in [200, 201]:
-            print("\n========================================")
-            print("❌ MERCADO PAGO RECHAZÓ LA SOLICITUD:")
-            print(f"Status: {status_mp}")
-            print("MENSAJE EXACTO:", preference) # <-- ESTO NOS DIRÁ EL ERROR
-            print("========================================\n")
-            # Devolvemos el error al frontend para que no se quede cargando
-            return Response(preference, status=400)
-
-        # Si pasamos el filtro, el link existe seguro
-        print(f"✅ ÉXITO: Link generado -> {preference['init_point']}")
-        return Response({'init_point': preference['init_point']})
-
-    except Exception as e:
-        print("\n❌ ERROR DE PYTHON (CRASH):", e)
-        return Response({'error': str(e)}, status=500)
\ No newline at end of file
+        order, items = await sync_to_async(_place_order)(request, serializer.validated_data)
+    except checkout.CheckoutError as exc:
+        return _checkout_error(exc)
+    try:
+        await checkout.acreate_preference(order, items)
+    except checkout.CheckoutError as exc:
+        await sync_to_async(checkout.abandon)(order)
+        return _checkout_error(exc)
+    return JsonResponse({
+        'init_point': order.init_point,
+        'external_reference': order.external_reference,
+        'total': str(order.total),
+    })
+
+
+@csrf_exempt
+@require_POST
+def payment_webhook(request):
+    """
+    Aviso de Mercado Pago: se valida, se encola (PaymentEvent) y se responde
+    al instante. El estado del pedido lo actualiza process_payment_events.
+    """
+    try:
+        body = json.loads(request.body or b'{}')
+    except ValueError:
+        body = {}
+    if not isinstance(body, dict):
+        body = {}
+    notification = payments.parse_notification(request.GET, body)
+    if notification is None:
+        return JsonResponse({'error': 'Aviso no reconocido'}, status=400)
+    if not payments.verify_signature(request, notification.resource_id):
+        return JsonResponse({'error': 'Firma inválida'}, status=401)
+    payments.enqueue(notification, body)
+    return JsonResponse({'received': True})
+
+
+@api_view(['GET'])
+def get_order_status(request, reference):
+    # La referencia es larga y aleatoria: basta para consultar el estado (SuccessPage)
+    order = Order.objects.filter(external_reference=reference).values('external_reference', 'status', 'total').first()
+    if order is None:
+        raise Http404
+    return Response({**order, 'total': str(order['total'])})
+
+
+# --- FRONTEND Y MEDIA ---
+@require_safe
+def frontend(request):
+    """
+    index.html del frontend compilado para cualquier ruta de React Router
+    (/catalog, /product/5, ...). Sus assets los sirve WhiteNoise (store/static.py).
+    """
+    try:
+        content = (settings.FRONTEND_DIST / 'index.html').read_bytes()
+    except FileNotFoundError:
+        raise Http404
+    etag = quote_etag(hashlib.md5(content).hexdigest())
+    response = (get_conditional_response(request, etag=etag)
+                or HttpResponse(content, content_type='text/html; charset=utf-8'))
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'  # apunta a los assets del último build
+    return response
+
+@require_safe
+def serve_media(request, path):
+    """Subidas con MEDIA_STORAGE=local (con DEBUG=False, static() de Django no sirve nada)."""
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)  # 304 con If-Modified-Since
+    response['Cache-Control'] = f'public, max-age={settings.MEDIA_MAX_AGE}'
+    return response